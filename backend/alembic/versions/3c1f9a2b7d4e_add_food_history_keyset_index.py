@@ -0,0 +1,36 @@
+"""add food history keyset index
+
+Revision ID: 3c1f9a2b7d4e
+Revises: 281a48e58182
+Create Date: 2026-10-19 09:12:04.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9a2b7d4e'
+down_revision: Union[str, None] = '281a48e58182'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination orders by (meal_datetime, id); include id so the
+    # index covers the tie-breaker and cursor seeks stay index-only.
+    op.create_index(
+        'idx_user_food_history_user_meal_id',
+        'user_food_history',
+        ['user_id', 'meal_datetime', 'id'],
+        unique=False
+    )
+    op.drop_index('idx_user_meal_datetime', table_name='user_food_history')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('idx_user_meal_datetime', 'user_food_history', ['user_id', 'meal_datetime'], unique=False)
+    op.drop_index('idx_user_food_history_user_meal_id', table_name='user_food_history')
@@ -0,0 +1,40 @@
+"""add nutrient profiles
+
+Revision ID: 4f8d3a6b2e71
+Revises: e2a7b5d40c19
+Create Date: 2026-10-19 20:12:54.330871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f8d3a6b2e71'
+down_revision: Union[str, None] = 'e2a7b5d40c19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('nutrient_profiles',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('food_name', sa.String(), nullable=False),
+    sa.Column('nutrients', sa.JSON(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('llm_prompt_version', sa.String(), nullable=False),
+    sa.Column('estimated_by', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_nutrient_profiles_food_name', 'nutrient_profiles', ['food_name'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_nutrient_profiles_food_name', table_name='nutrient_profiles')
+    op.drop_table('nutrient_profiles')
@@ -0,0 +1,38 @@
+"""add food image processing checkpoint
+
+Revision ID: 5b7e2d9c1a36
+Revises: 8d2e61c4f0a7
+Create Date: 2026-10-19 15:02:47.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2d9c1a36'
+down_revision: Union[str, None] = '8d2e61c4f0a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('food_images', sa.Column('recognition_result', sa.JSON(), nullable=True))
+    op.add_column('food_images', sa.Column('processing_attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('food_images', sa.Column('lease_owner', sa.String(), nullable=True))
+    op.add_column('food_images', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+    op.add_column('food_items', sa.Column('position', sa.Integer(), nullable=True))
+    op.create_index('idx_food_items_image_position', 'food_items', ['food_image_id', 'position'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_food_items_image_position', table_name='food_items')
+    op.drop_column('food_items', 'position')
+    op.drop_column('food_images', 'lease_expires_at')
+    op.drop_column('food_images', 'lease_owner')
+    op.drop_column('food_images', 'processing_attempts')
+    op.drop_column('food_images', 'recognition_result')
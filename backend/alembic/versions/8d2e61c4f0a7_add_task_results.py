@@ -0,0 +1,50 @@
+"""add task results
+
+Revision ID: 8d2e61c4f0a7
+Revises: 3c1f9a2b7d4e
+Create Date: 2026-10-19 13:40:22.507316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e61c4f0a7'
+down_revision: Union[str, None] = '3c1f9a2b7d4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_results',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('task_id', sa.String(), nullable=False),
+    sa.Column('task_name', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('food_image_id', sa.UUID(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('runtime_ms', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['food_image_id'], ['food_images.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_task_results_task_id', 'task_results', ['task_id'], unique=True)
+    op.create_index('idx_task_results_food_image_id', 'task_results', ['food_image_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_task_results_food_image_id', table_name='task_results')
+    op.drop_index('idx_task_results_task_id', table_name='task_results')
+    op.drop_table('task_results')
@@ -0,0 +1,66 @@
+"""add receipts
+
+Revision ID: 9c4e1f7a2d58
+Revises: 5b7e2d9c1a36
+Create Date: 2026-10-19 17:21:06.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e1f7a2d58'
+down_revision: Union[str, None] = '5b7e2d9c1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('receipts',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('ocr_text', sa.Text(), nullable=True),
+    sa.Column('image_url', sa.String(), nullable=True),
+    sa.Column('store_name', sa.String(), nullable=True),
+    sa.Column('purchased_at', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('processed_item_count', sa.Integer(), nullable=False),
+    sa.Column('total_nutrients', sa.JSON(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_receipts_user_created_at', 'receipts', ['user_id', 'created_at'], unique=False)
+    op.create_table('receipt_items',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('receipt_id', sa.UUID(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('raw_line', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Float(), nullable=False),
+    sa.Column('unit', sa.String(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=True),
+    sa.Column('fdc_id', sa.String(), nullable=True),
+    sa.Column('nutrients', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['receipt_id'], ['receipts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_receipt_items_receipt_position', 'receipt_items', ['receipt_id', 'position'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_receipt_items_receipt_position', table_name='receipt_items')
+    op.drop_table('receipt_items')
+    op.drop_index('idx_receipts_user_created_at', table_name='receipts')
+    op.drop_table('receipts')
@@ -0,0 +1,30 @@
+"""add food image batch id
+
+Revision ID: a3d9c6e8f214
+Revises: 4f8d3a6b2e71
+Create Date: 2026-10-19 21:05:17.442903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d9c6e8f214'
+down_revision: Union[str, None] = '4f8d3a6b2e71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('food_images', sa.Column('batch_id', sa.UUID(), nullable=True))
+    op.create_index('idx_food_images_batch_id', 'food_images', ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_food_images_batch_id', table_name='food_images')
+    op.drop_column('food_images', 'batch_id')
@@ -0,0 +1,61 @@
+"""add estimation jobs
+
+Revision ID: c81f2b7e5d93
+Revises: a3d9c6e8f214
+Create Date: 2026-10-19 21:48:02.915364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f2b7e5d93'
+down_revision: Union[str, None] = 'a3d9c6e8f214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('estimation_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('input_format', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('chunk_count', sa.Integer(), nullable=True),
+    sa.Column('completed_chunk_count', sa.Integer(), nullable=False),
+    sa.Column('failed_chunk_count', sa.Integer(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_estimation_jobs_user_created_at', 'estimation_jobs', ['user_id', 'created_at'], unique=False)
+    op.create_table('estimation_job_chunks',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('job_id', sa.UUID(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('items', sa.JSON(), nullable=False),
+    sa.Column('results', sa.JSON(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('task_id', sa.String(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['estimation_jobs.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_estimation_job_chunks_job_position', 'estimation_job_chunks', ['job_id', 'position'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_estimation_job_chunks_job_position', table_name='estimation_job_chunks')
+    op.drop_table('estimation_job_chunks')
+    op.drop_index('idx_estimation_jobs_user_created_at', table_name='estimation_jobs')
+    op.drop_table('estimation_jobs')
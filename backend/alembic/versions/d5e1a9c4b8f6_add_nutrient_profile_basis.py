@@ -0,0 +1,30 @@
+"""add nutrient profile basis
+
+Revision ID: d5e1a9c4b8f6
+Revises: c81f2b7e5d93
+Create Date: 2026-10-20 10:41:08.215377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e1a9c4b8f6'
+down_revision: Union[str, None] = 'c81f2b7e5d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('nutrient_profiles', sa.Column('basis', sa.String(), server_default='per_100g', nullable=False))
+    # Single-item estimates with prompt v1.0 were asked per unit (piece, lb, ...)
+    op.execute("UPDATE nutrient_profiles SET basis = 'per_unit' WHERE llm_prompt_version = 'v1.0'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('nutrient_profiles', 'basis')
@@ -0,0 +1,41 @@
+"""add sku mappings
+
+Revision ID: e2a7b5d40c19
+Revises: 9c4e1f7a2d58
+Create Date: 2026-10-19 18:44:31.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7b5d40c19'
+down_revision: Union[str, None] = '9c4e1f7a2d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sku_mappings',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('store', sa.String(), nullable=False),
+    sa.Column('sku', sa.String(), nullable=False),
+    sa.Column('fdc_id', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('hits', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_sku_mappings_store_sku', 'sku_mappings', ['store', 'sku'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_sku_mappings_store_sku', table_name='sku_mappings')
+    op.drop_table('sku_mappings')
@@ -1,14 +1,17 @@
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
 from sqlalchemy.orm import Session
-from datetime import datetime
+import logging
 import os
 
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.models.models import User
+from app.services.last_login import last_login_recorder
+from app.services.user_service import get_user_by_token
+
+logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/users/login")
 
@@ -25,9 +28,8 @@ async def get_current_user(
     token: str = Depends(oauth2_scheme)
 ) -> User:
     """Get current user from JWT token, or bypass if SKIP_AUTH=1."""
-    print(f"SKIP_AUTH: {os.getenv('SKIP_AUTH')}")
     if os.getenv("SKIP_AUTH") == "1":
-        print("Bypassing auth!")
+        logger.debug("SKIP_AUTH=1: bypassing auth")
         user = db.query(User).first()
         if not user:
             raise HTTPException(status_code=401, detail="No users in database for SKIP_AUTH bypass. Please create a user first.")
@@ -38,22 +40,11 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(User).filter(User.email == email).first()
+    user = get_user_by_token(db, token)
     if user is None:
         raise credentials_exception
 
-    # Update last login
-    user.last_login = datetime.utcnow()
-    db.commit()
+    # Update last login (write-behind; flushed in batches by the background flusher)
+    last_login_recorder.record(user.id, previous=user.last_login)
 
     return user 
\ No newline at end of file
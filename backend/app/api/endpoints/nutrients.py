@@ -1,33 +1,56 @@
-from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Literal, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 
 from app.services.nutrient_estimation import NutrientEstimationService, FoodItem, NutrientProfile
 from app.core.deps import get_openai_client
 from app.tasks.nutrient_tasks import estimate_nutrients_task # Import the Celery task
 from app.core.celery_app import celery_app # Import the Celery app instance
+from app.services.task_events import publish_task_event, QUEUED
+from app.services.task_results import record_tasks_queued
+from app.core.task_lanes import enqueue, BULK, INTERACTIVE
+from app.api.deps import get_current_user, get_db
+from app.crud import estimation_job as crud_job
+from app.db.session import SessionLocal
+from app.models.models import User
+from app.schemas.estimation_job import EstimationJobResponse
+from app.services.bulk_estimation import INVALID_UPLOAD_ERRORS, BulkEstimationService, stream_job_results
+from app.tasks.bulk_estimation_tasks import estimate_nutrients_chunk_task
+from app.schemas.task import TaskStatusResponse
+from app.services.task_status import get_persisted_task_statuses
+from celery import states
 
 router = APIRouter()
 
 class NutrientEstimationRequest(BaseModel):
     food_items: List[FoodItem]
-
-class TaskStatusResponse(BaseModel):
-    task_id: str
-    status: str
-    result: Optional[Dict[str, Any]] = None
-    error: Optional[str] = None
+    # "bulk" for backfills and integrations, so they queue apart from user-facing work
+    lane: Literal["interactive", "bulk"] = INTERACTIVE
 
 @router.post("/estimate", response_model=TaskStatusResponse)
 async def estimate_nutrients_async(
     request: NutrientEstimationRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
     """
     Initiate a Celery task to estimate nutrients for a list of food items.
+    Progress events go to the caller's event stream as well as the task's.
     """
     try:
         # Directly call the Celery task and return its ID
-        task = estimate_nutrients_task.delay([item.model_dump() for item in request.food_items])
+        task = enqueue(
+            estimate_nutrients_task,
+            [item.model_dump() for item in request.food_items],
+            user_id=str(current_user.id),
+            lane=request.lane,
+        )
+        record_tasks_queued(db, "estimate_nutrients", current_user.id, [task.id])
+        publish_task_event(task.id, QUEUED, user_id=current_user.id)
         return TaskStatusResponse(task_id=task.id, status="processing", message="Nutrient estimation started.")
     except Exception as e:
         raise HTTPException(
@@ -56,7 +79,90 @@ async def get_nutrient_estimation_task_status(task_id: str):
                 error=str(task.result) # The error from the Celery task
             )
     else:
+        if task.state == states.PENDING:
+            # Redis status expired (or task unknown); fall back to the durable record
+            persisted = get_persisted_task_statuses([task_id])
+            if task_id in persisted:
+                return TaskStatusResponse(**persisted[task_id])
         return TaskStatusResponse(
             task_id=task_id,
             status="processing"
-        ) 
\ No newline at end of file
+        )
+
+def _enqueue_chunk(chunk_id) -> str:
+    return enqueue(estimate_nutrients_chunk_task, str(chunk_id), lane=BULK).id
+
+def _get_job(db: Session, job_id: UUID, current_user: User):
+    job = crud_job.get_job(db, job_id, user_id=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Estimation job not found")
+    return job
+
+@router.post("/jobs", response_model=EstimationJobResponse)
+async def create_estimation_job(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(None, description="Defaults from the Content-Type"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a bulk estimation job from an NDJSON or CSV request body of food
+    items (`description`, optional `quantity`, `unit` and `id`). The body is
+    read as a stream and handed to bulk workers in chunks as it arrives.
+    Read results from `/jobs/{job_id}/results`.
+    """
+    input_format = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    service = BulkEstimationService(db)
+    try:
+        return await service.create_job(
+            current_user.id, input_format, request.stream(), on_chunk=lambda chunk: _enqueue_chunk(chunk.id)
+        )
+    except (*INVALID_UPLOAD_ERRORS, ClientDisconnect) as e:
+        # Only the upload itself is the client's fault; storage and broker errors stay 5xx
+        raise HTTPException(status_code=400, detail=f"Error reading upload: {str(e)}")
+
+@router.get("/jobs/{job_id}", response_model=EstimationJobResponse)
+def get_estimation_job(
+    job_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a bulk estimation job's status and chunk counts."""
+    return _get_job(db, job_id, current_user)
+
+@router.get("/jobs/{job_id}/results")
+def stream_estimation_job_results(
+    job_id: UUID,
+    from_chunk: int = Query(0, ge=0, description="Resume from this chunk, e.g. after a dropped connection"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream a job's results as NDJSON, one line per input item in upload
+    order, as chunks finish. Each line carries its `chunk` number.
+    """
+    _get_job(db, job_id, current_user)
+
+    async def results():
+        # The request's session is closed once streaming starts, so use our own
+        stream_db = SessionLocal()
+        try:
+            async for line in stream_job_results(stream_db, job_id, from_chunk):
+                yield line
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@router.post("/jobs/{job_id}/resume", response_model=EstimationJobResponse)
+def resume_estimation_job(
+    job_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Re-run a job's failed or never-started chunks; finished chunks are kept."""
+    job = _get_job(db, job_id, current_user)
+    resumed = BulkEstimationService(db).resume_job(job, _enqueue_chunk)
+    response = EstimationJobResponse.model_validate(job)
+    response.resumed_chunk_count = resumed
+    return response
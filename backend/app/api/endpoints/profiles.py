@@ -0,0 +1,45 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from redis import RedisError
+
+from app.api import deps
+from app.schemas.profile import ProfileSummary
+from app.services.profiler import profile_store
+
+router = APIRouter()
+
+def _profiles_unavailable(e: RedisError) -> HTTPException:
+    return HTTPException(status_code=503, detail=f"Profile store unavailable: {str(e)}")
+
+@router.get("/", response_model=List[ProfileSummary])
+async def list_profiles(
+    limit: int = Query(50, ge=1, le=500),
+    current_user = Depends(deps.get_current_user),
+):
+    """
+    List recently captured request and task profiles, newest first.
+    """
+    try:
+        return profile_store.list_recent(limit)
+    except RedisError as e:
+        raise _profiles_unavailable(e)
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("html", pattern="^(html|text)$"),
+    current_user = Depends(deps.get_current_user),
+):
+    """
+    Fetch one profile by request or task ID, as pyinstrument HTML or plain text.
+    """
+    try:
+        profile = profile_store.get(profile_id)
+    except RedisError as e:
+        raise _profiles_unavailable(e)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "text":
+        return PlainTextResponse(profile["text"])
+    return HTMLResponse(profile["html"])
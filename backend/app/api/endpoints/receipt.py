@@ -1,4 +1,74 @@
-from backend.app.services.receipt_service import ReceiptService
-from backend.app.schemas.receipt import ReceiptCreate, ReceiptResponse
-from backend.app.api.deps import get_current_user
-from app.models.models import User 
\ No newline at end of file
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.core.task_lanes import enqueue, INTERACTIVE
+from app.models.models import User
+from app.schemas.receipt import ReceiptCreate, ReceiptResponse
+from app.services.receipt_service import ReceiptService
+from app.services.task_events import publish_task_event, QUEUED
+from app.services.task_results import record_tasks_queued
+from app.tasks.receipt_tasks import process_receipt_task
+
+router = APIRouter()
+
+def _enqueue(db: Session, receipt, current_user: User) -> ReceiptResponse:
+    task = enqueue(process_receipt_task, str(receipt.id), user_id=str(current_user.id), lane=INTERACTIVE)
+    record_tasks_queued(db, "process_receipt", current_user.id, [task.id])
+    publish_task_event(task.id, QUEUED, user_id=current_user.id, receipt_id=str(receipt.id))
+    response = ReceiptResponse.model_validate(receipt)
+    response.task_id = task.id
+    return response
+
+@router.post("/", response_model=ReceiptResponse)
+async def create_receipt(
+    receipt_in: ReceiptCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit a receipt as OCR text (on-device OCR, the default) and start parsing
+    and nutrient estimation in the background. Track progress with the
+    returned task ID or by polling the receipt.
+    """
+    receipt = ReceiptService(db).create_from_text(current_user.id, receipt_in)
+    return _enqueue(db, receipt, current_user)
+
+@router.post("/image", response_model=ReceiptResponse)
+async def create_receipt_from_image(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit a receipt photo for cloud OCR. Only allowed for users who turned
+    off offline OCR (`settings.ocr_offline = false`).
+    """
+    if (current_user.settings or {}).get("ocr_offline", True):
+        raise HTTPException(
+            status_code=403,
+            detail="Cloud OCR is disabled for this account; send the receipt's OCR text instead"
+        )
+    receipt = await ReceiptService(db).create_from_image(current_user.id, file)
+    return _enqueue(db, receipt, current_user)
+
+@router.get("/", response_model=List[ReceiptResponse])
+async def list_receipts(
+    skip: int = 0,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the current user's receipts, newest first."""
+    return ReceiptService(db).get_user_receipts(current_user.id, skip, limit)
+
+@router.get("/{receipt_id}", response_model=ReceiptResponse)
+async def get_receipt(
+    receipt_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a receipt with its line items, status and progress."""
+    return ReceiptService(db).get_receipt(receipt_id, current_user.id)
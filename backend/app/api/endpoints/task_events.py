@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.services.task_events import format_sse, stream_events, task_channel, user_channel
+from app.services.task_results import is_task_owner
+
+router = APIRouter()
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # keep nginx from buffering the stream
+}
+
+def _sse_response(request: Request, events) -> StreamingResponse:
+    async def generate():
+        async for event in events:
+            if await request.is_disconnected():
+                break
+            yield ": keep-alive\n\n" if event is None else format_sse(event)
+
+    return StreamingResponse(generate(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/")
+async def stream_user_task_events(
+    request: Request,
+    current_user = Depends(deps.get_current_user),
+):
+    """
+    Server-Sent Events stream of stage transitions (queued, recognizing,
+    estimating, done, failed) for all of the current user's tasks.
+    Replaces polling the per-task status endpoints.
+    """
+    return _sse_response(request, stream_events([user_channel(current_user.id)]))
+
+@router.get("/tasks/{task_id}")
+async def stream_task_events(
+    task_id: str,
+    request: Request,
+    current_user = Depends(deps.get_current_user),
+    db: Session = Depends(deps.get_db),
+):
+    """
+    Server-Sent Events stream for one of the current user's tasks. The
+    task's current stage is sent immediately and the stream closes once the
+    task is done or failed.
+    """
+    if not await run_in_threadpool(is_task_owner, db, task_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    return _sse_response(request, stream_events([task_channel(task_id)], task_id=task_id))
@@ -0,0 +1,19 @@
+from typing import List
+from fastapi import APIRouter, HTTPException, Query
+
+from app.schemas.task import BatchTaskStatusResponse
+from app.services.task_status import get_task_statuses
+
+router = APIRouter()
+
+MAX_TASK_IDS = 100
+
+@router.get("/status", response_model=BatchTaskStatusResponse)
+async def get_batch_task_status(task_ids: List[str] = Query(..., alias="task_id")):
+    """
+    Get the status of several tasks (food image or nutrient estimation) in one request.
+    Pass `task_id` once per task, e.g. `?task_id=a&task_id=b`.
+    """
+    if len(task_ids) > MAX_TASK_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_TASK_IDS} task IDs per request")
+    return BatchTaskStatusResponse(tasks=get_task_statuses(task_ids))
@@ -1,7 +1,9 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+import logging
 
 from app.api import deps
 from app.crud import user_food_history as crud
@@ -11,6 +13,8 @@ from app.schemas.user_food_history import (
     UserFoodHistoryUpdate,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.post("/", response_model=UserFoodHistory)
@@ -23,33 +27,68 @@ def create_food_history(
     """
     Create new food history entry.
     """
-    print(f"[create_food_history API] DB session ID: {id(db)}")
-    print(f"[create_food_history API] Current user ID: {current_user.id}")
+    logger.debug(f"[create_food_history] user {current_user.id}")
     return crud.create_user_food_history(
         db=db, obj_in=food_history_in, user_id=current_user.id
     )
 
 @router.get("/", response_model=List[UserFoodHistory])
 def read_food_history(
+    response: Response,
     db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     current_user = Depends(deps.get_current_user),
 ) -> List[UserFoodHistory]:
     """
-    Retrieve food history entries.
+    Retrieve food history entries, newest first.
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page;
+    the header is absent on the last page.
     """
-    print(f"[read_food_history API] DB session ID: {id(db)}")
-    print(f"[read_food_history API] Current user ID: {current_user.id}")
-    if start_date and end_date:
-        return crud.get_user_food_history_by_date_range(
-            db=db, user_id=current_user.id, start_date=start_date, end_date=end_date
-        )
-    return crud.get_user_food_history(
-        db=db, user_id=current_user.id, skip=skip, limit=limit
-    )
+    logger.debug(f"[read_food_history] user {current_user.id}")
+    try:
+        if start_date and end_date:
+            page = crud.get_user_food_history_by_date_range(
+                db=db, user_id=current_user.id, start_date=start_date, end_date=end_date,
+                limit=limit, cursor=cursor
+            )
+        else:
+            page = crud.get_user_food_history(
+                db=db, user_id=current_user.id, limit=limit, cursor=cursor
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    next_cursor = crud.next_cursor(page, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return page
+
+@router.get("/export")
+def export_food_history(
+    db: Session = Depends(deps.get_db),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user = Depends(deps.get_current_user),
+) -> StreamingResponse:
+    """
+    Stream food history entries as NDJSON, one entry per line, newest first.
+    """
+    user_id = current_user.id
+
+    def generate():
+        # FastAPI closes yield-dependencies before the body is streamed; the
+        # session is reusable after close() and is released again when done.
+        try:
+            for entry in crud.stream_user_food_history(
+                db=db, user_id=user_id, start_date=start_date, end_date=end_date
+            ):
+                yield UserFoodHistory.model_validate(entry).model_dump_json() + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 @router.get("/{history_id}", response_model=UserFoodHistory)
 def read_food_history_by_id(
@@ -60,8 +99,7 @@ def read_food_history_by_id(
     """
     Get specific food history entry by ID.
     """
-    print(f"[read_food_history_by_id API] DB session ID: {id(db)}")
-    print(f"[read_food_history_by_id API] Current user ID: {current_user.id}")
+    logger.debug(f"[read_food_history_by_id] user {current_user.id}")
     food_history = crud.get_user_food_history_by_id(
         db=db, user_id=current_user.id, history_id=history_id
     )
@@ -1,12 +1,18 @@
 from typing import List
+from uuid import UUID
+from celery import group
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
 from app.models.models import User
-from app.schemas.food_image import FoodImageResponse
+from app.core.config import settings
+from app.schemas.food_image import FoodImageBatchItem, FoodImageBatchResponse, FoodImageResponse
 from app.services.food_image_service import FoodImageService
 from app.tasks.food_image_tasks import process_food_image_task, get_task_status
+from app.services.task_events import publish_task_event, QUEUED
+from app.services.task_results import record_tasks_queued
+from app.core.task_lanes import enqueue, lane_signature, INTERACTIVE
 
 router = APIRouter()
 
@@ -24,13 +30,74 @@ async def create_food_image(
     food_image = await food_image_service.create_food_image(current_user.id, file)
     
     # Start Celery task for processing
-    task = process_food_image_task.delay(str(food_image.id))
-    
+    task = enqueue(process_food_image_task, str(food_image.id), user_id=str(current_user.id), lane=INTERACTIVE)
+    record_tasks_queued(db, "process_food_image", current_user.id, [task.id], [food_image.id])
+    publish_task_event(task.id, QUEUED, user_id=current_user.id, image_id=str(food_image.id))
+
     # Add task ID to response
     response = FoodImageResponse.from_orm(food_image)
     response.task_id = task.id
     return response
 
+@router.post("/batch", response_model=FoodImageBatchResponse)
+async def create_food_image_batch(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload several food images in one request (e.g. a day's meals) and start
+    processing them as one group of tasks. Returns a batch ID and each file's
+    image ID, task ID and status; files that fail validation are reported as
+    "rejected" and the rest of the batch goes ahead.
+    """
+    if len(files) > settings.MAX_BATCH_UPLOAD_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can have at most {settings.MAX_BATCH_UPLOAD_FILES} images"
+        )
+    # Read before the batch commit expires the user
+    user_id = current_user.id
+    food_image_service = FoodImageService(db)
+    batch_id, uploads = await food_image_service.create_food_image_batch(user_id, files)
+
+    stored = [upload for upload in uploads if upload.image_id is not None]
+    if stored:
+        group_result = group(
+            lane_signature(process_food_image_task, str(upload.image_id), user_id=str(user_id), lane=INTERACTIVE)
+            for upload in stored
+        ).apply_async()
+        record_tasks_queued(
+            db, "process_food_image", user_id,
+            [task.id for task in group_result.results], [upload.image_id for upload in stored],
+        )
+        for upload, task in zip(stored, group_result.results):
+            upload.task_id = task.id
+            publish_task_event(task.id, QUEUED, user_id=user_id, image_id=str(upload.image_id), batch_id=str(batch_id))
+
+    return FoodImageBatchResponse(batch_id=batch_id, images=[
+        FoodImageBatchItem(
+            filename=upload.filename,
+            image_id=upload.image_id,
+            task_id=upload.task_id,
+            status=upload.status,
+            error=upload.error,
+        )
+        for upload in uploads
+    ])
+
+@router.get("/batch/{batch_id}", response_model=FoodImageBatchResponse)
+async def get_food_image_batch(
+    batch_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the processing status of each stored image in a batch."""
+    images = FoodImageService(db).get_batch_images(batch_id, current_user.id)
+    return FoodImageBatchResponse(batch_id=batch_id, images=[
+        FoodImageBatchItem(image_id=image.id, status=image.status) for image in images
+    ])
+
 @router.get("/task/{task_id}")
 async def get_task_status_endpoint(task_id: str):
     """
@@ -3,21 +3,35 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.schemas.user import UserCreate, UserLogin, User
 from app.schemas.token import Token
-from app.services.user_service import create_user, authenticate_user, get_user_by_email, create_access_token, get_current_user
+from app.services.user_service import create_user_async, authenticate_user_async, get_user_by_email_async, create_access_token, get_current_user
+from app.services.password_hasher import PasswordHasherBusy
 from app.models.models import User as UserModel
 
 router = APIRouter()
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent authentication requests, please retry",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=User)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    if get_user_by_email(db, user_in.email):
+async def register(user_in: UserCreate, db: Session = Depends(get_db)):
+    if await get_user_by_email_async(db, user_in.email):
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = create_user(db, user_in.email, user_in.password, user_in.demographics, user_in.settings)
+    try:
+        user = await create_user_async(db, user_in.email, user_in.password, user_in.demographics, user_in.settings)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     return user
 
 @router.post("/login", response_model=Token)
-def login(user_in: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, user_in.email, user_in.password)
+async def login(user_in: UserLogin, db: Session = Depends(get_db)):
+    try:
+        user = await authenticate_user_async(db, user_in.email, user_in.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
     access_token = create_access_token(data={"sub": user.email})
@@ -1,5 +1,6 @@
 from celery import Celery
 from app.core.config import settings
+from app.core.task_lanes import STAGE_QUEUES, lane_queues
 
 celery_app = Celery(
     "micronutrient",
@@ -7,7 +8,9 @@ celery_app = Celery(
     backend=settings.CELERY_RESULT_BACKEND,
     include=[
         "app.tasks.nutrient_tasks",
-        "app.tasks.food_image_tasks"
+        "app.tasks.food_image_tasks",
+        "app.tasks.receipt_tasks",
+        "app.tasks.bulk_estimation_tasks"
     ]
 )
 
@@ -19,25 +22,25 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
+    # Redis only holds short-lived status; durable results live in task_results
+    result_expires=settings.CELERY_RESULT_EXPIRES_SECONDS,
     task_time_limit=300,  # 5 minutes
     worker_prefetch_multiplier=1,  # Process one task at a time
-    task_routes={
-        "process_food_image": {"queue": "food_image"},
-        "estimate_nutrients": {"queue": "nutrients"},
-    },
+    # Interactive lane by default; app.core.task_lanes.enqueue picks the lane per call
+    task_routes={task_name: {"queue": queue} for task_name, queue in STAGE_QUEUES.items()},
     task_default_queue="default",
     task_queues={
         "default": {
             "exchange": "default",
             "routing_key": "default",
         },
-        "food_image": {
-            "exchange": "food_image",
-            "routing_key": "food_image",
-        },
-        "nutrients": {
-            "exchange": "nutrients",
-            "routing_key": "nutrients",
-        },
+        **lane_queues(),
     }
-) 
\ No newline at end of file
+) 
+
+# Task runtime / queue wait metrics and the worker-side exporter
+import app.core.celery_metrics  # noqa: E402,F401
+# Trace context propagation through task headers
+import app.core.celery_tracing  # noqa: E402,F401
+# Opt-in sampling profiler for tasks
+import app.core.celery_profiling  # noqa: E402,F401
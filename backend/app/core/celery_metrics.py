@@ -0,0 +1,71 @@
+"""Celery signal handlers feeding the task metrics in app.core.metrics."""
+import logging
+import os
+import time
+from typing import Dict
+
+from celery.signals import before_task_publish, task_postrun, task_prerun, worker_init, worker_process_shutdown
+
+from app.core.config import settings
+from app.core.metrics import (
+    CELERY_QUEUE_WAIT, CELERY_TASK_RUNTIME, register_db_pool_metrics, start_worker_metrics_server
+)
+
+logger = logging.getLogger(__name__)
+
+# task_id -> perf_counter at task start, for tasks running in this process
+_started: Dict[str, float] = {}
+
+def _queue(task) -> str:
+    delivery_info = getattr(task.request, "delivery_info", None) or {}
+    return delivery_info.get("routing_key") or "unknown"
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+@task_prerun.connect
+def observe_task_start(task_id=None, task=None, **kwargs):
+    _started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is not None:
+        CELERY_QUEUE_WAIT.labels(task_name=task.name, queue=_queue(task)).observe(
+            max(0.0, time.time() - published_at)
+        )
+
+@task_postrun.connect
+def observe_task_end(task_id=None, task=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_RUNTIME.labels(task_name=task.name, queue=_queue(task), state=state or "UNKNOWN").observe(
+            time.perf_counter() - started
+        )
+
+def _is_prefork(worker) -> bool:
+    # At worker_init the pool is still the configured name ("prefork", or its alias "processes")
+    pool_cls = getattr(worker, "pool_cls", None)
+    if isinstance(pool_cls, str):
+        return pool_cls in ("prefork", "processes")
+    return "prefork" in getattr(pool_cls, "__module__", "")
+
+@worker_init.connect
+def start_metrics_exporter(sender=None, **kwargs):
+    from app.db.session import engine
+    register_db_pool_metrics(engine)
+    if not settings.WORKER_METRICS_PORT:
+        return
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ and _is_prefork(sender):
+        # Tasks run in forked children; without shared files this process has nothing to export
+        logger.error(
+            "Not starting the worker metrics exporter: PROMETHEUS_MULTIPROC_DIR must be set for a prefork pool "
+            "(start_workers.sh sets one per worker)"
+        )
+        return
+    start_worker_metrics_server(settings.WORKER_METRICS_PORT)
+
+@worker_process_shutdown.connect
+def mark_process_dead(pid=None, **kwargs):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
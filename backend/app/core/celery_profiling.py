@@ -0,0 +1,12 @@
+"""Celery signal handlers for the opt-in task profiler (app.services.profiler)."""
+from celery.signals import task_postrun, task_prerun
+
+from app.services.profiler import finish_task_profile, start_task_profile
+
+@task_prerun.connect
+def start_profile(task_id=None, task=None, **kwargs):
+    start_task_profile(task_id, task)
+
+@task_postrun.connect
+def finish_profile(task_id=None, **kwargs):
+    finish_task_profile(task_id)
@@ -0,0 +1,54 @@
+"""Celery signal handlers that carry trace context from publisher to worker."""
+from typing import Dict, Tuple
+
+from celery.signals import after_task_publish, before_task_publish, task_postrun, task_prerun, worker_init
+from opentelemetry import context, propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from app.core.tracing import setup_tracing, tracer
+
+# Spans still open in this process, by task id
+_publishing: Dict[str, object] = {}
+_running: Dict[str, Tuple[object, object]] = {}
+
+@before_task_publish.connect
+def start_publish_span(sender=None, headers=None, **kwargs):
+    if headers is None:
+        return
+    span = tracer.start_span(f"celery.publish {sender}", kind=SpanKind.PRODUCER)
+    span.set_attribute("celery.task_name", str(sender))
+    # The worker's span becomes a child of this one
+    propagate.inject(headers, context=trace.set_span_in_context(span))
+    _publishing[headers.get("id")] = span
+
+@after_task_publish.connect
+def end_publish_span(headers=None, **kwargs):
+    span = _publishing.pop((headers or {}).get("id"), None)
+    if span is not None:
+        span.end()
+
+@task_prerun.connect
+def start_task_span(task_id=None, task=None, **kwargs):
+    carrier = {key: value for key, value in vars(task.request).items() if isinstance(value, str)}
+    span = tracer.start_span(f"celery.run {task.name}", context=propagate.extract(carrier), kind=SpanKind.CONSUMER)
+    span.set_attribute("celery.task_id", task_id)
+    span.set_attribute("celery.task_name", task.name)
+    span.set_attribute("celery.retries", task.request.retries or 0)
+    _running[task_id] = (span, context.attach(trace.set_span_in_context(span)))
+
+@task_postrun.connect
+def end_task_span(task_id=None, state=None, **kwargs):
+    started = _running.pop(task_id, None)
+    if started is None:
+        return
+    span, token = started
+    span.set_attribute("celery.state", state or "UNKNOWN")
+    if state not in (None, "SUCCESS"):
+        span.set_status(Status(StatusCode.ERROR, state))
+    context.detach(token)
+    span.end()
+
+@worker_init.connect
+def start_worker_tracing(**kwargs):
+    from app.db.session import SessionLocal, engine
+    setup_tracing("micronutrient-worker", engine=engine, session_factory=SessionLocal)
@@ -1,15 +1,11 @@
 from typing import Generator
-import openai
-from app.core.config import settings
+from app.core.openai_client import get_async_openai
 
 def get_openai_client() -> Generator:
     """
     Get OpenAI client instance.
     """
-    client = openai.AsyncOpenAI(
-        api_key=settings.OPENAI_API_KEY,
-        base_url=settings.OPENAI_API_BASE
-    )
+    client = get_async_openai()
     try:
         yield client
     finally:
@@ -0,0 +1,168 @@
+"""
+Prometheus metrics for the API, Celery workers, LLM calls and caches.
+
+The API serves them at `/metrics`; Celery workers expose them on
+`settings.WORKER_METRICS_PORT`. With several processes per host (uvicorn
+workers, Celery prefork) set PROMETHEUS_MULTIPROC_DIR so every process
+writes to a shared directory and each scrape aggregates them.
+"""
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, start_http_server
+)
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.5, 1, 2.5, 5, 10),
+)
+
+CELERY_TASK_RUNTIME = Histogram(
+    "celery_task_runtime_seconds",
+    "Time a Celery task spent executing",
+    ["task_name", "queue", "state"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+
+CELERY_QUEUE_WAIT = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time between a task being published and a worker starting it",
+    ["task_name", "queue"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+
+LLM_CALL_LATENCY = Histogram(
+    "llm_call_duration_seconds",
+    "Latency of individual LLM API calls",
+    ["model", "stage"],
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60),
+)
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the LLM provider",
+    ["model", "kind"],
+)
+
+LLM_ERRORS = Counter(
+    "llm_call_errors_total",
+    "Failed LLM API calls by error class",
+    ["model", "stage", "error"],
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache, tier and result",
+    ["cache", "tier", "result"],
+)
+
+LLM_CASCADE_ANSWERS = Counter(
+    "llm_cascade_answers_total",
+    "Answers from each model of a stage's cascade, by whether the model answered or escalated",
+    ["stage", "model", "outcome"],
+)
+
+def record_cascade_answers(stage: str, model: str, outcome: str, count: int = 1) -> None:
+    """`outcome` is "answered", or why the answer was escalated ("invalid" or "low_confidence")."""
+    if count:
+        LLM_CASCADE_ANSWERS.labels(stage=stage, model=model, outcome=outcome).inc(count)
+
+# Children bound once per label combination; `labels()` costs several times the update itself
+_children: Dict[Tuple[Any, ...], Any] = {}
+
+def _child(metric, *labelvalues: str):
+    key = (metric, *labelvalues)
+    child = _children.get(key)
+    if child is None:
+        child = _children[key] = metric.labels(*labelvalues)
+    return child
+
+def record_cache_lookup(cache: str, tier: str, hit: bool) -> None:
+    _child(CACHE_REQUESTS, cache, tier, "hit" if hit else "miss").inc()
+
+def record_cache_lookups(cache: str, tier: str, hits: int, misses: int) -> None:
+    """Record a loop's lookups at once; even a bound increment takes a lock."""
+    if hits:
+        _child(CACHE_REQUESTS, cache, tier, "hit").inc(hits)
+    if misses:
+        _child(CACHE_REQUESTS, cache, tier, "miss").inc(misses)
+
+def record_llm_call(model: str, stage: str, seconds: float, usage=None) -> None:
+    """Record one successful LLM call; `usage` is the response's token usage, if any."""
+    _child(LLM_CALL_LATENCY, model, stage).observe(seconds)
+    for kind in ("prompt", "completion"):
+        tokens = getattr(usage, f"{kind}_tokens", None)
+        if isinstance(tokens, int):
+            _child(LLM_TOKENS, model, kind).inc(tokens)
+
+class DBPoolCollector:
+    """Reads SQLAlchemy pool statistics at scrape time."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def collect(self):
+        pool = self.engine.pool
+        for name, description, value in (
+            ("db_pool_size", "Configured pool size", getattr(pool, "size", lambda: 0)()),
+            ("db_pool_checked_out", "Connections currently in use", getattr(pool, "checkedout", lambda: 0)()),
+            ("db_pool_checked_in", "Idle connections in the pool", getattr(pool, "checkedin", lambda: 0)()),
+            ("db_pool_overflow", "Connections open beyond the pool size", getattr(pool, "overflow", lambda: 0)()),
+        ):
+            gauge = GaugeMetricFamily(name, description, labels=["pid"])
+            gauge.add_metric([str(os.getpid())], value)
+            yield gauge
+
+_db_pool_collector: Optional[DBPoolCollector] = None
+
+def register_db_pool_metrics(engine) -> None:
+    global _db_pool_collector
+    if _db_pool_collector is None:
+        _db_pool_collector = DBPoolCollector(engine)
+        REGISTRY.register(_db_pool_collector)
+
+def _scrape_registry() -> CollectorRegistry:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        if _db_pool_collector is not None:
+            registry.register(_db_pool_collector)
+        return registry
+    return REGISTRY
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(generate_latest(_scrape_registry()), media_type=CONTENT_TYPE_LATEST)
+
+async def http_metrics_middleware(request: Request, call_next):
+    """Time every request, labelled by its route template so IDs don't explode cardinality."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        if path != "/metrics":
+            HTTP_REQUEST_LATENCY.labels(method=request.method, route=path, status=str(status)).observe(
+                time.perf_counter() - started
+            )
+
+def start_worker_metrics_server(port: int) -> None:
+    """Serve metrics from a Celery worker's main process."""
+    try:
+        start_http_server(port, registry=_scrape_registry())
+    except OSError as e:
+        logger.warning(f"Could not start worker metrics server on port {port}: {str(e)}")
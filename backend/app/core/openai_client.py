@@ -0,0 +1,20 @@
+from typing import TYPE_CHECKING, Optional
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+_client: Optional["AsyncOpenAI"] = None
+
+def get_async_openai() -> "AsyncOpenAI":
+    """
+    Get the shared AsyncOpenAI client, created on first use. Importing openai
+    takes most of a second, so processes only pay for it once they make an
+    LLM call rather than at startup.
+    """
+    global _client
+    if _client is None:
+        from openai import AsyncOpenAI
+        _client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_API_BASE)
+    return _client
@@ -0,0 +1,25 @@
+from typing import Optional
+import redis
+import redis.asyncio
+
+from app.core.config import settings
+
+_redis_client: Optional[redis.Redis] = None
+_async_redis_client: Optional[redis.asyncio.Redis] = None
+
+def get_redis() -> redis.Redis:
+    """
+    Get the shared Redis client. The connection pool is created on first use,
+    so importing this module never touches the network.
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """Get the shared asyncio Redis client, for use from the API's event loop."""
+    global _async_redis_client
+    if _async_redis_client is None:
+        _async_redis_client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    return _async_redis_client
@@ -0,0 +1,47 @@
+"""
+Priority lanes for Celery work.
+
+Each pipeline stage has an interactive queue (its original name, e.g.
+`food_image`) for work a user is waiting on, and a bulk queue
+(`food_image_bulk`) for backfills, cache warming and other batch jobs. The
+caller picks the lane when it enqueues; workers are assigned to queues in
+start_workers.sh, so a burst of bulk work only ever occupies the bulk pool
+and can't delay live uploads.
+"""
+from typing import Any, Dict
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# Task name -> the stage's interactive queue
+STAGE_QUEUES = {
+    "process_food_image": "food_image",
+    "estimate_nutrients": "nutrients",
+    "estimate_nutrients_chunk": "nutrients",
+    "process_receipt": "receipts",
+}
+
+def queue_for(task_name: str, lane: str = INTERACTIVE) -> str:
+    if lane not in LANES:
+        raise ValueError(f"Unknown task lane: {lane}")
+    queue = STAGE_QUEUES.get(task_name)
+    if queue is None:
+        return "default"  # tasks outside the pipeline stages have a single lane
+    return queue if lane == INTERACTIVE else f"{queue}_bulk"
+
+def lane_queues() -> Dict[str, Dict[str, str]]:
+    """Celery `task_queues` entries for every stage in both lanes."""
+    queues = {}
+    for queue in STAGE_QUEUES.values():
+        for name in (queue, f"{queue}_bulk"):
+            queues[name] = {"exchange": name, "routing_key": name}
+    return queues
+
+def lane_signature(task, *args: Any, lane: str = INTERACTIVE, **kwargs: Any):
+    """A signature of `task` bound to `lane`, for groups and chains."""
+    return task.signature(args, kwargs, queue=queue_for(task.name, lane), headers={"lane": lane})
+
+def enqueue(task, *args: Any, lane: str = INTERACTIVE, **kwargs: Any):
+    """Send `task` to its stage's queue in `lane`; returns the AsyncResult."""
+    return task.apply_async(args, kwargs, queue=queue_for(task.name, lane), headers={"lane": lane})
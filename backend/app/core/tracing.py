@@ -0,0 +1,155 @@
+"""
+OpenTelemetry tracing for the API, Celery tasks, LLM calls and DB work.
+
+Spans are created through `tracer` everywhere; until `setup_tracing` installs
+a provider they are no-ops. Trace context crosses the Celery boundary in task
+message headers (see app.core.celery_tracing), so one meal upload is a single
+trace from the HTTP request through the worker's vision call and commits.
+
+Exporters (TRACING_EXPORTER): "none", "console", "file" (JSON lines in
+TRACING_FILE) or "otlp" (needs opentelemetry-exporter-otlp; the endpoint is
+read from the standard OTEL_EXPORTER_OTLP_* variables).
+"""
+import logging
+from typing import Optional
+
+from opentelemetry import context, propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("micronutrient_radar")
+
+_configured = False
+
+def _build_exporter():
+    name = settings.TRACING_EXPORTER
+    if name == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    if name == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        out = open(settings.TRACING_FILE, "a")
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    if name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otlp but opentelemetry-exporter-otlp is not installed; tracing disabled")
+            return None
+        return OTLPSpanExporter()
+    if name != "none":
+        logger.warning(f"Unknown TRACING_EXPORTER {name!r}; tracing disabled")
+    return None
+
+def setup_tracing(service_name: str, exporter=None, engine=None, session_factory=None) -> bool:
+    """
+    Install the tracer provider for this process. `exporter` overrides the
+    configured one and exports synchronously (used by tests). Passing the
+    engine and session factory also traces SQL statements and commits.
+    Returns whether tracing is enabled.
+    """
+    global _configured
+    if _configured:
+        return True
+    if exporter is None:
+        exporter = _build_exporter()
+        if exporter is None:
+            return False
+        synchronous = False
+    else:
+        synchronous = True
+
+    # The SDK is only imported when tracing is actually enabled
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    processor = SimpleSpanProcessor(exporter) if synchronous else BatchSpanProcessor(exporter)
+
+    # Sample whole traces: workers follow the API's decision carried in the headers
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(processor)
+    trace.set_tracer_provider(provider)
+    if engine is not None:
+        instrument_sqlalchemy(engine, session_factory)
+    _configured = True
+    return True
+
+def record_exception(span, error: BaseException) -> None:
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
+
+async def tracing_middleware(request, call_next):
+    """Server span per request, continuing any trace context sent by the client."""
+    parent = propagate.extract(dict(request.headers))
+    with tracer.start_as_current_span(
+        f"{request.method} {request.url.path}", context=parent, kind=SpanKind.SERVER
+    ) as span:
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            record_exception(span, e)
+            raise
+        route = getattr(request.scope.get("route"), "path", None)
+        if route:
+            # Name by route template so spans group across IDs
+            span.update_name(f"{request.method} {route}")
+            span.set_attribute("http.route", route)
+        span.set_attribute("http.method", request.method)
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_status(Status(StatusCode.ERROR))
+        return response
+
+def instrument_sqlalchemy(engine, session_factory=None) -> None:
+    """Span per SQL statement on `engine`, and per commit on sessions from `session_factory`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_query_span(conn, cursor, statement, parameters, execution_context, executemany):
+        span = tracer.start_span("db.query", kind=SpanKind.CLIENT)
+        span.set_attribute("db.statement", statement[:500])
+        execution_context._otel_span = span
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_query_span(conn, cursor, statement, parameters, execution_context, executemany):
+        span = getattr(execution_context, "_otel_span", None)
+        if span is not None:
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _fail_query_span(exception_context):
+        span = getattr(exception_context.execution_context, "_otel_span", None)
+        if span is not None:
+            record_exception(span, exception_context.original_exception)
+            span.end()
+
+    if session_factory is None:
+        return
+
+    @event.listens_for(session_factory, "before_commit")
+    def _start_commit_span(session):
+        span = tracer.start_span("db.commit")
+        session.info["otel_commit"] = (span, context.attach(trace.set_span_in_context(span)))
+
+    def _end_commit_span(session):
+        started = session.info.pop("otel_commit", None)
+        if started is not None:
+            span, token = started
+            context.detach(token)
+            span.end()
+
+    event.listen(session_factory, "after_commit", _end_commit_span)
+    event.listen(session_factory, "after_rollback", _end_commit_span)
+
+def current_trace_id() -> Optional[str]:
+    """Hex trace id of the active span, for correlating logs and profiles."""
+    span_context = trace.get_current_span().get_span_context()
+    return format(span_context.trace_id, "032x") if span_context.is_valid else None
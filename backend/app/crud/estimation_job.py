@@ -0,0 +1,129 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+
+from app.models.estimation_job import EstimationJob, EstimationJobChunk
+
+def create_job(db: Session, user_id: Any, input_format: str) -> EstimationJob:
+    job = EstimationJob(user_id=user_id, input_format=input_format, status="ingesting")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_job(db: Session, job_id: Any, user_id: Any = None) -> Optional[EstimationJob]:
+    query = db.query(EstimationJob).filter(EstimationJob.id == job_id)
+    if user_id is not None:
+        query = query.filter(EstimationJob.user_id == user_id)
+    return query.first()
+
+def add_chunk(db: Session, job_id: Any, position: int, items: List[Dict[str, Any]]) -> EstimationJobChunk:
+    chunk = EstimationJobChunk(job_id=job_id, position=position, items=items, status="pending")
+    db.add(chunk)
+    db.commit()
+    return chunk
+
+def set_chunk_task(db: Session, chunk_id: Any, task_id: str) -> None:
+    db.execute(update(EstimationJobChunk).where(EstimationJobChunk.id == chunk_id).values(task_id=task_id))
+    db.commit()
+
+def _done_status(completed, failed, chunk_count):
+    """The job's status after a counter change; only a fully read upload can complete."""
+    return case(
+        (
+            (EstimationJob.status != "ingesting") & (completed + failed >= chunk_count),
+            case((failed > 0, "failed"), else_="completed"),
+        ),
+        else_=EstimationJob.status,
+    )
+
+def finish_ingest(db: Session, job_id: Any, item_count: int, chunk_count: int) -> None:
+    """Record the upload's size once it is fully read; chunks may already have finished."""
+    done = EstimationJob.completed_chunk_count + EstimationJob.failed_chunk_count >= chunk_count
+    db.execute(
+        update(EstimationJob)
+        .where(EstimationJob.id == job_id)
+        .values(
+            item_count=item_count,
+            chunk_count=chunk_count,
+            status=case(
+                (done, case((EstimationJob.failed_chunk_count > 0, "failed"), else_="completed")),
+                else_="running",
+            ),
+        )
+    )
+    db.commit()
+
+def fail_ingest(db: Session, job_id: Any, error: str) -> None:
+    db.execute(update(EstimationJob).where(EstimationJob.id == job_id).values(status="failed", error=error))
+    db.commit()
+
+def finish_chunk(db: Session, chunk_id: Any, results: Optional[List[Dict[str, Any]]], error: Optional[str] = None) -> bool:
+    """
+    Store a pending chunk's outcome (`results`, or `error` if it failed) and
+    count it on the job in the same transaction. Returns False, changing
+    nothing, if the chunk was already finished (e.g. a redelivered task).
+    """
+    status = "failed" if error is not None else "completed"
+    job_id = db.execute(
+        update(EstimationJobChunk)
+        .where(EstimationJobChunk.id == chunk_id, EstimationJobChunk.status == "pending")
+        .values(status=status, results=results, error=error)
+        .returning(EstimationJobChunk.job_id)
+    ).scalar()
+    if job_id is None:
+        db.rollback()
+        return False
+    completed = EstimationJob.completed_chunk_count + (1 if status == "completed" else 0)
+    failed = EstimationJob.failed_chunk_count + (1 if status == "failed" else 0)
+    db.execute(
+        update(EstimationJob)
+        .where(EstimationJob.id == job_id)
+        .values(
+            completed_chunk_count=completed,
+            failed_chunk_count=failed,
+            status=_done_status(completed, failed, EstimationJob.chunk_count),
+        )
+    )
+    db.commit()
+    return True
+
+def reset_failed_chunks(db: Session, job_id: Any) -> int:
+    """Put a job's failed chunks back to pending so they can be re-run."""
+    reset = db.execute(
+        update(EstimationJobChunk)
+        .where(EstimationJobChunk.job_id == job_id, EstimationJobChunk.status == "failed")
+        .values(status="pending", error=None)
+        .returning(EstimationJobChunk.id)
+    ).all()
+    if reset:
+        db.execute(
+            update(EstimationJob)
+            .where(EstimationJob.id == job_id)
+            .values(failed_chunk_count=EstimationJob.failed_chunk_count - len(reset), status="running")
+        )
+    db.commit()
+    return len(reset)
+
+def get_pending_chunk_ids(db: Session, job_id: Any) -> List[Any]:
+    return list(db.execute(
+        select(EstimationJobChunk.id)
+        .where(EstimationJobChunk.job_id == job_id, EstimationJobChunk.status == "pending")
+        .order_by(EstimationJobChunk.position)
+    ).scalars())
+
+def get_chunk(db: Session, chunk_id: Any) -> Optional[EstimationJobChunk]:
+    return db.query(EstimationJobChunk).filter(EstimationJobChunk.id == chunk_id).first()
+
+def get_chunk_outcome(db: Session, job_id: Any, position: int):
+    """(status, items, results, error) of one chunk, read without loading the job's other chunks."""
+    return db.execute(
+        select(EstimationJobChunk.status, EstimationJobChunk.items, EstimationJobChunk.results, EstimationJobChunk.error)
+        .where(EstimationJobChunk.job_id == job_id, EstimationJobChunk.position == position)
+    ).first()
+
+def get_job_progress(db: Session, job_id: Any):
+    """(status, chunk_count) of a job."""
+    return db.execute(
+        select(EstimationJob.status, EstimationJob.chunk_count).where(EstimationJob.id == job_id)
+    ).first()
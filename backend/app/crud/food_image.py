@@ -0,0 +1,117 @@
+from typing import Any, Dict, List, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import exists, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.models import FoodImage, FoodItem
+from app.models.user_food_history import UserFoodHistory
+
+def acquire_processing_lease(db: Session, image_id: Any, owner: str, lease_seconds: int) -> bool:
+    """
+    Atomically claim an image for processing. Succeeds if nobody holds the
+    lease, the lease has expired, or `owner` already holds it (a retry of the
+    same task). Processed images are never claimed again.
+    """
+    now = datetime.utcnow()
+    claimed = db.execute(
+        update(FoodImage)
+        .where(
+            FoodImage.id == image_id,
+            FoodImage.status != "processed",
+            or_(
+                FoodImage.lease_owner.is_(None),
+                FoodImage.lease_owner == owner,
+                FoodImage.lease_expires_at < now,
+            ),
+        )
+        .values(
+            lease_owner=owner,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            processing_attempts=FoodImage.processing_attempts + 1,
+        )
+        .returning(FoodImage.id)
+    ).first()
+    db.commit()
+    return claimed is not None
+
+def release_processing_lease(db: Session, db_obj: FoodImage, status: str) -> FoodImage:
+    db_obj.status = status
+    db_obj.lease_owner = None
+    db_obj.lease_expires_at = None
+    db.commit()
+    return db_obj
+
+def save_recognition_checkpoint(db: Session, db_obj: FoodImage, food_items: List[Dict[str, Any]]) -> FoodImage:
+    """Store the vision model's output so a retry never has to call it again."""
+    db_obj.recognition_result = food_items
+    db_obj.status = "recognized"
+    db.commit()
+    return db_obj
+
+def upsert_food_items(db: Session, image_id: Any, food_items: List[Dict[str, Any]]) -> None:
+    """
+    Write the image's recognized items keyed by (food_image_id, position), so
+    re-running this after a partial failure updates rows instead of duplicating
+    them. Items left over from an earlier, longer result are removed.
+    """
+    now = datetime.utcnow()
+    if food_items:
+        stmt = insert(FoodItem).values([
+            {
+                "food_image_id": image_id,
+                "position": position,
+                "description": item["description"],
+                "quantity": item["quantity"],
+                "confidence": item["confidence"],
+                "is_estimated": True,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for position, item in enumerate(food_items)
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["food_image_id", "position"],
+            set_={
+                "description": stmt.excluded.description,
+                "quantity": stmt.excluded.quantity,
+                "confidence": stmt.excluded.confidence,
+                "updated_at": now,
+            },
+        ))
+    db.query(FoodItem).filter(
+        FoodItem.food_image_id == image_id,
+        or_(FoodItem.position.is_(None), FoodItem.position >= len(food_items)),
+    ).delete(synchronize_session=False)
+
+def get_food_items(db: Session, image_id: Any) -> List[FoodItem]:
+    return (
+        db.query(FoodItem)
+        .filter(FoodItem.food_image_id == image_id)
+        .order_by(FoodItem.position)
+        .all()
+    )
+
+def get_batch_images(db: Session, batch_id: Any, user_id: Any) -> List[FoodImage]:
+    return (
+        db.query(FoodImage)
+        .filter(FoodImage.batch_id == batch_id, FoodImage.user_id == user_id)
+        .order_by(FoodImage.created_at, FoodImage.id)
+        .all()
+    )
+
+def get_recent_user_food_items(db: Session, user_id: Any, limit: int) -> List[Tuple[str, bool]]:
+    """
+    The user's most recent recognized items as (description, logged) rows,
+    newest first; `logged` is true when the image was saved to the user's
+    food history, i.e. the user confirmed the meal.
+    """
+    logged = exists().where(UserFoodHistory.food_image_id == FoodImage.id)
+    return (
+        db.query(FoodItem.description, logged.label("logged"))
+        .join(FoodImage, FoodItem.food_image_id == FoodImage.id)
+        .filter(FoodImage.user_id == user_id)
+        .order_by(FoodItem.created_at.desc())
+        .limit(limit)
+        .all()
+    )
@@ -0,0 +1,51 @@
+from typing import Any, Dict, Iterator, List
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.nutrient_profile import NutrientProfile
+
+def upsert_profiles(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Insert or refresh profiles keyed by lowercased food name."""
+    if not rows:
+        return
+    now = datetime.utcnow()
+    # One row per food name, or Postgres rejects the statement
+    unique = {row["food_name"].lower(): {**row, "food_name": row["food_name"].lower()} for row in rows}
+    stmt = insert(NutrientProfile).values([{**row, "created_at": now, "updated_at": now} for row in unique.values()])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["food_name"],
+        set_={
+            "nutrients": stmt.excluded.nutrients,
+            "source": stmt.excluded.source,
+            "llm_prompt_version": stmt.excluded.llm_prompt_version,
+            "estimated_by": stmt.excluded.estimated_by,
+            "basis": stmt.excluded.basis,
+            "updated_at": now,
+        },
+    ))
+    db.commit()
+
+# The basis estimates are scaled on (calculate_total_nutrients); only profiles on it are reused
+REUSABLE_BASIS = "per_100g"
+
+def iter_profiles(db: Session, batch_size: int = 1000) -> Iterator[NutrientProfile]:
+    """All reusable stored profiles in food name order, read in batches."""
+    return (
+        db.query(NutrientProfile)
+        .filter(NutrientProfile.basis == REUSABLE_BASIS)
+        .order_by(NutrientProfile.food_name)
+        .yield_per(batch_size)
+    )
+
+def get_profiles(db: Session, food_names: List[str]) -> Dict[str, NutrientProfile]:
+    """Reusable stored profiles for the given names, keyed by lowercased food name."""
+    names = {name.lower() for name in food_names}
+    if not names:
+        return {}
+    rows = (
+        db.query(NutrientProfile)
+        .filter(NutrientProfile.food_name.in_(names), NutrientProfile.basis == REUSABLE_BASIS)
+        .all()
+    )
+    return {row.food_name: row for row in rows}
@@ -0,0 +1,65 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.receipt import Receipt, ReceiptItem
+
+def create_receipt(db: Session, **fields: Any) -> Receipt:
+    db_obj = Receipt(status="pending", item_count=0, processed_item_count=0, **fields)
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+def get_receipt(db: Session, receipt_id: Any, user_id: Optional[Any] = None) -> Optional[Receipt]:
+    query = db.query(Receipt).options(selectinload(Receipt.items)).filter(Receipt.id == receipt_id)
+    if user_id is not None:
+        query = query.filter(Receipt.user_id == user_id)
+    return query.first()
+
+def get_user_receipts(db: Session, user_id: Any, skip: int = 0, limit: int = 50) -> List[Receipt]:
+    return (
+        db.query(Receipt)
+        .options(selectinload(Receipt.items))
+        .filter(Receipt.user_id == user_id)
+        .order_by(Receipt.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+def update_progress(db: Session, db_obj: Receipt, processed_item_count: int) -> Receipt:
+    db_obj.processed_item_count = processed_item_count
+    db.commit()
+    return db_obj
+
+def replace_receipt_items(
+    db: Session, db_obj: Receipt, items: List[Dict[str, Any]], total_nutrients: Dict[str, float]
+) -> Receipt:
+    """
+    Store the receipt's parsed and estimated items and mark it processed, in
+    one transaction. Items from an earlier attempt are replaced, so a retried
+    task never duplicates lines.
+    """
+    now = datetime.utcnow()
+    db.query(ReceiptItem).filter(ReceiptItem.receipt_id == db_obj.id).delete(synchronize_session=False)
+    if items:
+        db.execute(insert(ReceiptItem), [
+            {**item, "receipt_id": db_obj.id, "position": position, "created_at": now, "updated_at": now}
+            for position, item in enumerate(items)
+        ])
+    db_obj.total_nutrients = total_nutrients
+    db_obj.item_count = len(items)
+    db_obj.processed_item_count = len(items)
+    db_obj.status = "processed"
+    db_obj.error = None
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+def mark_failed(db: Session, db_obj: Receipt, error: str) -> Receipt:
+    db_obj.status = "failed"
+    db_obj.error = error[:500]
+    db.commit()
+    return db_obj
@@ -0,0 +1,39 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.sku_mapping import SkuMapping
+
+def get_mappings(db: Session, store: str, skus: List[str]) -> List[SkuMapping]:
+    if not skus:
+        return []
+    return db.query(SkuMapping).filter(SkuMapping.store == store, SkuMapping.sku.in_(skus)).all()
+
+def get_all_mappings(db: Session, limit: Optional[int] = None) -> List[SkuMapping]:
+    query = db.query(SkuMapping).order_by(SkuMapping.hits.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def upsert_mappings(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert or refresh (store, sku) mappings. A mapping confirmed by a user is
+    never overwritten by the index or the LLM.
+    """
+    if not rows:
+        return
+    now = datetime.utcnow()
+    stmt = insert(SkuMapping).values([{**row, "hits": 1, "created_at": now, "updated_at": now} for row in rows])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["store", "sku"],
+        set_={
+            "fdc_id": stmt.excluded.fdc_id,
+            "description": stmt.excluded.description,
+            "source": stmt.excluded.source,
+            "hits": SkuMapping.hits + 1,
+            "updated_at": now,
+        },
+        where=(SkuMapping.source != "user") | (stmt.excluded.source == "user"),
+    ))
+    db.commit()
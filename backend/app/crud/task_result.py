@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import uuid
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.task_result import TaskResult
+
+def get_task_result(db: Session, task_id: str) -> Optional[TaskResult]:
+    return db.query(TaskResult).filter(TaskResult.task_id == task_id).first()
+
+def get_task_results(db: Session, task_ids: List[str]) -> List[TaskResult]:
+    if not task_ids:
+        return []
+    return db.query(TaskResult).filter(TaskResult.task_id.in_(task_ids)).all()
+
+def mark_tasks_queued(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Create the rows of just-enqueued tasks (`task_id`, `task_name`, `user_id`
+    and optionally `food_image_id`), so a task's owner is known before a
+    worker starts it. A row the worker already created is left as is.
+    """
+    if not rows:
+        return
+    now = datetime.utcnow()
+    stmt = insert(TaskResult).values([
+        {"id": uuid.uuid4(), "status": "PENDING", "attempts": 0, "created_at": now, "updated_at": now, **row}
+        for row in rows
+    ])
+    db.execute(stmt.on_conflict_do_nothing(index_elements=["task_id"]))
+    db.commit()
+
+def mark_task_started(
+    db: Session,
+    *,
+    task_id: str,
+    task_name: str,
+    user_id: Optional[str] = None,
+    food_image_id: Optional[str] = None,
+) -> TaskResult:
+    """Create the task's row, or reset it when the task is retried."""
+    db_obj = get_task_result(db, task_id)
+    if db_obj is None:
+        db_obj = TaskResult(task_id=task_id, task_name=task_name, attempts=0)
+        db.add(db_obj)
+    db_obj.status = "STARTED"
+    db_obj.user_id = user_id or db_obj.user_id
+    db_obj.food_image_id = food_image_id or db_obj.food_image_id
+    db_obj.attempts = (db_obj.attempts or 0) + 1
+    db_obj.started_at = datetime.utcnow()
+    db_obj.finished_at = None
+    db_obj.runtime_ms = None
+    db_obj.error = None
+    db.commit()
+    return db_obj
+
+def mark_task_finished(
+    db: Session,
+    *,
+    task_id: str,
+    status: str,
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+) -> Optional[TaskResult]:
+    db_obj = get_task_result(db, task_id)
+    if db_obj is None:
+        return None
+    db_obj.status = status
+    db_obj.result = result
+    db_obj.error = error
+    db_obj.finished_at = datetime.utcnow()
+    if db_obj.started_at is not None:
+        db_obj.runtime_ms = (db_obj.finished_at - db_obj.started_at).total_seconds() * 1000
+    db.commit()
+    return db_obj
@@ -1,11 +1,58 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime
+import base64
+from uuid import UUID
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select, tuple_
 
 from app.models.user_food_history import UserFoodHistory
 from app.schemas.user_food_history import UserFoodHistoryCreate, UserFoodHistoryUpdate
 
+def encode_cursor(meal_datetime: datetime, history_id: UUID) -> str:
+    """Encode the (meal_datetime, id) keyset position of a row as an opaque cursor."""
+    raw = f"{meal_datetime.isoformat()}|{history_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor produced by `encode_cursor`. Raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        meal_datetime, history_id = raw.split("|", 1)
+        return datetime.fromisoformat(meal_datetime), UUID(history_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def _history_query(
+    user_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+):
+    """Build the newest-first history query, keyed on (meal_datetime, id)."""
+    conditions = [UserFoodHistory.user_id == user_id]
+    if start_date is not None:
+        conditions.append(UserFoodHistory.meal_datetime >= start_date)
+    if end_date is not None:
+        conditions.append(UserFoodHistory.meal_datetime <= end_date)
+    if cursor is not None:
+        # Row-value comparison lets the (user_id, meal_datetime, id) index seek
+        # straight to the cursor position instead of scanning skipped rows.
+        conditions.append(
+            tuple_(UserFoodHistory.meal_datetime, UserFoodHistory.id) < tuple_(*decode_cursor(cursor))
+        )
+    return (
+        select(UserFoodHistory)
+        .where(and_(*conditions))
+        .order_by(UserFoodHistory.meal_datetime.desc(), UserFoodHistory.id.desc())
+    )
+
+def next_cursor(page: List[UserFoodHistory], limit: int) -> Optional[str]:
+    """Return the cursor for the page after `page`, or None if it was the last one."""
+    if len(page) < limit:
+        return None
+    last = page[-1]
+    return encode_cursor(last.meal_datetime, last.id)
+
 def create_user_food_history(
     db: Session, *, obj_in: UserFoodHistoryCreate, user_id: str
 ) -> UserFoodHistory:
@@ -21,32 +68,35 @@ def create_user_food_history(
     return db_obj
 
 def get_user_food_history(
-    db: Session, user_id: str, skip: int = 0, limit: int = 100
+    db: Session, user_id: str, limit: int = 100, cursor: Optional[str] = None
 ) -> List[UserFoodHistory]:
-    return (
-        db.query(UserFoodHistory)
-        .filter(UserFoodHistory.user_id == user_id)
-        .order_by(UserFoodHistory.meal_datetime.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    return list(db.scalars(_history_query(user_id, cursor=cursor).limit(limit)))
 
 def get_user_food_history_by_date_range(
-    db: Session, user_id: str, start_date: datetime, end_date: datetime
+    db: Session,
+    user_id: str,
+    start_date: datetime,
+    end_date: datetime,
+    limit: int = 100,
+    cursor: Optional[str] = None,
 ) -> List[UserFoodHistory]:
-    return (
-        db.query(UserFoodHistory)
-        .filter(
-            and_(
-                UserFoodHistory.user_id == user_id,
-                UserFoodHistory.meal_datetime >= start_date,
-                UserFoodHistory.meal_datetime <= end_date
-            )
-        )
-        .order_by(UserFoodHistory.meal_datetime.desc())
-        .all()
-    )
+    query = _history_query(user_id, start_date=start_date, end_date=end_date, cursor=cursor)
+    return list(db.scalars(query.limit(limit)))
+
+def stream_user_food_history(
+    db: Session,
+    user_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    batch_size: int = 500,
+) -> Iterator[UserFoodHistory]:
+    """
+    Iterate over a user's history newest-first without loading it all at once.
+    `yield_per` makes SQLAlchemy use a server-side cursor and fetch `batch_size`
+    rows at a time, so memory stays flat regardless of the range size.
+    """
+    query = _history_query(user_id, start_date=start_date, end_date=end_date)
+    yield from db.scalars(query.execution_options(yield_per=batch_size))
 
 def get_user_food_history_by_id(
     db: Session, user_id: str, history_id: str
@@ -60,4 +110,4 @@ def get_user_food_history_by_id(
             )
         )
         .first()
-    ) 
\ No newline at end of file
+    )
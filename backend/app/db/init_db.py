@@ -1,13 +1,50 @@
+import logging
+import os
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.db.session import engine
 from app.db.base_class import Base
 from app.models.models import User
 from app.models.models import FoodImage, FoodItem
 from app.models.models import NutrientLedger
+from app.models.task_result import TaskResult
+from app.models.receipt import Receipt, ReceiptItem
+from app.models.sku_mapping import SkuMapping
+from app.models.nutrient_profile import NutrientProfile
+from app.models.estimation_job import EstimationJob, EstimationJobChunk
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "alembic")
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+def check_schema_version() -> bool:
+    """
+    Compare the database's alembic revision with the migration head. Much
+    cheaper at startup than create_all, which reflects every table.
+    """
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    expected = set(ScriptDirectory(ALEMBIC_DIR).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current == expected:
+        return True
+    message = f"Database schema at {sorted(current) or 'no revision'}, expected {sorted(expected)}; run `alembic upgrade head`"
+    if settings.DB_SCHEMA_CHECK == "fail":
+        raise SchemaOutOfDate(message)
+    logger.warning(message)
+    return False
 
 def init_db() -> None:
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    if settings.DB_SCHEMA_CHECK == "create":
+        # Local development without migrations: create any missing tables
+        Base.metadata.create_all(bind=engine)
+    elif settings.DB_SCHEMA_CHECK != "off":
+        check_schema_version()
 
 if __name__ == "__main__":
     print("Creating initial data")
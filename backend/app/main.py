@@ -2,10 +2,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1 import user, food_image
-from app.api.endpoints import nutrients, user_food_history
+from app.api.endpoints import nutrients, user_food_history, task_events, tasks, profiles, receipt
 from fastapi.openapi.utils import get_openapi
 from app.db.init_db import init_db
 from app.models import User, UserFoodHistory, FoodImage  # Import models to ensure registration
+from app.services.last_login import run_last_login_flusher, flush_last_logins
+from app.core.metrics import http_metrics_middleware, metrics_endpoint, register_db_pool_metrics
+from app.core.tracing import setup_tracing, tracing_middleware
+from app.services.profiler import profiling_middleware
+from app.db.session import engine, SessionLocal
+import asyncio
 import os
 
 app = FastAPI(
@@ -31,10 +37,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus metrics: per-route latency, plus DB pool stats read at scrape time
+app.middleware("http")(http_metrics_middleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+register_db_pool_metrics(engine)
+
+# Opt-in sampling profiler (PROFILING_SAMPLE_RATE / X-Profile header)
+app.middleware("http")(profiling_middleware)
+
+# Tracing; added last so its span also covers the metrics middleware
+setup_tracing("micronutrient-api", engine=engine, session_factory=SessionLocal)
+app.middleware("http")(tracing_middleware)
+
 app.include_router(user.router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
 app.include_router(food_image.router, prefix=f"{settings.API_V1_STR}/food-images", tags=["food-images"])
+app.include_router(receipt.router, prefix=f"{settings.API_V1_STR}/receipts", tags=["receipts"])
 app.include_router(nutrients.router, prefix=f"{settings.API_V1_STR}/nutrients", tags=["nutrients"])
 app.include_router(user_food_history.router, prefix=f"{settings.API_V1_STR}/food-history", tags=["food-history"])
+app.include_router(tasks.router, prefix=f"{settings.API_V1_STR}/tasks", tags=["tasks"])
+app.include_router(task_events.router, prefix=f"{settings.API_V1_STR}/events", tags=["events"])
+app.include_router(profiles.router, prefix=f"{settings.API_V1_STR}/profiles", tags=["profiles"])
 
 @app.get("/")
 async def root():
@@ -50,6 +72,15 @@ async def startup_event():
     init_db()
     # Create upload directory if it doesn't exist
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    app.state.last_login_flusher = asyncio.create_task(
+        run_last_login_flusher(settings.LAST_LOGIN_FLUSH_INTERVAL_SECONDS)
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.last_login_flusher.cancel()
+    # Write out whatever is still buffered before the process exits
+    await asyncio.to_thread(flush_last_logins)
 
 def custom_openapi():
     if app.openapi_schema:
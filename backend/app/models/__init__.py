@@ -1,6 +1,11 @@
 from app.models.user import User
 from app.models.user_food_history import UserFoodHistory
 from app.models.models import FoodImage
+from app.models.task_result import TaskResult
+from app.models.receipt import Receipt, ReceiptItem
+from app.models.sku_mapping import SkuMapping
+from app.models.nutrient_profile import NutrientProfile
+from app.models.estimation_job import EstimationJob, EstimationJobChunk
 
 # Import all models here to ensure they are registered with SQLAlchemy
-__all__ = ["User", "UserFoodHistory", "FoodImage"] 
\ No newline at end of file
+__all__ = ["User", "UserFoodHistory", "FoodImage", "TaskResult", "Receipt", "ReceiptItem", "SkuMapping", "NutrientProfile", "EstimationJob", "EstimationJobChunk"] 
\ No newline at end of file
@@ -0,0 +1,51 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+import uuid
+
+from app.db.base_class import Base
+
+class EstimationJob(Base):
+    """A bulk nutrient estimation job, fed from an NDJSON/CSV upload in fixed-size chunks."""
+    __tablename__ = "estimation_jobs"
+    __table_args__ = (
+        Index("idx_estimation_jobs_user_created_at", "user_id", "created_at"),
+        {'extend_existing': True}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    input_format = Column(String, nullable=False)  # ndjson or csv
+    status = Column(String, nullable=False)  # ingesting, running, completed, failed
+    item_count = Column(Integer, nullable=False, default=0)
+    chunk_count = Column(Integer, nullable=True)  # known once the upload is fully read
+    completed_chunk_count = Column(Integer, nullable=False, default=0)
+    failed_chunk_count = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    chunks = relationship("EstimationJobChunk", back_populates="job", order_by="EstimationJobChunk.position")
+
+class EstimationJobChunk(Base):
+    __tablename__ = "estimation_job_chunks"
+    __table_args__ = (
+        Index("idx_estimation_job_chunks_job_position", "job_id", "position", unique=True),
+        {'extend_existing': True}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("estimation_jobs.id"), nullable=False)
+    position = Column(Integer, nullable=False)  # chunk order in the upload; results stream in this order
+    items = Column(JSON, nullable=False)  # parsed input lines
+    results = Column(JSON, nullable=True)  # one result per item, set when the chunk completes
+    status = Column(String, nullable=False)  # pending, completed, failed
+    task_id = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    job = relationship("EstimationJob", back_populates="chunks")
@@ -12,6 +12,7 @@ class FoodImage(Base):
     __tablename__ = "food_images"
     __table_args__ = (
         Index("idx_food_images_user_captured_at", "user_id", "captured_at"),
+        Index("idx_food_images_batch_id", "batch_id"),
         {'extend_existing': True}
     )
 
@@ -19,8 +20,15 @@ class FoodImage(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     captured_at = Column(DateTime, nullable=False)
     image_url = Column(String, nullable=False)
-    status = Column(String, nullable=False)  # processed, needs_review, failed
+    status = Column(String, nullable=False)  # pending, recognizing, recognized, processed, needs_review, failed
     recognition_confidence = Column(Float, nullable=True)
+    # Processing checkpoint and lease, so a retried task skips completed stages
+    # and two workers never process the same image at once
+    recognition_result = Column(JSON, nullable=True)
+    processing_attempts = Column(Integer, nullable=False, default=0)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    batch_id = Column(UUID(as_uuid=True), nullable=True)  # set for images uploaded together in one batch
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -33,11 +41,13 @@ class FoodItem(Base):
     __tablename__ = "food_items"
     __table_args__ = (
         Index("idx_food_items_fdc_id", "fdc_id"),
+        Index("idx_food_items_image_position", "food_image_id", "position", unique=True),
         {'extend_existing': True}
     )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     food_image_id = Column(UUID(as_uuid=True), ForeignKey("food_images.id"), nullable=False)
+    position = Column(Integer, nullable=True)  # index in the recognition result; upsert key per image
     description = Column(String, nullable=False)
     quantity = Column(Float, nullable=False)
     fdc_id = Column(String, nullable=True)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.db.base_class import Base
+
+class NutrientProfile(Base):
+    """Durable copy of LLM-estimated nutrient profiles; source for the offline similarity index."""
+    __tablename__ = "nutrient_profiles"
+    __table_args__ = (
+        Index("idx_nutrient_profiles_food_name", "food_name", unique=True),
+        {'extend_existing': True}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    food_name = Column(String, nullable=False)  # lowercased description
+    nutrients = Column(JSON, nullable=False)  # e.g. {"iron_mg": 0.8}, per `basis`
+    # "per_100g"; legacy single-item estimates are "per_unit" and never reused
+    basis = Column(String, nullable=False, default="per_100g", server_default="per_100g")
+    source = Column(String, nullable=False)
+    llm_prompt_version = Column(String, nullable=False)
+    estimated_by = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,55 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, JSON, Index, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+import uuid
+
+from app.db.base_class import Base
+
+class Receipt(Base):
+    __tablename__ = "receipts"
+    __table_args__ = (
+        Index("idx_receipts_user_created_at", "user_id", "created_at"),
+        {'extend_existing': True}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    source = Column(String, nullable=False)  # ocr_text (client-side OCR) or image (cloud OCR, opt-in)
+    ocr_text = Column(Text, nullable=True)  # set from the client, or transcribed from image_url
+    image_url = Column(String, nullable=True)
+    store_name = Column(String, nullable=True)
+    purchased_at = Column(DateTime, nullable=True)
+    status = Column(String, nullable=False)  # pending, parsing, estimating, processed, failed
+    item_count = Column(Integer, nullable=False, default=0)
+    processed_item_count = Column(Integer, nullable=False, default=0)
+    total_nutrients = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    items = relationship("ReceiptItem", back_populates="receipt", order_by="ReceiptItem.position")
+
+class ReceiptItem(Base):
+    __tablename__ = "receipt_items"
+    __table_args__ = (
+        Index("idx_receipt_items_receipt_position", "receipt_id", "position", unique=True),
+        {'extend_existing': True}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    receipt_id = Column(UUID(as_uuid=True), ForeignKey("receipts.id"), nullable=False)
+    position = Column(Integer, nullable=False)  # line order on the receipt; upsert key per receipt
+    raw_line = Column(String, nullable=False)
+    description = Column(String, nullable=False)
+    quantity = Column(Float, nullable=False)
+    unit = Column(String, nullable=False)  # e.g. "lb", "g", "piece"
+    price = Column(Float, nullable=True)
+    fdc_id = Column(String, nullable=True)
+    nutrients = Column(JSON, nullable=True)  # totals for the purchased quantity; null if estimation failed
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    receipt = relationship("Receipt", back_populates="items")
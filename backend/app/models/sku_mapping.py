@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.db.base_class import Base
+
+class SkuMapping(Base):
+    """A receipt line's text at one store, resolved to a food; the matcher's per-store SKU cache."""
+    __tablename__ = "sku_mappings"
+    __table_args__ = (
+        Index("idx_sku_mappings_store_sku", "store", "sku", unique=True),
+        {'extend_existing': True}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    store = Column(String, nullable=False)  # normalized store name, "" when unknown
+    sku = Column(String, nullable=False)  # normalized receipt line text, e.g. "ORG BNNA"
+    fdc_id = Column(String, nullable=True)
+    description = Column(String, nullable=False)  # matched food description
+    source = Column(String, nullable=False)  # index, llm or user
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
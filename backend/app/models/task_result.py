@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.db.base_class import Base
+
+class TaskResult(Base):
+    """Durable, compact record of a Celery task run; Redis only keeps short-lived status."""
+    __tablename__ = "task_results"
+    __table_args__ = (
+        Index("idx_task_results_task_id", "task_id", unique=True),
+        Index("idx_task_results_food_image_id", "food_image_id"),
+        {'extend_existing': True}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    task_id = Column(String, nullable=False)
+    task_name = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # Celery state: STARTED, RETRY, SUCCESS, FAILURE
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    food_image_id = Column(UUID(as_uuid=True), ForeignKey("food_images.id"), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(JSON, nullable=True)  # Compact summary; full food items live in food_items
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    runtime_ms = Column(Float, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -11,7 +11,7 @@ from app.models.models import FoodImage  # Import FoodImage from models.py
 class UserFoodHistory(Base):
     __tablename__ = "user_food_history"
     __table_args__ = (
-        Index("idx_user_food_history_user_meal", "user_id", "meal_datetime"),
+        Index("idx_user_food_history_user_meal_id", "user_id", "meal_datetime", "id"),
         {'extend_existing': True}
     )
 
@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, UUID4
+
+class EstimationJobResponse(BaseModel):
+    id: UUID4
+    input_format: str
+    status: str
+    item_count: int
+    chunk_count: Optional[int] = None
+    completed_chunk_count: int
+    failed_chunk_count: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    # Set by the resume endpoint
+    resumed_chunk_count: Optional[int] = None
+
+    class Config:
+        from_attributes = True
@@ -52,4 +52,15 @@ class FoodImageSchema(FoodImageInDBBase):
     food_items: List[FoodItem]
 
 class FoodImageResponse(FoodImageSchema):
-    task_id: Optional[str] = None 
\ No newline at end of file
+    task_id: Optional[str] = None
+
+class FoodImageBatchItem(BaseModel):
+    filename: Optional[str] = None
+    image_id: Optional[UUID4] = None
+    task_id: Optional[str] = None
+    status: str  # "rejected", or the image's processing status
+    error: Optional[str] = None
+
+class FoodImageBatchResponse(BaseModel):
+    batch_id: UUID4
+    images: List[FoodImageBatchItem] 
\ No newline at end of file
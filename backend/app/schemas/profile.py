@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+class ProfileSummary(BaseModel):
+    profile_id: str
+    kind: str
+    name: str
+    duration_ms: float
+    created_at: float
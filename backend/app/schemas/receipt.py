@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, UUID4
+
+class ReceiptCreate(BaseModel):
+    # Text from the client's on-device OCR, one printed line per line
+    ocr_text: str = Field(..., min_length=1, max_length=50000)
+    store_name: Optional[str] = None
+    purchased_at: Optional[datetime] = None
+
+class ReceiptItem(BaseModel):
+    id: UUID4
+    position: int
+    raw_line: str
+    description: str
+    quantity: float
+    unit: str
+    price: Optional[float] = None
+    fdc_id: Optional[str] = None
+    nutrients: Optional[Dict[str, float]] = None
+
+    class Config:
+        from_attributes = True
+
+class ReceiptInDBBase(BaseModel):
+    id: UUID4
+    user_id: UUID4
+    source: str
+    store_name: Optional[str] = None
+    purchased_at: Optional[datetime] = None
+    status: str
+    item_count: int
+    processed_item_count: int
+    total_nutrients: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ReceiptResponse(ReceiptInDBBase):
+    items: List[ReceiptItem] = []
+    task_id: Optional[str] = None
@@ -0,0 +1,11 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+class TaskStatusResponse(BaseModel):
+    task_id: str
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class BatchTaskStatusResponse(BaseModel):
+    tasks: List[TaskStatusResponse]
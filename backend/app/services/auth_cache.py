@@ -0,0 +1,157 @@
+import copy
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from redis import RedisError
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.core.redis_client import get_redis
+from app.models.models import User
+
+logger = logging.getLogger(__name__)
+
+# Never cache credentials, locally or in Redis
+_EXCLUDED_COLUMNS = {"hashed_password"}
+_DATETIME_COLUMNS = {"created_at", "updated_at", "last_login"}
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def snapshot_user(user: User) -> Dict[str, Any]:
+    """Capture a user's column values (minus credentials) as a plain dict."""
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+        if attr.key not in _EXCLUDED_COLUMNS
+    }
+
+def _dump_snapshot(snapshot: Dict[str, Any]) -> str:
+    return json.dumps(
+        {k: (v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, UUID) else v)
+         for k, v in snapshot.items()}
+    )
+
+def _load_snapshot(raw: bytes) -> Dict[str, Any]:
+    snapshot = json.loads(raw)
+    snapshot["id"] = UUID(snapshot["id"])
+    for key in _DATETIME_COLUMNS:
+        if snapshot.get(key):
+            snapshot[key] = datetime.fromisoformat(snapshot[key])
+    return snapshot
+
+class AuthCache:
+    """
+    Short-TTL cache of verified token -> user snapshot.
+
+    Entries live in an in-process LRU and, optionally, in Redis so that a
+    token verified by one API process is reusable by the others. An entry
+    never outlives its token's `exp`. `invalidate_user` must be called after
+    a user row changes; snapshots older than the user's new `version` are
+    then rejected. The version floor is kept for `ttl` (no snapshot cached
+    before it lives longer), locally and, with Redis, in
+    `auth:min_version:{user_id}`, which every process checks on a local hit.
+    Without Redis, other processes serve their stale copies for up to `ttl`.
+    """
+
+    def __init__(self, ttl: int, maxsize: int, use_redis: bool = False):
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._min_versions = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _is_current(self, snapshot: Dict[str, Any], check_shared: bool = False) -> bool:
+        user_id = str(snapshot["id"])
+        min_version = self._min_versions.get(user_id, 0)
+        if check_shared:
+            # Another process may have bumped the user since this copy was cached
+            try:
+                raw = get_redis().get(f"auth:min_version:{user_id}")
+            except RedisError as e:
+                logger.warning(f"Auth cache Redis version read failed: {str(e)}")
+                raw = None
+            if raw is not None:
+                min_version = max(min_version, int(raw))
+        return snapshot["version"] >= min_version
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = _token_key(token)
+        snapshot = self._local.get(key)
+        record_cache_lookup("auth", "memory", snapshot is not None)
+        # Redis copies of a bumped user are deleted, so only local hits need the shared floor
+        check_shared = snapshot is not None and self.use_redis
+        if snapshot is None and self.use_redis:
+            try:
+                raw = get_redis().get(f"auth:token:{key}")
+            except RedisError as e:
+                logger.warning(f"Auth cache Redis read failed: {str(e)}")
+                raw = None
+            record_cache_lookup("auth", "redis", raw is not None)
+            if raw is not None:
+                snapshot = _load_snapshot(raw)
+                self._local.set(key, snapshot)
+        if snapshot is None or not self._is_current(snapshot, check_shared):
+            return None
+        return copy.deepcopy(snapshot)
+
+    def set(self, token: str, user: User, token_exp: Optional[float] = None) -> None:
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, int(token_exp - time.time()))
+        if ttl <= 0:
+            return
+        key = _token_key(token)
+        snapshot = snapshot_user(user)
+        self._local.set(key, snapshot, ttl=ttl)
+        if self.use_redis:
+            try:
+                pipe = get_redis().pipeline()
+                pipe.set(f"auth:token:{key}", _dump_snapshot(snapshot), ex=ttl)
+                pipe.sadd(f"auth:user_tokens:{user.id}", key)
+                pipe.expire(f"auth:user_tokens:{user.id}", self.ttl)
+                pipe.execute()
+            except RedisError as e:
+                logger.warning(f"Auth cache Redis write failed: {str(e)}")
+
+    def invalidate_user(self, user: User) -> None:
+        """Reject cached snapshots of `user` older than its current version."""
+        self._min_versions.set(str(user.id), user.version)
+        if self.use_redis:
+            try:
+                client = get_redis()
+                keys = client.smembers(f"auth:user_tokens:{user.id}")
+                pipe = client.pipeline()
+                pipe.set(f"auth:min_version:{user.id}", user.version, ex=self.ttl)
+                for key in keys:
+                    pipe.delete(f"auth:token:{key.decode()}")
+                pipe.delete(f"auth:user_tokens:{user.id}")
+                pipe.execute()
+            except RedisError as e:
+                logger.warning(f"Auth cache Redis invalidation failed: {str(e)}")
+
+    def attach(self, db: Session, snapshot: Dict[str, Any]) -> User:
+        """
+        Turn a snapshot back into a session-bound User without a SELECT.
+        Attributes not in the snapshot (e.g. hashed_password) load lazily.
+        """
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def clear(self) -> None:
+        self._local.clear()
+        self._min_versions.clear()
+
+auth_cache = AuthCache(
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+    maxsize=settings.AUTH_CACHE_MAXSIZE,
+    use_redis=settings.AUTH_CACHE_REDIS,
+)
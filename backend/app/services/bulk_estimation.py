@@ -0,0 +1,249 @@
+"""
+Bulk nutrient estimation over NDJSON or CSV uploads.
+
+The upload is read as a stream and cut into chunks of
+BULK_ESTIMATION_CHUNK_SIZE items; each chunk is stored and handed to a
+worker as soon as it is full, so neither the API nor a worker ever holds
+more than one chunk. Results are streamed back as NDJSON in upload order,
+one chunk at a time as chunks complete.
+
+A job is resumable by its ID: the result stream can be reopened from any
+chunk (every result line carries its `chunk`), and chunks that failed can
+be re-run without redoing the rest.
+
+Input items have a `description` and optionally `quantity` (default 100),
+`unit` (default "g") and an `id` that is echoed back. NDJSON is one JSON
+object per line; CSV has a header row naming those columns, and quoted
+fields cannot span lines. Lines that don't parse produce an error result
+instead of failing the job.
+"""
+import asyncio
+import codecs
+import csv
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import estimation_job as crud_job
+from app.models.estimation_job import EstimationJob, EstimationJobChunk
+from app.services.nutrient_estimation import FoodItem, NutrientEstimationService
+
+logger = logging.getLogger(__name__)
+
+INPUT_FORMATS = ("ndjson", "csv")
+UNITS = ("g", "kg", "lb", "oz", "piece")
+# What reading a malformed upload raises (bad lines become error results instead)
+INVALID_UPLOAD_ERRORS = (UnicodeDecodeError, csv.Error)
+
+async def iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without holding more than one line."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for data in body:
+        pending += decoder.decode(data)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+def parse_item(fields: Dict[str, Any], line: int) -> Dict[str, Any]:
+    """Validate one input record into a chunk item, or an item carrying the error."""
+    item: Dict[str, Any] = {"line": line}
+    if fields.get("id") not in (None, ""):
+        item["id"] = fields["id"]
+    description = str(fields.get("description") or "").strip()
+    if not description:
+        return {**item, "error": "Missing description"}
+    try:
+        quantity = float(fields.get("quantity") or 100)
+    except (TypeError, ValueError):
+        return {**item, "error": f"Invalid quantity: {fields.get('quantity')}"}
+    unit = str(fields.get("unit") or "g").strip().lower()
+    if unit not in UNITS:
+        return {**item, "error": f"Unsupported unit: {unit}"}
+    return {**item, "description": description, "quantity": quantity, "unit": unit}
+
+async def iter_items(input_format: str, body: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    header: Optional[List[str]] = None
+    line_number = 0
+    async for line in iter_lines(body):
+        line_number += 1
+        if not line.strip():
+            continue
+        if input_format == "ndjson":
+            try:
+                fields = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"line": line_number, "error": f"Invalid JSON: {str(e)}"}
+                continue
+            if not isinstance(fields, dict):
+                yield {"line": line_number, "error": "Expected a JSON object"}
+                continue
+        else:
+            row = next(csv.reader([line]))
+            if header is None:
+                header = [column.strip().lower() for column in row]
+                continue
+            fields = dict(zip(header, row))
+        yield parse_item(fields, line_number)
+
+class BulkEstimationService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def create_job(
+        self,
+        user_id: Any,
+        input_format: str,
+        body: AsyncIterator[bytes],
+        on_chunk: Callable[[EstimationJobChunk], Optional[str]],
+    ) -> EstimationJob:
+        """
+        Read an upload into a new job. `on_chunk` is called with each stored
+        chunk (to enqueue it) and returns the task ID it was given.
+        """
+        job = await run_in_threadpool(crud_job.create_job, self.db, user_id, input_format)
+        chunk_size = settings.BULK_ESTIMATION_CHUNK_SIZE
+        items: List[Dict[str, Any]] = []
+        item_count = chunk_count = 0
+
+        def store_chunk(position: int, chunk_items: List[Dict[str, Any]]) -> None:
+            chunk = crud_job.add_chunk(self.db, job.id, position, chunk_items)
+            task_id = on_chunk(chunk)
+            if task_id:
+                crud_job.set_chunk_task(self.db, chunk.id, task_id)
+
+        async def flush() -> None:
+            nonlocal chunk_count
+            # The commit and the broker publish block, so they run off the event loop
+            await run_in_threadpool(store_chunk, chunk_count, items)
+            chunk_count += 1
+
+        try:
+            async for item in iter_items(input_format, body):
+                items.append(item)
+                item_count += 1
+                if len(items) >= chunk_size:
+                    await flush()
+                    items = []
+            if items:
+                await flush()
+        except Exception as e:
+            # Chunks already stored still run; the job just never completes
+            logger.error(f"Reading bulk estimation upload for job {job.id} failed: {str(e)}")
+            message = f"Upload interrupted: {str(e)}"
+
+            def fail() -> None:
+                self.db.rollback()
+                crud_job.fail_ingest(self.db, job.id, message)
+
+            await run_in_threadpool(fail)
+            raise
+
+        def finish() -> None:
+            crud_job.finish_ingest(self.db, job.id, item_count, chunk_count)
+            self.db.refresh(job)
+
+        await run_in_threadpool(finish)
+        return job
+
+    def resume_job(self, job: EstimationJob, enqueue_chunk: Callable[[Any], Optional[str]]) -> int:
+        """
+        Re-run the job's failed chunks and re-enqueue its pending ones (e.g.
+        lost with a broker restart); returns how many were enqueued. A pending
+        chunk may still be queued, but a second run of it is discarded.
+        """
+        crud_job.reset_failed_chunks(self.db, job.id)
+        chunk_ids = crud_job.get_pending_chunk_ids(self.db, job.id)
+        for chunk_id in chunk_ids:
+            task_id = enqueue_chunk(chunk_id)
+            if task_id:
+                crud_job.set_chunk_task(self.db, chunk_id, task_id)
+        self.db.refresh(job)
+        return len(chunk_ids)
+
+async def process_chunk(db: Session, chunk_id: Any, estimation_service: NutrientEstimationService) -> bool:
+    """
+    Estimate one stored chunk and record its results; False if it was already
+    done. A failed LLM batch raises instead of recording "No nutrient
+    estimate" results, so the task retries (the batches that did succeed are
+    cached by then) and, once out of retries, marks the chunk failed, which
+    makes it resumable.
+    """
+    chunk = crud_job.get_chunk(db, chunk_id)
+    if chunk is None or chunk.status != "pending":
+        return False
+    valid = [item for item in chunk.items if "error" not in item]
+    food_items = [
+        FoodItem(description=item["description"], quantity=item["quantity"], unit=item["unit"], confidence=1.0, is_estimated=False)
+        for item in valid
+    ]
+    estimates = await estimation_service.estimate_nutrients_batch(
+        food_items, batch_size=settings.BULK_ESTIMATION_BATCH_SIZE, raise_errors=True
+    )
+    by_line = {item["line"]: estimate for item, estimate in zip(valid, estimates)}
+
+    results = []
+    for item in chunk.items:
+        result = {key: item[key] for key in ("line", "id") if key in item}
+        if "error" in item:
+            result["error"] = item["error"]
+        else:
+            food_item, profile = by_line[item["line"]]
+            result.update(description=food_item.description, quantity=food_item.quantity, unit=food_item.unit)
+            if profile is None:
+                result["error"] = "No nutrient estimate"
+            else:
+                result["source"] = profile.source
+                result["nutrients"] = {
+                    name: round(value, 3)
+                    for name, value in estimation_service.calculate_total_nutrients(food_item, profile).items()
+                }
+        results.append(result)
+    return crud_job.finish_chunk(db, chunk.id, results)
+
+async def stream_job_results(db: Session, job_id: Any, from_chunk: int = 0) -> AsyncIterator[bytes]:
+    """
+    Yield a job's results as NDJSON lines in upload order, starting at chunk
+    `from_chunk` and waiting for chunks that haven't finished yet. Only one
+    chunk is loaded at a time. Items of a failed chunk are reported with the
+    chunk's error.
+    """
+    def read_chunk(position: int):
+        """(results, None) for a finished chunk, else (None, (status, chunk_count, chunk_stored))."""
+        outcome = crud_job.get_chunk_outcome(db, job_id, position)
+        if outcome is None or outcome.status == "pending":
+            progress = crud_job.get_job_progress(db, job_id)
+            db.commit()  # end the read transaction; the next poll sees new commits
+            return None, None if progress is None else (*progress, outcome is not None)
+        results = outcome.results if outcome.status == "completed" else [
+            {**{key: item[key] for key in ("line", "id") if key in item}, "error": outcome.error}
+            for item in outcome.items
+        ]
+        db.commit()
+        return results, None
+
+    position = from_chunk
+    while True:
+        # Queries run off the event loop, so polling doesn't stall other requests
+        results, progress = await run_in_threadpool(read_chunk, position)
+        if results is not None:
+            for result in results:
+                yield (json.dumps({"chunk": position, **result}) + "\n").encode()
+            position += 1
+            continue
+
+        if progress is None:
+            return
+        status, chunk_count, chunk_stored = progress
+        if chunk_count is not None and position >= chunk_count:
+            return
+        if not chunk_stored and status == "failed":
+            return  # the upload was cut off before this chunk
+        await asyncio.sleep(settings.BULK_ESTIMATION_POLL_SECONDS)
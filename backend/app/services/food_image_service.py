@@ -1,26 +1,43 @@
 import os
 import uuid
+import asyncio
 import base64
+import json
+from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional, Tuple, Dict, Any
 from fastapi import UploadFile, HTTPException
-from PIL import Image
-import magic
-from openai import AsyncOpenAI
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import shutil
+import logging
 from uuid import UUID
 
 from app.core.config import settings
-from app.models.models import FoodImage, FoodItem
+from app.core.openai_client import get_async_openai
+from app.core.tracing import tracer
+from app.crud import food_image as crud_food_image
+from app.models.models import FoodImage
 from app.schemas.food_image import FoodImageCreate, FoodImageResponse
+from app.services.llm_rate_limiter import estimate_tokens
+from app.services.model_cascade import INVALID_REPLY_ERRORS, get_model_cascade
+from app.services.user_food_vocabulary import UserFoodVocabulary, get_user_food_vocabulary
 
-# Configure OpenAI
-client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BatchUpload:
+    """Outcome of one file in a batch upload; `image_id` is None if it was rejected."""
+    filename: Optional[str]
+    image_id: Optional[UUID] = None
+    status: str = "rejected"
+    error: Optional[str] = None
+    task_id: Optional[str] = None
 
 class FoodImageService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, vocabulary: Optional[UserFoodVocabulary] = None):
         self.db = db
+        self.vocabulary = vocabulary
         self.allowed_mime_types = {
             'image/jpeg': '.jpg',
             'image/png': '.png',
@@ -30,6 +47,9 @@ class FoodImageService:
 
     async def validate_image(self, file: UploadFile) -> Tuple[bool, str]:
         """Validate image file type and size."""
+        return self._check_image(file)
+
+    def _check_image(self, file: UploadFile) -> Tuple[bool, str]:
         # Check file size
         file_size = 0
         file.file.seek(0, 2)  # Seek to end
@@ -39,7 +59,8 @@ class FoodImageService:
         if file_size > self.max_file_size:
             return False, f"File size exceeds maximum limit of {self.max_file_size/1024/1024}MB"
 
-        # Check file type
+        # Check file type; libmagic is only loaded when an upload is validated
+        import magic
         content_type = magic.from_buffer(file.file.read(2048), mime=True)
         file.file.seek(0)  # Reset file pointer
 
@@ -50,6 +71,9 @@ class FoodImageService:
 
     async def save_image(self, file: UploadFile, user_id: UUID) -> str:
         """Save uploaded image to disk."""
+        return self._write_image(file, user_id)
+
+    def _write_image(self, file: UploadFile, user_id: UUID) -> str:
         # Create user-specific directory
         upload_dir = os.path.join(settings.UPLOAD_DIR, str(user_id))
         os.makedirs(upload_dir, exist_ok=True)
@@ -65,8 +89,12 @@ class FoodImageService:
         
         return file_path
 
-    async def process_image_with_llm(self, image_path: str) -> List[dict]:
-        """Process image using OpenAI's Vision API to identify food items."""
+    async def process_image_with_llm(self, image_path: str, known_foods: Optional[List[str]] = None) -> List[dict]:
+        """
+        Process image using OpenAI's Vision API to identify food items.
+        `known_foods` are descriptions the user often eats; the model is asked
+        to reuse them so repeat meals hit the user's vocabulary cache.
+        """
         try:
             # Read and encode image
             with open(image_path, "rb") as image_file:
@@ -79,78 +107,102 @@ class FoodImageService:
                     detail="OpenAI API key not configured"
                 )
 
-            # Call OpenAI API
-            response = await client.chat.completions.create(
-                model="gpt-4.1-nano", # don't change this, it's the only model that's affordable
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Identify all food items in this image. For each item, provide: 1) Description, 2) Quantity (as a number, e.g., 1, 2, 0.5), 3) Confidence (0-1). Format as JSON array with fields: description, quantity, confidence. Use numeric values only for quantity and confidence. Keep descriptions concise."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+            prompt = "Identify all food items in this image. For each item, provide: 1) Description, 2) Quantity (as a number, e.g., 1, 2, 0.5), 3) Confidence (0-1). Format as JSON array with fields: description, quantity, confidence. Use numeric values only for quantity and confidence. Keep descriptions concise."
+            if known_foods:
+                prompt += f" This user often eats: {'; '.join(known_foods)}. If an item is one of these, use that exact description."
+            max_tokens = 1000  # Increased token limit
+
+            def request(model: str):
+                return get_async_openai().chat.completions.create(
+                    model=model,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {
+                                    "type": "text",
+                                    "text": prompt
+                                },
+                                {
+                                    "type": "image_url",
+                                    "image_url": {
+                                        "url": f"data:image/jpeg;base64,{base64_image}"
+                                    }
                                 }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=1000  # Increased token limit
-            )
-            
-            # Parse the response
+                            ]
+                        }
+                    ],
+                    max_tokens=max_tokens
+                )
+
+            def confident(food_items: List[dict]) -> bool:
+                # An empty reply is as doubtful as an unsure one
+                return bool(food_items) and min(
+                    item["confidence"] for item in food_items
+                ) >= settings.VISION_CASCADE_MIN_CONFIDENCE
+
+            # Call OpenAI API, cheapest model first (rate limited and retried per error class);
+            # a stronger model is only asked when the reply is malformed or unsure
             try:
-                # Extract the content from the response
-                content = response.choices[0].message.content
-                
-                # Clean up the content to ensure valid JSON
-                content = content.strip()
-                if not content.startswith('['):
-                    content = '[' + content
-                if not content.endswith(']'):
-                    content = content + ']'
-                
-                # Parse the JSON array from the content
-                import json
-                food_items = json.loads(content)
-                
-                # Validate the structure of each food item
-                validated_items = []
-                for item in food_items:
-                    # Handle both confidence and confidence_score fields
-                    confidence = item.get("confidence", item.get("confidence_score", 0.0))
-                    
-                    # Convert quantity to float, defaulting to 1.0 if not a number
-                    try:
-                        quantity = float(item["quantity"])
-                    except (ValueError, TypeError):
-                        quantity = 1.0
-                    
-                    validated_items.append({
-                        "description": item["description"],
-                        "quantity": quantity,
-                        "confidence": float(confidence),
-                        "is_estimated": True
-                    })
-                
-                return validated_items
-                
-            except (json.JSONDecodeError, KeyError, ValueError) as e:
+                answer = await get_model_cascade("vision").run(
+                    request,
+                    self._parse_food_items,
+                    estimated_tokens=estimate_tokens(prompt, max_tokens, image_count=1),
+                    accept=confident,
+                )
+            except INVALID_REPLY_ERRORS as e:
                 # If parsing fails, log the error and return empty list
-                print(f"Error parsing OpenAI response: {str(e)}")
-                print(f"Raw response: {response.choices[0].message.content}")
+                logger.warning(f"Error parsing OpenAI response: {str(e)}")
                 return []
-            
+            return answer.value
+
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Error processing image: {str(e)}"
             )
 
+    def _parse_food_items(self, response) -> List[dict]:
+        """Validate the vision model's reply into food item dicts; raises if it is malformed."""
+        # Extract the content from the response
+        content = response.choices[0].message.content
+
+        # Clean up the content to ensure valid JSON
+        content = content.strip()
+        if not content.startswith('['):
+            content = '[' + content
+        if not content.endswith(']'):
+            content = content + ']'
+
+        # Parse the JSON array from the content
+        try:
+            food_items = json.loads(content)
+        except json.JSONDecodeError:
+            logger.debug(f"Raw response: {response.choices[0].message.content}")
+            raise
+
+        # Validate the structure of each food item
+        validated_items = []
+        for item in food_items:
+            # Handle both confidence and confidence_score fields
+            confidence = item.get("confidence", item.get("confidence_score", 0.0))
+
+            # Convert quantity to float, defaulting to 1.0 if not a number
+            try:
+                quantity = float(item["quantity"])
+            except (ValueError, TypeError):
+                quantity = 1.0
+
+            validated_items.append({
+                "description": item["description"],
+                "quantity": quantity,
+                "confidence": float(confidence),
+                "is_estimated": True
+            })
+
+        return validated_items
+
+    @tracer.start_as_current_span("food_image.create")
     async def create_food_image(self, user_id: str, file: UploadFile) -> FoodImageResponse:
         """Create a new food image record and return task ID for processing."""
         # Validate image
@@ -176,35 +228,104 @@ class FoodImageService:
         # Return the response immediately
         return FoodImageResponse.from_orm(db_food_image)
 
-    async def process_food_image(self, image_id: str) -> Dict[str, Any]:
-        """Process a food image using LLM and update the database."""
+    @tracer.start_as_current_span("food_image.create_batch")
+    async def create_food_image_batch(self, user_id: UUID, files: List[UploadFile]) -> Tuple[uuid.UUID, List[BatchUpload]]:
+        """
+        Store many uploaded images as one batch. Files are validated and
+        written concurrently, off the event loop; the valid ones get their
+        FoodImage rows in a single transaction. Invalid files are reported
+        per file rather than failing the batch.
+
+        Image IDs are assigned here, so the uploads carry everything the
+        response needs and nothing reloads the committed rows. If the commit
+        fails, the files written for it are removed.
+        """
+        batch_id = uuid.uuid4()
+
+        def store(file: UploadFile) -> Tuple[BatchUpload, Optional[FoodImage]]:
+            is_valid, error_msg = self._check_image(file)
+            if not is_valid:
+                return BatchUpload(filename=file.filename, error=error_msg), None
+            image = FoodImage(
+                id=uuid.uuid4(),
+                user_id=user_id,
+                captured_at=datetime.utcnow(),
+                image_url=self._write_image(file, user_id),
+                status="pending",
+                recognition_confidence=0.0,
+                batch_id=batch_id,
+            )
+            return BatchUpload(filename=file.filename, image_id=image.id, status=image.status), image
+
+        stored = await asyncio.gather(*(run_in_threadpool(store, file) for file in files))
+        images = [image for _, image in stored if image is not None]
+        if images:
+            paths = [image.image_url for image in images]
+            self.db.add_all(images)
+            try:
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                for path in paths:
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise
+        return batch_id, [upload for upload, _ in stored]
+
+    def get_batch_images(self, batch_id: UUID, user_id: UUID) -> List[FoodImage]:
+        images = crud_food_image.get_batch_images(self.db, batch_id, user_id)
+        if not images:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        return images
+
+    @tracer.start_as_current_span("food_image.process")
+    async def process_food_image(self, image_id: str, lease_owner: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process a food image using LLM and update the database.
+
+        Safe to re-run: the recognition result is checkpointed on the image, so
+        a retry after a later failure reuses it instead of calling the vision
+        model again, and food items are upserted rather than re-inserted.
+        `lease_owner` (the Celery task id) keeps concurrent runs off one image.
+        """
         # Get the food image record
         db_food_image = self.db.query(FoodImage).filter(FoodImage.id == image_id).first()
         if not db_food_image:
             raise HTTPException(status_code=404, detail="Food image not found")
 
-        try:
-            # Process image with LLM
-            food_items = await self.process_image_with_llm(db_food_image.image_url)
-
-            # Create food item records
-            for item in food_items:
-                db_food_item = FoodItem(
-                    food_image_id=db_food_image.id,
-                    description=item["description"],
-                    quantity=item["quantity"],
-                    confidence=item["confidence"],
-                    is_estimated=True
-                )
-                self.db.add(db_food_item)
-
-            # Update food image status
-            db_food_image.status = "processed"
-            if food_items:
-                db_food_image.recognition_confidence = max(item["confidence"] for item in food_items)
+        if db_food_image.status == "processed":
+            return self._processed_result(db_food_image)
 
-            self.db.commit()
+        owner = lease_owner or uuid.uuid4().hex
+        if not crud_food_image.acquire_processing_lease(
+            self.db, db_food_image.id, owner, settings.FOOD_IMAGE_LEASE_SECONDS
+        ):
             self.db.refresh(db_food_image)
+            if db_food_image.status == "processed":
+                return self._processed_result(db_food_image)
+            raise HTTPException(status_code=409, detail="Food image is already being processed")
+
+        try:
+            # Stage 1: recognition, skipped if an earlier attempt already stored it
+            food_items = db_food_image.recognition_result
+            with tracer.start_as_current_span("food_image.recognize") as span:
+                span.set_attribute("checkpoint_reused", food_items is not None)
+                if food_items is None:
+                    db_food_image.status = "recognizing"
+                    self.db.commit()
+                    food_items = await self.process_image_with_llm(
+                        db_food_image.image_url, known_foods=self._known_foods(db_food_image.user_id)
+                    )
+                    crud_food_image.save_recognition_checkpoint(self.db, db_food_image, food_items)
+
+            # Stage 2: persist food items
+            with tracer.start_as_current_span("food_image.save_items") as span:
+                span.set_attribute("food_item_count", len(food_items))
+                crud_food_image.upsert_food_items(self.db, db_food_image.id, food_items)
+                if food_items:
+                    db_food_image.recognition_confidence = max(item["confidence"] for item in food_items)
+                crud_food_image.release_processing_lease(self.db, db_food_image, "processed")
+                self.db.refresh(db_food_image)
 
             # Return the processed results
             return {
@@ -214,14 +335,34 @@ class FoodImageService:
             }
 
         except Exception as e:
-            # Update status to failed if processing fails
-            db_food_image.status = "failed"
-            self.db.commit()
+            # Update status to failed if processing fails; the checkpoint is kept for the retry
+            self.db.rollback()
+            crud_food_image.release_processing_lease(self.db, db_food_image, "failed")
             raise HTTPException(
                 status_code=500,
                 detail=f"Error processing image: {str(e)}"
             )
 
+    def _known_foods(self, user_id: Any) -> List[str]:
+        vocabulary = self.vocabulary or get_user_food_vocabulary()
+        return vocabulary.for_user(user_id).descriptions(settings.USER_VOCAB_PROMPT_FOODS)
+
+    def _processed_result(self, db_food_image: FoodImage) -> Dict[str, Any]:
+        food_items = [
+            {
+                "description": item.description,
+                "quantity": item.quantity,
+                "confidence": item.confidence,
+                "is_estimated": item.is_estimated
+            }
+            for item in crud_food_image.get_food_items(self.db, db_food_image.id)
+        ]
+        return {
+            "food_items": food_items,
+            "status": "processed",
+            "recognition_confidence": db_food_image.recognition_confidence
+        }
+
     def get_user_food_images(self, user_id: str, skip: int = 0, limit: int = 100) -> List[FoodImageResponse]:
         """Get all food images for a user."""
         food_images = self.db.query(FoodImage)\
@@ -0,0 +1,211 @@
+"""
+Local similarity index over stored nutrient profiles.
+
+Food descriptions are embedded offline as hashed character 3-gram TF-IDF
+vectors ("grk yogurt plain" is close to "greek yogurt, plain"), L2-normalised
+and stored as one float32 matrix. Search is a brute-force dot product, which
+stays in the low milliseconds for the ~100k profiles this is meant for.
+
+An index is a directory of versioned files plus an `index.json` manifest that
+is swapped in atomically, so it can be rebuilt (tools/food_index.py) while
+workers read it. Workers memory-map the matrix, so every process on a host
+shares one copy through the page cache, and pick up a rebuilt index the next
+time they check the manifest.
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "index.json"
+DEFAULT_DIMENSIONS = 1024
+NGRAM = 3
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+@dataclass
+class SimilarFood:
+    food_name: str
+    similarity: float
+    nutrients: Dict[str, float]
+    llm_prompt_version: str
+    estimated_by: str
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+def ngram_counts(text: str, dimensions: int) -> Dict[int, int]:
+    """Hashed character 3-gram counts of `text`, one padded word at a time."""
+    counts: Dict[int, int] = {}
+    for word in normalize(text).split():
+        padded = f" {word} "
+        for start in range(max(1, len(padded) - NGRAM + 1)):
+            bucket = zlib.crc32(padded[start:start + NGRAM].encode()) % dimensions
+            counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+def _weigh(counts: Dict[int, int], idf: np.ndarray, out: np.ndarray) -> None:
+    """Write the L2-normalised sublinear TF-IDF vector for `counts` into `out`."""
+    for bucket, count in counts.items():
+        out[bucket] = (1.0 + math.log(count)) * idf[bucket]
+    norm = float(np.linalg.norm(out))
+    if norm:
+        out /= norm
+
+def vectorize(texts: Sequence[str], idf: np.ndarray) -> np.ndarray:
+    """Embed `texts` as rows of a float32 matrix using the index's IDF weights."""
+    vectors = np.zeros((len(texts), len(idf)), dtype=np.float32)
+    for row, text in enumerate(texts):
+        _weigh(ngram_counts(text, len(idf)), idf, vectors[row])
+    return vectors
+
+def build_index(directory: str, profiles: Iterable[Dict], dimensions: int = DEFAULT_DIMENSIONS) -> int:
+    """
+    Build an index from `profiles` (dicts with food_name, nutrients,
+    llm_prompt_version and estimated_by) and publish it in `directory`.
+    Returns the number of indexed foods.
+    """
+    entries = [
+        {
+            "food_name": profile["food_name"],
+            "nutrients": profile["nutrients"],
+            "llm_prompt_version": profile["llm_prompt_version"],
+            "estimated_by": profile["estimated_by"],
+        }
+        for profile in profiles
+        if normalize(profile["food_name"])
+    ]
+    all_counts = [ngram_counts(entry["food_name"], dimensions) for entry in entries]
+    document_frequency = np.zeros(dimensions, dtype=np.float64)
+    for counts in all_counts:
+        document_frequency[list(counts)] += 1
+    idf = (np.log((1 + len(entries)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    os.makedirs(directory, exist_ok=True)
+    version = f"{int(time.time() * 1000)}-{os.getpid()}"
+    vectors_file, idf_file, entries_file = f"vectors-{version}.npy", f"idf-{version}.npy", f"entries-{version}.json"
+
+    # Written row by row into the mapped file, so the build never holds a second copy in memory
+    vectors = np.lib.format.open_memmap(
+        os.path.join(directory, vectors_file), mode="w+", dtype=np.float32, shape=(len(entries), dimensions)
+    )
+    for row, counts in enumerate(all_counts):
+        _weigh(counts, idf, vectors[row])
+    vectors.flush()
+    del vectors
+    np.save(os.path.join(directory, idf_file), idf)
+    with open(os.path.join(directory, entries_file), "w") as f:
+        json.dump(entries, f)
+
+    manifest = {"vectors": vectors_file, "idf": idf_file, "entries": entries_file, "count": len(entries), "dimensions": dimensions}
+    tmp_path = os.path.join(directory, f"{MANIFEST}.{version}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST))
+
+    # Readers that still map an old version keep it until they reload
+    current = {vectors_file, idf_file, entries_file}
+    for name in os.listdir(directory):
+        if name.startswith(("vectors-", "idf-", "entries-")) and name not in current:
+            os.remove(os.path.join(directory, name))
+    return len(entries)
+
+class FoodVectorIndex:
+    """
+    Read side of an index directory. Loads lazily and re-checks the manifest
+    at most every `reload_seconds`; a missing index simply has no matches.
+    """
+
+    def __init__(self, directory: str, reload_seconds: Optional[float] = None):
+        self.directory = directory
+        self.reload_seconds = settings.FOOD_VECTOR_RELOAD_SECONDS if reload_seconds is None else reload_seconds
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._manifest_stat: Optional[tuple] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._idf: Optional[np.ndarray] = None
+        self._entries: List[Dict] = []
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._entries)
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_seconds:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_seconds:
+                return
+            self._checked_at = now
+            manifest_path = os.path.join(self.directory, MANIFEST)
+            try:
+                stat = os.stat(manifest_path)
+            except FileNotFoundError:
+                return
+            # Every build replaces the manifest with a new file, so the inode changes even within one mtime tick
+            manifest_stat = (stat.st_ino, stat.st_mtime_ns)
+            if manifest_stat == self._manifest_stat:
+                return
+            try:
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+                vectors = np.load(os.path.join(self.directory, manifest["vectors"]), mmap_mode="r")
+                idf = np.load(os.path.join(self.directory, manifest["idf"]))
+                with open(os.path.join(self.directory, manifest["entries"])) as f:
+                    entries = json.load(f)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not load food vector index from {self.directory}: {str(e)}")
+                return
+            self._vectors, self._idf, self._entries = vectors, idf, entries
+            self._manifest_stat = manifest_stat
+            logger.info(f"Loaded food vector index with {len(entries)} foods from {self.directory}")
+
+    def nearest(self, texts: Sequence[str], k: int = 1) -> List[List[SimilarFood]]:
+        """The `k` most similar indexed foods for each text, best first."""
+        self._refresh()
+        vectors, idf, entries = self._vectors, self._idf, self._entries
+        if vectors is None or not entries or not texts:
+            return [[] for _ in texts]
+        scores = vectorize(texts, idf) @ vectors.T
+        k = min(k, len(entries))
+        results = []
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k] if k < len(row) else np.arange(len(row))
+            top = top[np.argsort(-row[top])]
+            results.append([
+                SimilarFood(
+                    food_name=entries[i]["food_name"],
+                    similarity=float(row[i]),
+                    nutrients=entries[i]["nutrients"],
+                    llm_prompt_version=entries[i]["llm_prompt_version"],
+                    estimated_by=entries[i]["estimated_by"],
+                )
+                for i in top
+            ])
+        return results
+
+_index: Optional[FoodVectorIndex] = None
+_index_lock = threading.Lock()
+
+def get_food_vector_index() -> Optional[FoodVectorIndex]:
+    """The process-wide index, or None when FOOD_VECTOR_INDEX_DIR is unset."""
+    global _index
+    if not settings.FOOD_VECTOR_INDEX_DIR:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = FoodVectorIndex(settings.FOOD_VECTOR_INDEX_DIR)
+    return _index
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import User
+
+logger = logging.getLogger(__name__)
+
+class LastLoginRecorder:
+    """
+    Write-behind buffer for `User.last_login`.
+
+    Authenticated requests record a timestamp in memory instead of committing
+    to `users`; pending timestamps are written in one batched UPDATE by
+    `flush`. A user is recorded at most once per `granularity_seconds`.
+    """
+
+    def __init__(self, granularity_seconds: int = 60):
+        self.granularity = timedelta(seconds=granularity_seconds)
+        self._pending: Dict[UUID, datetime] = {}
+        self._last_recorded: Dict[UUID, datetime] = {}
+        self._lock = threading.Lock()
+
+    def record(self, user_id: UUID, previous: Optional[datetime] = None, seen_at: Optional[datetime] = None) -> bool:
+        """
+        Record that a user was seen. `previous` is the user's stored last_login,
+        if known, so a fresh row does not need rewriting at all.
+        Returns True if the timestamp was queued for the next flush.
+        """
+        seen_at = seen_at or datetime.utcnow()
+        with self._lock:
+            last = self._last_recorded.get(user_id, previous)
+            if last is not None and seen_at - last < self.granularity:
+                return False
+            self._last_recorded[user_id] = seen_at
+            self._pending[user_id] = seen_at
+            return True
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, db: Session) -> int:
+        """Write all pending timestamps in one batched UPDATE. Returns the number of users updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            # Entries older than the granularity window no longer suppress
+            # anything, so drop them to keep memory bounded by active users.
+            cutoff = datetime.utcnow() - self.granularity
+            self._last_recorded = {
+                user_id: ts for user_id, ts in self._last_recorded.items() if ts >= cutoff
+            }
+        if not pending:
+            return 0
+        try:
+            db.execute(
+                update(User),
+                [{"id": user_id, "last_login": ts} for user_id, ts in pending.items()],
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the timestamps back so the next flush retries them,
+            # unless a newer one was recorded in the meantime.
+            with self._lock:
+                for user_id, ts in pending.items():
+                    if ts > self._pending.get(user_id, datetime.min):
+                        self._pending[user_id] = ts
+            raise
+        return len(pending)
+
+last_login_recorder = LastLoginRecorder(settings.LAST_LOGIN_GRANULARITY_SECONDS)
+
+def flush_last_logins() -> int:
+    """Flush pending last_login timestamps using a fresh database session."""
+    db = SessionLocal()
+    try:
+        return last_login_recorder.flush(db)
+    finally:
+        db.close()
+
+async def run_last_login_flusher(interval_seconds: int) -> None:
+    """Periodically flush pending last_login timestamps until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(flush_last_logins)
+        except Exception as e:
+            logger.error(f"Error flushing last_login timestamps: {str(e)}")
@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+from redis import RedisError
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Requests and tokens refill continuously over a one-minute window,
+# matching how the provider enforces RPM/TPM limits.
+WINDOW_SECONDS = 60.0
+
+def estimate_tokens(prompt: str, max_tokens: Optional[int] = None, image_count: int = 0) -> int:
+    """
+    Rough token cost of a chat completion for rate limiting. The provider
+    counts `max_tokens` against TPM up front, so it is included in full.
+    """
+    # ~4 characters per token for English text; low-detail images cost ~85 tokens
+    return math.ceil(len(prompt) / 4) + image_count * 85 + (max_tokens or 500)
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the Retry-After hint from a provider error, if it has one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    for header in ("retry-after-ms", "retry-after"):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            seconds = float(value)
+        except (TypeError, ValueError):
+            continue
+        return seconds / 1000 if header == "retry-after-ms" else seconds
+    return None
+
+class LocalTokenBucket:
+    """In-process requests-per-minute and tokens-per-minute bucket."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, timer: Callable[[], float] = time.monotonic):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._timer = timer
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = timer()
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: int) -> float:
+        """Take capacity for one request of `tokens`. Returns 0 on success, else seconds to wait."""
+        tokens = min(tokens, self.tokens_per_minute)
+        with self._lock:
+            now = self._timer()
+            if now < self._cooldown_until:
+                return self._cooldown_until - now
+            elapsed = max(0.0, now - self._updated)
+            self._updated = now
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / WINDOW_SECONDS)
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / WINDOW_SECONDS)
+            wait = 0.0
+            if self._requests < 1:
+                wait = max(wait, (1 - self._requests) * WINDOW_SECONDS / self.requests_per_minute)
+            if self._tokens < tokens:
+                wait = max(wait, (tokens - self._tokens) * WINDOW_SECONDS / self.tokens_per_minute)
+            if wait == 0.0:
+                self._requests -= 1
+                self._tokens -= tokens
+            return wait
+
+    def cooldown(self, seconds: float) -> None:
+        """Stop handing out capacity for `seconds`, e.g. after a 429."""
+        with self._lock:
+            self._cooldown_until = max(self._cooldown_until, self._timer() + seconds)
+
+# Same algorithm as LocalTokenBucket, run atomically in Redis so every worker
+# draws from one fleet-wide budget. Uses the Redis clock to avoid worker skew.
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), tpm)
+local state = redis.call('HMGET', KEYS[1], 'req', 'tok', 'ts', 'cooldown_until')
+local cooldown_until = tonumber(state[4]) or 0
+if now < cooldown_until then
+    return cooldown_until - now
+end
+local req = tonumber(state[1]) or rpm
+local tok = tonumber(state[2]) or tpm
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+req = math.min(rpm, req + elapsed * rpm / 60000)
+tok = math.min(tpm, tok + elapsed * tpm / 60000)
+local wait = 0
+if req < 1 then wait = math.max(wait, (1 - req) * 60000 / rpm) end
+if tok < cost then wait = math.max(wait, (cost - tok) * 60000 / tpm) end
+if wait == 0 then
+    req = req - 1
+    tok = tok - cost
+end
+redis.call('HSET', KEYS[1], 'req', tostring(req), 'tok', tostring(tok), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 120000)
+return math.ceil(wait)
+"""
+
+_COOLDOWN_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local until_ms = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('HGET', KEYS[1], 'cooldown_until')) or 0
+if until_ms > current then
+    redis.call('HSET', KEYS[1], 'cooldown_until', until_ms)
+end
+redis.call('PEXPIRE', KEYS[1], 120000)
+return 0
+"""
+
+class RedisTokenBucket:
+    """
+    Fleet-wide token bucket shared by all workers through Redis. If Redis is
+    unreachable it degrades to a local bucket for `fallback_seconds` rather
+    than failing LLM calls.
+    """
+
+    def __init__(self, key: str, requests_per_minute: int, tokens_per_minute: int, fallback_seconds: float = 30.0):
+        self.key = key
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.fallback_seconds = fallback_seconds
+        self._local = LocalTokenBucket(requests_per_minute, tokens_per_minute)
+        self._redis_down_until = 0.0
+        self._acquire = None
+        self._cooldown = None
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= self._redis_down_until
+
+    def _mark_redis_down(self, error: RedisError) -> None:
+        logger.warning(f"LLM rate limiter falling back to local bucket: {str(error)}")
+        self._redis_down_until = time.monotonic() + self.fallback_seconds
+
+    def try_acquire(self, tokens: int) -> float:
+        if self._redis_available():
+            try:
+                if self._acquire is None:
+                    self._acquire = get_redis().register_script(_ACQUIRE_SCRIPT)
+                wait_ms = self._acquire(keys=[self.key], args=[self.requests_per_minute, self.tokens_per_minute, tokens])
+                return int(wait_ms) / 1000
+            except RedisError as e:
+                self._mark_redis_down(e)
+        return self._local.try_acquire(tokens)
+
+    def cooldown(self, seconds: float) -> None:
+        self._local.cooldown(seconds)
+        if self._redis_available():
+            try:
+                if self._cooldown is None:
+                    self._cooldown = get_redis().register_script(_COOLDOWN_SCRIPT)
+                self._cooldown(keys=[self.key], args=[int(seconds * 1000)])
+            except RedisError as e:
+                self._mark_redis_down(e)
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: grows by roughly one slot per limit's worth of
+    healthy calls and halves on a 429 or when latency exceeds the target.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 64,
+                 latency_target_seconds: float = 10.0, decrease_factor: float = 0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target_seconds = latency_target_seconds
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def on_success(self, latency_seconds: float) -> None:
+        with self._lock:
+            if latency_seconds > self.latency_target_seconds:
+                self._decrease()
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_overload(self) -> None:
+        with self._lock:
+            self._decrease()
+
+    def _decrease(self) -> None:
+        self.limit = max(self.minimum, self.limit * self.decrease_factor)
+
+class LLMRateLimiter:
+    """
+    Gate for outgoing LLM calls: waits for fleet-wide RPM/TPM budget and a
+    local concurrency slot, then feeds the call's outcome back into the
+    adaptive concurrency limit. A 429 also pauses the whole fleet for the
+    provider's Retry-After, so workers don't retry into the same wall.
+    """
+
+    def __init__(self, bucket, concurrency: AdaptiveConcurrency, poll_interval: float = 0.05):
+        self.bucket = bucket
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+
+    async def _wait_for_capacity(self, tokens: int) -> None:
+        while True:
+            wait = self.bucket.try_acquire(tokens)
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        while not self.concurrency.try_acquire():
+            await asyncio.sleep(self.poll_interval)
+
+    @asynccontextmanager
+    async def limit(self, estimated_tokens: int) -> AsyncIterator[None]:
+        """Hold rate-limit capacity for the duration of one LLM call."""
+        from openai import RateLimitError  # deferred: openai is slow to import
+
+        await self._wait_for_capacity(estimated_tokens)
+        started = time.monotonic()
+        try:
+            yield
+        except RateLimitError as e:
+            self.concurrency.on_overload()
+            self.bucket.cooldown(retry_after_seconds(e) or 1.0)
+            raise
+        else:
+            self.concurrency.on_success(time.monotonic() - started)
+        finally:
+            self.concurrency.release()
+
+_llm_rate_limiter: Optional[LLMRateLimiter] = None
+
+def get_llm_rate_limiter() -> LLMRateLimiter:
+    """Get this process's LLM rate limiter, created from settings on first use."""
+    global _llm_rate_limiter
+    if _llm_rate_limiter is None:
+        if settings.LLM_RATE_LIMIT_BACKEND == "redis":
+            bucket = RedisTokenBucket(
+                "llm:rate_limit", settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE
+            )
+        else:
+            bucket = LocalTokenBucket(settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE)
+        _llm_rate_limiter = LLMRateLimiter(
+            bucket,
+            AdaptiveConcurrency(
+                initial=settings.LLM_INITIAL_CONCURRENCY,
+                maximum=settings.LLM_MAX_CONCURRENCY,
+                latency_target_seconds=settings.LLM_LATENCY_TARGET_SECONDS,
+            ),
+        )
+    return _llm_rate_limiter
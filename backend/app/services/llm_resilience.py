@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import LLM_ERRORS, record_llm_call
+from app.core.tracing import record_exception, tracer
+from app.services.llm_rate_limiter import LLMRateLimiter, get_llm_rate_limiter, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How to retry one class of LLM error."""
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    honor_retry_after: bool = False
+    trips_breaker: bool = True  # whether the error says the provider is degraded
+
+@lru_cache(maxsize=None)
+def retry_policies() -> Tuple[Tuple[type, RetryPolicy], ...]:
+    """
+    Retry policy per OpenAI error class, checked in order; errors not listed
+    (bad request, auth, not found, ...) are not retried. Built on first use
+    so importing this module does not import openai.
+    """
+    import openai
+    return (
+        (openai.RateLimitError, RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=30.0, honor_retry_after=True, trips_breaker=False)),
+        (openai.APITimeoutError, RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=8.0)),
+        (openai.APIConnectionError, RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=8.0)),
+        (openai.InternalServerError, RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=16.0)),
+    )
+
+def policy_for(error: Exception) -> Optional[RetryPolicy]:
+    for error_class, policy in retry_policies():
+        if isinstance(error, error_class):
+            return policy
+    return None
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float, retry_after: Optional[float] = None) -> float:
+    """
+    Exponential backoff with full jitter for the given zero-based attempt.
+    A provider Retry-After hint is treated as a lower bound.
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while its circuit is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"LLM circuit '{name}' is open; retry in {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive provider failures and fails
+    fast for `reset_timeout` seconds, then lets a single trial call through
+    (half-open) to decide whether to close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 timer: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._timer = timer
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call must not go out."""
+        with self._lock:
+            if self.state == self.OPEN:
+                elapsed = self._timer() - self._opened_at
+                if elapsed < self.reset_timeout:
+                    raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpenError(self.name, self.reset_timeout)
+                self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"LLM circuit '{self.name}' opened after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = self._timer()
+                self._trial_in_flight = False
+
+class LatencyTracker:
+    """Rolling window of call latencies for estimating the hedging deadline."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+class ResilientLLMCaller:
+    """
+    Wraps one stage's LLM calls (e.g. vision recognition) with rate limiting,
+    per-error-class retries, a circuit breaker and optional request hedging:
+    if a call is still running at the stage's observed P95 latency, a second
+    identical request is sent and whichever finishes first wins.
+    """
+
+    def __init__(self, name: str, rate_limiter: LLMRateLimiter, breaker: CircuitBreaker,
+                 hedge: bool = False, latency: Optional[LatencyTracker] = None,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.name = name
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker
+        self.hedge = hedge
+        self.latency = latency or LatencyTracker()
+        self._sleep = sleep
+        self.hedges_sent = 0
+
+    async def call(self, make_request: Callable[[], Awaitable[Any]], estimated_tokens: int, model: str = "unknown") -> Any:
+        """
+        Run `make_request` (a zero-argument coroutine factory) until it succeeds
+        or retries run out. `model` only labels metrics.
+        """
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                response = await self._call_once(make_request, estimated_tokens, model)
+            except Exception as e:
+                policy = policy_for(e)
+                if policy is not None and policy.trips_breaker:
+                    self.breaker.record_failure()
+                else:
+                    # Client errors and rate limiting mean the provider itself is healthy
+                    self.breaker.record_success()
+                if policy is None or attempt + 1 >= policy.max_attempts:
+                    raise
+                delay = backoff_delay(
+                    attempt, policy.base_delay, policy.max_delay,
+                    retry_after_seconds(e) if policy.honor_retry_after else None,
+                )
+                logger.warning(f"LLM call '{self.name}' failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                attempt += 1
+                await self._sleep(delay)
+            else:
+                self.breaker.record_success()
+                return response
+
+    async def _limited(self, make_request: Callable[[], Awaitable[Any]], estimated_tokens: int, model: str) -> Any:
+        async with self.rate_limiter.limit(estimated_tokens):
+            with tracer.start_as_current_span(f"llm.{self.name}", record_exception=False) as span:
+                span.set_attribute("llm.model", model)
+                span.set_attribute("llm.estimated_tokens", estimated_tokens)
+                started = time.monotonic()
+                try:
+                    response = await make_request()
+                except Exception as e:
+                    LLM_ERRORS.labels(model=model, stage=self.name, error=type(e).__name__).inc()
+                    record_exception(span, e)
+                    raise
+                elapsed = time.monotonic() - started
+                self.latency.add(elapsed)
+                usage = getattr(response, "usage", None)
+                record_llm_call(model, self.name, elapsed, usage)
+                total_tokens = getattr(usage, "total_tokens", None)
+                if isinstance(total_tokens, int):
+                    span.set_attribute("llm.total_tokens", total_tokens)
+                return response
+
+    async def _call_once(self, make_request: Callable[[], Awaitable[Any]], estimated_tokens: int, model: str) -> Any:
+        deadline = self.latency.percentile(0.95) if self.hedge else None
+        if deadline is None:
+            return await self._limited(make_request, estimated_tokens, model)
+
+        primary = asyncio.ensure_future(self._limited(make_request, estimated_tokens, model))
+        done, _ = await asyncio.wait({primary}, timeout=deadline)
+        if done:
+            return primary.result()
+
+        self.hedges_sent += 1
+        hedged = asyncio.ensure_future(self._limited(make_request, estimated_tokens, model))
+        pending = {primary, hedged}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Both failed; surface the primary's error
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+_callers: Dict[str, ResilientLLMCaller] = {}
+
+def get_llm_caller(name: str) -> ResilientLLMCaller:
+    """Get the process-wide caller for one LLM stage; each stage has its own breaker and latency profile."""
+    if name not in _callers:
+        _callers[name] = ResilientLLMCaller(
+            name,
+            get_llm_rate_limiter(),
+            CircuitBreaker(
+                name,
+                failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.LLM_CIRCUIT_RESET_SECONDS,
+            ),
+            hedge=settings.LLM_HEDGING_ENABLED,
+        )
+    return _callers[name]
@@ -0,0 +1,141 @@
+"""
+Model cascades: answer a stage with its cheapest model first and escalate
+to the next, stronger model only when the reply fails validation or isn't
+confident enough.
+
+Each stage's models come from settings (a comma-separated list, cheapest
+first); the last model's reply is used as is. Every answer is counted in
+`llm_cascade_answers_total` by stage, model and outcome ("answered",
+"invalid" or "low_confidence"), so each tier's hit rate and the escalation
+rate can be graphed per stage. Provider errors are not escalated; they are
+retried by the stage's ResilientLLMCaller as before.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, TypeVar
+
+from opentelemetry import trace
+
+from app.core.config import settings
+from app.core.metrics import record_cascade_answers
+from app.services.llm_resilience import ResilientLLMCaller, get_llm_caller
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+I = TypeVar("I")
+
+# What a parser raises for a reply that doesn't match the expected schema
+# (json.JSONDecodeError and pydantic's ValidationError are ValueErrors)
+INVALID_REPLY_ERRORS = (ValueError, KeyError, TypeError, AttributeError, IndexError)
+
+@dataclass
+class CascadeAnswer(Generic[T]):
+    value: T
+    model: str
+    tier: int  # position of `model` in the cascade, 0 being the cheapest
+
+class ModelCascade:
+    def __init__(self, stage: str, models: List[str], caller: Optional[ResilientLLMCaller] = None):
+        if not models:
+            raise ValueError(f"Model cascade for '{stage}' has no models")
+        self.stage = stage
+        self.models = list(models)
+        self.caller = caller
+
+    async def run(
+        self,
+        request: Callable[[str], Awaitable[Any]],
+        parse: Callable[[Any], T],
+        estimated_tokens: int,
+        accept: Optional[Callable[[T], bool]] = None,
+    ) -> CascadeAnswer[T]:
+        """
+        Ask each model in turn: `request(model)` makes the call, `parse`
+        validates the reply (raising on a malformed one) and `accept` decides
+        whether a valid answer is good enough to stop. Raises the last
+        model's parse error if no model gave a valid reply.
+        """
+        caller = self.caller or get_llm_caller(self.stage)
+        for tier, model in enumerate(self.models):
+            final = tier == len(self.models) - 1
+            response = await caller.call(lambda model=model: request(model), estimated_tokens, model=model)
+            try:
+                value = parse(response)
+            except INVALID_REPLY_ERRORS as e:
+                record_cascade_answers(self.stage, model, "invalid")
+                if final:
+                    raise
+                logger.info(f"Escalating '{self.stage}' past {model}: invalid reply ({str(e)})")
+                continue
+            if not final and accept is not None and not accept(value):
+                record_cascade_answers(self.stage, model, "low_confidence")
+                logger.info(f"Escalating '{self.stage}' past {model}: low confidence")
+                continue
+            record_cascade_answers(self.stage, model, "answered")
+            self._annotate(model, tier)
+            return CascadeAnswer(value, model, tier)
+
+    async def run_each(
+        self,
+        items: List[I],
+        request: Callable[[str, List[I]], Awaitable[Any]],
+        parse: Callable[[Any, List[I]], List[Optional[T]]],
+        estimated_tokens: Callable[[List[I]], int],
+    ) -> List[Optional[CascadeAnswer[T]]]:
+        """
+        Like `run` for a call that answers several items at once: `parse`
+        returns one value per item, None for an item without a valid answer,
+        and only those items are sent to the next model. Items no model
+        answered are None.
+        """
+        caller = self.caller or get_llm_caller(self.stage)
+        answers: List[Optional[CascadeAnswer[T]]] = [None] * len(items)
+        pending = list(range(len(items)))
+        for tier, model in enumerate(self.models):
+            if not pending:
+                break
+            final = tier == len(self.models) - 1
+            batch = [items[index] for index in pending]
+            response = await caller.call(
+                lambda model=model, batch=batch: request(model, batch), estimated_tokens(batch), model=model
+            )
+            try:
+                values = parse(response, batch)
+            except INVALID_REPLY_ERRORS as e:
+                record_cascade_answers(self.stage, model, "invalid", len(batch))
+                if final:
+                    raise
+                logger.info(f"Escalating {len(batch)} '{self.stage}' items past {model}: invalid reply ({str(e)})")
+                continue
+            unanswered = []
+            for index, value in zip(pending, values):
+                if value is None:
+                    unanswered.append(index)
+                else:
+                    answers[index] = CascadeAnswer(value, model, tier)
+            record_cascade_answers(self.stage, model, "answered", len(pending) - len(unanswered))
+            record_cascade_answers(self.stage, model, "invalid", len(unanswered))
+            self._annotate(model, tier)
+            pending = unanswered
+        return answers
+
+    def _annotate(self, model: str, tier: int) -> None:
+        span = trace.get_current_span()
+        span.set_attribute("llm.cascade_model", model)
+        span.set_attribute("llm.cascade_tier", tier)
+
+def parse_models(value: str) -> List[str]:
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+_cascades: Dict[str, ModelCascade] = {}
+
+def get_model_cascade(stage: str) -> ModelCascade:
+    """The process-wide cascade for "vision" or "nutrients", built from settings on first use."""
+    if stage not in _cascades:
+        models = {
+            "vision": settings.VISION_MODEL_CASCADE,
+            "nutrients": settings.NUTRIENT_MODEL_CASCADE,
+        }[stage]
+        _cascades[stage] = ModelCascade(stage, parse_models(models))
+    return _cascades[stage]
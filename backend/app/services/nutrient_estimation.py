@@ -1,18 +1,28 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
 import json
+import math
 from datetime import datetime
 import logging
 from pydantic import BaseModel
 
+from app.core.cache import BoundedCache
+from app.core.config import settings
+from app.core.openai_client import get_async_openai
+from app.core.metrics import record_cache_lookup, record_cache_lookups
+from app.services.llm_rate_limiter import estimate_tokens
+from app.services.model_cascade import ModelCascade, get_model_cascade
+
 logger = logging.getLogger(__name__)
 
 class NutrientProfile(BaseModel):
     """Represents the nutrient profile of a food item."""
     food_name: str
     nutrients: Dict[str, float]  # e.g., {"iron_mg": 0.8, "potassium_mg": 350}
-    source: str  # "model_estimate" or "cache"
+    source: str  # "model_estimate", "cache", "similar_profile" or "user_vocabulary"
     llm_prompt_version: str
     estimated_by: str
+    basis: str = "per_100g"  # what `nutrients` are given per; totals scale them as per 100 g
     created_at: datetime
     updated_at: datetime
 
@@ -27,35 +37,82 @@ class FoodItem(BaseModel):
 class NutrientEstimationService:
     """Service for estimating nutrient content of food items using LLM."""
     
-    def __init__(self, openai_client):
+    def __init__(
+        self,
+        openai_client,
+        vector_index=None,
+        profile_store: Optional[Callable[[List[NutrientProfile]], None]] = None,
+        user_vocabulary=None,
+        cascade: Optional[ModelCascade] = None,
+    ):
+        """
+        `vector_index` (a FoodVectorIndex) lets a stored profile of a very
+        similar food stand in for a new estimate; `profile_store` is given each
+        call's new LLM estimates so they can be indexed later.
+        `user_vocabulary` (a UserFoodVocabulary) is checked before the other
+        tiers when a call names the user it estimates for.
+        `cascade` overrides the models tried for estimates (NUTRIENT_MODEL_CASCADE).
+        """
         self.openai_client = openai_client
-        self.nutrient_cache = {}  # In-memory cache, replace with DB in production
+        self.vector_index = vector_index
+        self.profile_store = profile_store
+        self.user_vocabulary = user_vocabulary
+        self.cascade = cascade
+        # Bounded, so a process-wide service (bulk jobs, receipts) doesn't grow with its input
+        self.nutrient_cache = BoundedCache(maxsize=settings.NUTRIENT_CACHE_MAXSIZE)
         self.required_nutrients = [
             "iron_mg", "potassium_mg", "magnesium_mg", "calcium_mg",
             "vitamin_d_mcg", "vitamin_b12_mcg", "folate_mcg",
             "zinc_mg", "selenium_mcg", "fiber_g"
         ]
 
-    async def estimate_nutrients(self, food_items: List[FoodItem]) -> List[Tuple[FoodItem, NutrientProfile]]:
+    async def estimate_nutrients(
+        self, food_items: List[FoodItem], user_id: Optional[Any] = None
+    ) -> List[Tuple[FoodItem, NutrientProfile]]:
         """
-        Estimate nutrients for a list of food items.
+        Estimate nutrients for a list of food items, eaten by `user_id` if given.
         Returns a list of tuples containing the food item and its nutrient profile.
         """
         results = []
+        estimated = []
+        memory_hits = memory_misses = 0
+        # Checked once, so the cache-hit loop below stays a dict lookup per item
+        for_user = user_id is not None and self.user_vocabulary is not None
         
         for food_item in food_items:
             try:
-                # Check cache first
+                # The user's own foods first
+                if for_user:
+                    user_profile = self._get_from_user_vocabulary(user_id, food_item.description)
+                    if user_profile:
+                        results.append((food_item, user_profile))
+                        continue
+
+                # Then the shared cache
                 cached_profile = self._get_from_cache(food_item.description)
                 if cached_profile:
+                    memory_hits += 1
+                    if for_user:
+                        self._remember_for_user(user_id, food_item, cached_profile)
                     results.append((food_item, cached_profile))
                     continue
+                memory_misses += 1
+
+                # Then the profile of a near-identical food, if one is indexed
+                similar_profile, = self._get_similar_profiles([food_item.description])
+                if similar_profile:
+                    self._add_to_cache(food_item.description, similar_profile)
+                    self._remember_for_user(user_id, food_item, similar_profile)
+                    results.append((food_item, similar_profile))
+                    continue
 
                 # Get nutrient estimation from LLM
                 nutrient_profile = await self._get_llm_estimation(food_item)
                 
                 # Cache the result
                 self._add_to_cache(food_item.description, nutrient_profile)
+                self._remember_for_user(user_id, food_item, nutrient_profile)
+                estimated.append(nutrient_profile)
                 
                 results.append((food_item, nutrient_profile))
                 
@@ -64,23 +121,171 @@ class NutrientEstimationService:
                 # Return None for failed items
                 results.append((food_item, None))
         
+        record_cache_lookups("nutrient", "memory", memory_hits, memory_misses)
+        self._store_profiles(estimated)
         return results
 
+    async def estimate_nutrients_batch(
+        self,
+        food_items: List[FoodItem],
+        batch_size: int = 20,
+        on_progress: Optional[Callable[[int], None]] = None,
+        user_id: Optional[Any] = None,
+        raise_errors: bool = False,
+    ) -> List[Tuple[FoodItem, Optional[NutrientProfile]]]:
+        """
+        Estimate nutrients for many items (e.g. a whole receipt) at once,
+        checking `user_id`'s own foods first if a user is given.
+
+        Each distinct uncached description without a near-identical indexed
+        food is estimated once, `batch_size` descriptions per LLM call, and
+        the calls run concurrently. As each
+        call finishes `on_progress` gets the number of items resolved so far.
+        Items whose batch failed get a None profile, unless `raise_errors` is
+        set: then, once every batch has finished and the successful ones are
+        cached and stored, the first batch's error is raised so the caller
+        can retry.
+        """
+        profiles: Dict[str, Optional[NutrientProfile]] = {}
+        pending: Dict[str, FoodItem] = {}
+        memory_hits = 0
+        for food_item in food_items:
+            key = food_item.description.lower()
+            if key in profiles or key in pending:
+                continue
+            user_profile = self._get_from_user_vocabulary(user_id, food_item.description)
+            if user_profile:
+                profiles[key] = user_profile
+                continue
+            cached_profile = self._get_from_cache(food_item.description)
+            if cached_profile:
+                memory_hits += 1
+                self._remember_for_user(user_id, food_item, cached_profile)
+                profiles[key] = cached_profile
+            else:
+                pending[key] = food_item
+        record_cache_lookups("nutrient", "memory", memory_hits, len(pending))
+
+        similar_profiles = self._get_similar_profiles([food_item.description for food_item in pending.values()])
+        for (key, food_item), similar_profile in zip(list(pending.items()), similar_profiles):
+            if similar_profile:
+                self._add_to_cache(food_item.description, similar_profile)
+                self._remember_for_user(user_id, food_item, similar_profile)
+                profiles[key] = similar_profile
+                del pending[key]
+
+        def resolved_count() -> int:
+            return sum(1 for food_item in food_items if food_item.description.lower() in profiles)
+
+        if on_progress and profiles:
+            on_progress(resolved_count())
+
+        unique_items = list(pending.values())
+        batches = [unique_items[i:i + batch_size] for i in range(0, len(unique_items), batch_size)]
+
+        async def run_batch(batch: List[FoodItem]) -> Tuple[List[FoodItem], Optional[List[Optional[NutrientProfile]]]]:
+            try:
+                return batch, await self._get_llm_batch_estimation(batch)
+            except Exception as e:
+                logger.error(f"Error estimating nutrients for a batch of {len(batch)} items: {str(e)}")
+                errors.append(e)
+                return batch, None
+
+        errors: List[Exception] = []
+        estimated = []
+        for finished in asyncio.as_completed([run_batch(batch) for batch in batches]):
+            batch, batch_profiles = await finished
+            for position, food_item in enumerate(batch):
+                profile = batch_profiles[position] if batch_profiles else None
+                if profile is not None:
+                    self._add_to_cache(food_item.description, profile)
+                    self._remember_for_user(user_id, food_item, profile)
+                    estimated.append(profile)
+                profiles[food_item.description.lower()] = profile
+            if on_progress:
+                on_progress(resolved_count())
+
+        self._store_profiles(estimated)
+        if raise_errors and errors:
+            raise errors[0]
+        return [(food_item, profiles.get(food_item.description.lower())) for food_item in food_items]
+
     def _get_from_cache(self, food_name: str) -> Optional[NutrientProfile]:
         """Get nutrient profile from cache."""
         return self.nutrient_cache.get(food_name.lower())
 
     def _add_to_cache(self, food_name: str, profile: NutrientProfile):
         """Add nutrient profile to cache."""
-        self.nutrient_cache[food_name.lower()] = profile
+        self.nutrient_cache.set(food_name.lower(), profile)
+
+    def _get_from_user_vocabulary(self, user_id: Optional[Any], food_name: str) -> Optional[NutrientProfile]:
+        """Profile of one of the user's habitual foods, if `food_name` is one."""
+        if user_id is None or self.user_vocabulary is None:
+            return None
+        entry = self.user_vocabulary.get(user_id, food_name)
+        record_cache_lookup("nutrient", "user", entry is not None)
+        if entry is None:
+            return None
+        now = datetime.utcnow()
+        return NutrientProfile(
+            food_name=entry.description,
+            nutrients=entry.nutrients,
+            source="user_vocabulary",
+            llm_prompt_version=entry.llm_prompt_version,
+            estimated_by=entry.estimated_by,
+            created_at=now,
+            updated_at=now
+        )
+
+    def _remember_for_user(self, user_id: Optional[Any], food_item: FoodItem, profile: NutrientProfile) -> None:
+        if user_id is not None and self.user_vocabulary is not None:
+            self.user_vocabulary.remember(user_id, food_item.description, profile)
+
+    def _get_similar_profiles(self, descriptions: List[str]) -> List[Optional[NutrientProfile]]:
+        """
+        Reuse the stored profile of the most similar indexed food for each
+        description, if it is at least FOOD_VECTOR_MIN_SIMILARITY similar.
+        """
+        if self.vector_index is None or not descriptions:
+            return [None] * len(descriptions)
+        try:
+            neighbours = self.vector_index.nearest(descriptions)
+        except Exception as e:
+            logger.warning(f"Food vector index lookup failed: {str(e)}")
+            return [None] * len(descriptions)
+
+        now = datetime.utcnow()
+        profiles = []
+        for description, candidates in zip(descriptions, neighbours):
+            best = candidates[0] if candidates else None
+            if best is None or best.similarity < settings.FOOD_VECTOR_MIN_SIMILARITY:
+                profiles.append(None)
+                continue
+            logger.debug(f"Reusing nutrients of {best.food_name} for {description} (similarity {best.similarity:.3f})")
+            profiles.append(NutrientProfile(
+                food_name=description,
+                nutrients=best.nutrients,
+                source="similar_profile",
+                llm_prompt_version=best.llm_prompt_version,
+                estimated_by=best.estimated_by,
+                created_at=now,
+                updated_at=now
+            ))
+        hits = sum(1 for profile in profiles if profile is not None)
+        record_cache_lookups("nutrient", "vector", hits, len(profiles) - hits)
+        return profiles
+
+    def _store_profiles(self, profiles: List[NutrientProfile]) -> None:
+        if self.profile_store and profiles:
+            self.profile_store(profiles)
 
     async def _get_llm_estimation(self, food_item: FoodItem) -> NutrientProfile:
         """
         Get nutrient estimation from LLM.
         Uses function calling to get structured output.
         """
-        # Prepare the prompt for nutrient estimation
-        prompt = f"""Estimate the nutrient content per {food_item.unit} for {food_item.description}.
+        # Prepare the prompt for nutrient estimation, per 100 g like the batch path so stored profiles are interchangeable
+        prompt = f"""Estimate the nutrient content per 100 g of {food_item.description}.
         Return the values in the following format:
         - iron_mg: milligrams of iron
         - potassium_mg: milligrams of potassium
@@ -112,28 +317,124 @@ class NutrientEstimationService:
             }
         }
 
-        # Call OpenAI with function calling
-        response = await self.openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            functions=[function_schema],
-            function_call={"name": "get_nutrient_profile"}
+        # Call OpenAI with function calling, cheapest model first; a reply missing
+        # nutrients goes to the next model (rate limited and retried per error class)
+        answer = await self._cascade().run(
+            lambda model: self.openai_client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                functions=[function_schema],
+                function_call={"name": "get_nutrient_profile"}
+            ),
+            lambda response: self._validate_nutrients(
+                json.loads(response.choices[0].message.function_call.arguments)["nutrients"]
+            ),
+            estimated_tokens=estimate_tokens(prompt + json.dumps(function_schema)),
         )
 
-        # Parse the response
-        function_response = json.loads(response.choices[0].message.function_call.arguments)
-        
         # Create and return the nutrient profile
         return NutrientProfile(
             food_name=food_item.description,
-            nutrients=function_response["nutrients"],
+            nutrients=answer.value,
             source="model_estimate",
-            llm_prompt_version="v1.0",
-            estimated_by="gpt-4",
+            llm_prompt_version="v1.1",
+            estimated_by=answer.model,
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
 
+    async def _get_llm_batch_estimation(self, food_items: List[FoodItem]) -> List[Optional[NutrientProfile]]:
+        """
+        Estimate several foods in one function call. Items are numbered from 1
+        and answered under their number, so a missing or malformed answer only
+        loses that item (or sends it on to the next model of the cascade).
+        """
+        def prompt(batch: List[FoodItem]) -> str:
+            listing = "\n".join(f"{number}. {food_item.description}" for number, food_item in enumerate(batch, 1))
+            return f"""Estimate the nutrient content per 100 g for each of these grocery items.
+        Items:
+        {listing}
+        Return each item's values under its number, in the following format:
+        - iron_mg, potassium_mg, magnesium_mg, calcium_mg, zinc_mg: milligrams
+        - vitamin_d_mcg, vitamin_b12_mcg, folate_mcg, selenium_mcg: micrograms
+        - fiber_g: grams"""
+
+        nutrient_schema = {
+            "type": "object",
+            "properties": {nutrient: {"type": "number"} for nutrient in self.required_nutrients},
+            "required": self.required_nutrients
+        }
+
+        def function_schema(batch: List[FoodItem]) -> Dict[str, Any]:
+            numbers = [str(number) for number in range(1, len(batch) + 1)]
+            return {
+                "name": "get_nutrient_profiles",
+                "description": "Get nutrient profiles for numbered food items",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "items": {
+                            "type": "object",
+                            "properties": {number: nutrient_schema for number in numbers},
+                            "required": numbers
+                        }
+                    },
+                    "required": ["items"]
+                }
+            }
+
+        def parse(response, batch: List[FoodItem]) -> List[Optional[Dict[str, float]]]:
+            answers = json.loads(response.choices[0].message.function_call.arguments).get("items", {})
+            values = []
+            for number, food_item in enumerate(batch, 1):
+                try:
+                    values.append(self._validate_nutrients(answers[str(number)]))
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.warning(f"No usable nutrient estimate for {food_item.description}: {str(e)}")
+                    values.append(None)
+            return values
+
+        # Cheapest model first; only the items it gave no usable answer for are
+        # asked again, renumbered, of the next model
+        answers = await self._cascade().run_each(
+            food_items,
+            lambda model, batch: self.openai_client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt(batch)}],
+                functions=[function_schema(batch)],
+                function_call={"name": "get_nutrient_profiles"}
+            ),
+            parse,
+            lambda batch: estimate_tokens(prompt(batch) + json.dumps(function_schema(batch))),
+        )
+
+        now = datetime.utcnow()
+        return [
+            NutrientProfile(
+                food_name=food_item.description,
+                nutrients=answer.value,
+                source="model_estimate",
+                llm_prompt_version="v1.0-batch",
+                estimated_by=answer.model,
+                created_at=now,
+                updated_at=now
+            ) if answer is not None else None
+            for food_item, answer in zip(food_items, answers)
+        ]
+
+    def _validate_nutrients(self, nutrients: Dict[str, Any]) -> Dict[str, float]:
+        """Check a reply has every required nutrient as a non-negative number; raises ValueError if not."""
+        missing = [nutrient for nutrient in self.required_nutrients if nutrient not in nutrients]
+        if missing:
+            raise ValueError(f"Missing nutrients: {', '.join(missing)}")
+        values = {nutrient: float(nutrients[nutrient]) for nutrient in self.required_nutrients}
+        if any(not math.isfinite(value) or value < 0 for value in values.values()):
+            raise ValueError("Nutrient values must be non-negative numbers")
+        return values
+
+    def _cascade(self) -> ModelCascade:
+        return self.cascade or get_model_cascade("nutrients")
+
     def calculate_total_nutrients(self, food_item: FoodItem, profile: NutrientProfile) -> Dict[str, float]:
         """
         Calculate total nutrients based on quantity and unit.
@@ -168,4 +469,21 @@ class NutrientEstimationService:
             # This should be expanded based on your needs
             return quantity * 100  # Default to 100g per piece
         else:
-            raise ValueError(f"Unsupported unit: {unit}") 
\ No newline at end of file
+            raise ValueError(f"Unsupported unit: {unit}")
+
+# One per process, so its nutrient cache is shared by every receipt or bulk chunk a worker handles
+_estimation_service: Optional[NutrientEstimationService] = None
+
+def get_estimation_service() -> NutrientEstimationService:
+    global _estimation_service
+    if _estimation_service is None:
+        from app.services.food_vectors import get_food_vector_index  # deferred: numpy is slow to import
+        from app.services.nutrient_profiles import record_profiles
+        from app.services.user_food_vocabulary import get_user_food_vocabulary
+        _estimation_service = NutrientEstimationService(
+            get_async_openai(),
+            vector_index=get_food_vector_index(),
+            profile_store=record_profiles,
+            user_vocabulary=get_user_food_vocabulary(),
+        )
+    return _estimation_service
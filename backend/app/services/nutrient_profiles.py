@@ -0,0 +1,37 @@
+import logging
+from typing import Iterable
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.crud import nutrient_profile as crud
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+def record_profiles(profiles: Iterable) -> None:
+    """
+    Persist newly estimated nutrient profiles (NutrientEstimationService's
+    pydantic profiles) so the offline similarity index can be built from
+    them. Best-effort: failures are logged and never fail the estimation.
+    """
+    rows = [
+        {
+            "food_name": profile.food_name,
+            "nutrients": profile.nutrients,
+            "source": profile.source,
+            "llm_prompt_version": profile.llm_prompt_version,
+            "estimated_by": profile.estimated_by,
+            "basis": profile.basis,
+        }
+        for profile in profiles
+    ]
+    if not rows:
+        return
+    db = SessionLocal()
+    try:
+        crud.upsert_profiles(db, rows)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Could not store {len(rows)} nutrient profiles: {str(e)}")
+    finally:
+        db.close()
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; callers should shed load (e.g. HTTP 503)."""
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, bounded thread pool so hashing never blocks
+    the event loop or the request threadpool. bcrypt releases the GIL, so
+    threads give real parallelism here.
+
+    At most `max_workers` hashes run at once and at most `max_queue` more
+    wait; beyond that `PasswordHasherBusy` is raised instead of queueing
+    without bound during a login burst.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int = 4, max_queue: int = 64):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password. If it matches but the stored hash uses outdated
+        parameters (e.g. a lower bcrypt cost), also return a fresh hash to store.
+        """
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def stats(self) -> Dict[str, int]:
+        """Queue-depth counters for monitoring."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "in_flight": min(self._pending, self.max_workers),
+                "queued": max(self._pending - self.max_workers, 0),
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+password_hasher = PasswordHasher(
+    pwd_context,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,132 @@
+"""
+Opt-in sampling profiler for API requests and Celery tasks.
+
+A request is profiled when it is sampled (PROFILING_SAMPLE_RATE) or, if
+PROFILING_ALLOW_HEADER is on, when it sends `X-Profile: 1`. A task is
+profiled when sampled or when it was sent with a `profile` header, e.g.
+`task.apply_async(args, headers={"profile": True})`.
+
+Profiles are captured with pyinstrument and kept in Redis for
+PROFILING_RETENTION_SECONDS under the request or task id, so profiles from
+every API process and worker can be listed and fetched from the API.
+"""
+import json
+import logging
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from redis import RedisError
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+if TYPE_CHECKING:
+    from pyinstrument import Profiler
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+_INDEX_KEY = "profiles:index"
+
+@dataclass
+class ProfileSummary:
+    profile_id: str
+    kind: str  # "request" or "task"
+    name: str  # route template or task name
+    duration_ms: float
+    created_at: float
+
+def should_profile(flagged: bool = False) -> bool:
+    if flagged:
+        return True
+    rate = settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+class ProfileStore:
+    """Recent profiles in Redis: one key per profile plus a time-ordered index."""
+
+    def __init__(self, retention_seconds: int, max_profiles: int):
+        self.retention_seconds = retention_seconds
+        self.max_profiles = max_profiles
+
+    def save(self, summary: ProfileSummary, profiler: "Profiler") -> None:
+        try:
+            pipe = get_redis().pipeline()
+            pipe.set(
+                f"profiles:{summary.profile_id}",
+                json.dumps({"summary": asdict(summary), "html": profiler.output_html(), "text": profiler.output_text()}),
+                ex=self.retention_seconds,
+            )
+            pipe.zadd(_INDEX_KEY, {json.dumps(asdict(summary)): summary.created_at})
+            pipe.zremrangebyscore(_INDEX_KEY, 0, time.time() - self.retention_seconds)
+            pipe.zremrangebyrank(_INDEX_KEY, 0, -self.max_profiles - 1)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Could not store profile {summary.profile_id}: {str(e)}")
+
+    def list_recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        entries = get_redis().zrevrange(_INDEX_KEY, 0, limit - 1)
+        return [json.loads(entry) for entry in entries]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        raw = get_redis().get(f"profiles:{profile_id}")
+        return json.loads(raw) if raw is not None else None
+
+profile_store = ProfileStore(
+    retention_seconds=settings.PROFILING_RETENTION_SECONDS,
+    max_profiles=settings.PROFILING_MAX_PROFILES,
+)
+
+def _finish(profiler: "Profiler", profile_id: str, kind: str, name: str, started: float) -> None:
+    profiler.stop()
+    profile_store.save(
+        ProfileSummary(
+            profile_id=profile_id,
+            kind=kind,
+            name=name,
+            duration_ms=round((time.perf_counter() - started) * 1000, 1),
+            created_at=time.time(),
+        ),
+        profiler,
+    )
+
+async def profiling_middleware(request, call_next):
+    flagged = settings.PROFILING_ALLOW_HEADER and request.headers.get(PROFILE_HEADER) == "1"
+    if not should_profile(flagged):
+        return await call_next(request)
+
+    from pyinstrument import Profiler  # only loaded once something is profiled
+
+    profile_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    profiler = Profiler(interval=settings.PROFILING_INTERVAL_SECONDS, async_mode="enabled")
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        route = getattr(request.scope.get("route"), "path", None) or request.url.path
+        _finish(profiler, profile_id, "request", f"{request.method} {route}", started)
+    response.headers[PROFILE_ID_HEADER] = profile_id
+    return response
+
+# Profilers running in this worker process, by task id
+_task_profilers: Dict[str, Any] = {}
+
+def start_task_profile(task_id: str, task) -> None:
+    if not task_id or not should_profile(bool(getattr(task.request, "profile", False))):
+        return
+    from pyinstrument import Profiler
+
+    profiler = Profiler(interval=settings.PROFILING_INTERVAL_SECONDS)
+    profiler.start()
+    _task_profilers[task_id] = (profiler, time.perf_counter(), task.name)
+
+def finish_task_profile(task_id: str) -> None:
+    started = _task_profilers.pop(task_id, None)
+    if started is not None:
+        profiler, started_at, name = started
+        _finish(profiler, task_id, "task", name, started_at)
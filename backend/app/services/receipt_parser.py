@@ -0,0 +1,128 @@
+"""
+Line-item parser for grocery receipt text.
+
+Works on OCR output, one printed line per text line. Item lines end in a
+price; weight and multi-buy lines ("2.31 lb @ 0.79 /lb", "2 @ 1.29") either
+sit on the item line or on their own line next to it. Header, payment and
+total lines are dropped.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+@dataclass
+class ParsedLine:
+    raw_line: str
+    description: str
+    quantity: float = 1.0
+    unit: str = "piece"
+    price: Optional[float] = None
+
+@dataclass
+class ParsedReceipt:
+    store_name: Optional[str] = None
+    lines: List[ParsedLine] = field(default_factory=list)
+
+# Lines that carry a price but are not purchased items
+_SKIP_WORDS = re.compile(
+    r"\b(SUB\s*TOTAL|TOTAL|TAX|BALANCE|CHANGE|CASH|VISA|MASTERCARD|MASTER CARD|AMEX|DISCOVER|DEBIT|CREDIT|"
+    r"TEND(?:ER(?:ED)?)?|PAYMENT|SAVINGS|YOU SAVED|COUPON|DISCOUNT|REWARDS?|POINTS|BOTTLE DEPOSIT|"
+    r"ITEMS SOLD|AUTH|APPROVED|REFUND)\b",
+    re.IGNORECASE,
+)
+# Trailing price, optionally followed by a tax flag ("3.99 F", "1.82 N")
+_PRICE = re.compile(r"(-?)\$?\s*(\d{1,5}[.,]\d{2})(-?)\s*[A-Z*]{0,2}\s*$", re.IGNORECASE)
+_WEIGHT = re.compile(r"(\d+(?:[.,]\d+)?)\s*(LBS?|OZ|KG|G)\b\.?", re.IGNORECASE)
+# "2 @ 1.29", "2 X 1.29", "@ 0.79/LB"
+_MULTI_BUY = re.compile(r"^(\d+)\s*(?:@|X)\s*\$?\d+(?:[.,]\d+)?(?:\s*/\s*[A-Z]+)?", re.IGNORECASE)
+_UNIT_PRICE = re.compile(r"(?:@|X)\s*\$?\d+(?:[.,]\d+)?(?:\s*/\s*[A-Z]+)?", re.IGNORECASE)
+# Barcodes and PLU codes printed around the description
+_ITEM_CODE = re.compile(r"(^|\s)\d{4,}(?=\s|$)")
+
+_UNITS = {"lb": "lb", "lbs": "lb", "oz": "oz", "kg": "kg", "g": "g"}
+
+def _number(text: str) -> float:
+    return float(text.replace(",", "."))
+
+def _split_price(line: str):
+    """Return (text without price, price), or (line, None) when the line has no price."""
+    match = _PRICE.search(line)
+    if not match or not line[:match.start()].strip():
+        return line, None
+    price = _number(match.group(2))
+    if match.group(1) or match.group(3):
+        price = -price
+    return line[:match.start()].rstrip(), price
+
+def _apply_quantity(text: str, target: ParsedLine) -> str:
+    """Read a weight or multi-buy count from `text` into `target`; return what is left of `text`."""
+    weight = _WEIGHT.search(text)
+    if weight:
+        target.quantity = _number(weight.group(1))
+        target.unit = _UNITS[weight.group(2).lower()]
+        text = text[:weight.start()] + text[weight.end():]
+    else:
+        multi_buy = _MULTI_BUY.match(text.strip())
+        if multi_buy:
+            target.quantity = float(multi_buy.group(1))
+            target.unit = "piece"
+            text = text.strip()[multi_buy.end():]
+    return _UNIT_PRICE.sub(" ", text)
+
+def _clean_description(text: str) -> str:
+    text = _ITEM_CODE.sub(" ", text)
+    return re.sub(r"\s+", " ", text).strip(" -*#:")
+
+def _is_quantity_line(text: str) -> bool:
+    stripped = _UNIT_PRICE.sub(" ", _WEIGHT.sub(" ", text)).strip()
+    return bool(_WEIGHT.search(text) or _MULTI_BUY.match(text.strip())) and not re.search(r"[A-Z]{3,}", stripped, re.IGNORECASE)
+
+def parse_receipt_text(text: str) -> ParsedReceipt:
+    """Parse OCR text of a grocery receipt into purchased line items, in printed order."""
+    receipt = ParsedReceipt()
+    pending_quantity: Optional[str] = None  # multi-buy line printed above its item
+    unpriced: Optional[str] = None  # item name printed above its weight/price line
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if _SKIP_WORDS.search(line):
+            pending_quantity = unpriced = None
+            continue
+
+        body, price = _split_price(line)
+        if not _is_quantity_line(body) and _is_quantity_line(line):
+            # "2 X 0.99": the trailing number is the unit price, not a line total
+            body, price = line, None
+        if _is_quantity_line(body):
+            if price is not None and unpriced is not None:
+                # "BANANAS" then "2.31 lb @ 0.79 /lb  1.82"
+                item = ParsedLine(raw_line=f"{unpriced} {line}", description=_clean_description(unpriced), price=price)
+                _apply_quantity(body, item)
+                receipt.lines.append(item)
+                unpriced = None
+            elif price is None and receipt.lines and receipt.lines[-1].unit == "piece" and receipt.lines[-1].quantity == 1.0:
+                # Quantity printed under its already priced item
+                _apply_quantity(body, receipt.lines[-1])
+            else:
+                pending_quantity = body
+            continue
+
+        if price is None:
+            if receipt.store_name is None and not receipt.lines:
+                receipt.store_name = _clean_description(line) or None
+            else:
+                unpriced = line
+            continue
+        unpriced = None
+        if price < 0:
+            continue  # discounts and voids
+
+        item = ParsedLine(raw_line=line, description="", price=price)
+        if pending_quantity is not None:
+            _apply_quantity(pending_quantity, item)
+            pending_quantity = None
+        item.description = _clean_description(_apply_quantity(body, item))
+        if item.description:
+            receipt.lines.append(item)
+    return receipt
@@ -0,0 +1,203 @@
+import base64
+import logging
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.openai_client import get_async_openai
+from app.core.tracing import tracer
+from app.crud import receipt as crud_receipt
+from app.models.receipt import Receipt
+from app.schemas.receipt import ReceiptCreate
+from app.services.food_image_service import FoodImageService
+from app.services.llm_rate_limiter import estimate_tokens
+from app.services.llm_resilience import get_llm_caller
+from app.services.nutrient_estimation import FoodItem, NutrientEstimationService, get_estimation_service
+from app.services.receipt_parser import parse_receipt_text
+from app.services.sku_matcher import SkuMatcher, get_sku_matcher
+
+logger = logging.getLogger(__name__)
+
+class ReceiptService:
+    def __init__(
+        self,
+        db: Session,
+        estimation_service: Optional[NutrientEstimationService] = None,
+        matcher: Optional[SkuMatcher] = None,
+    ):
+        self.db = db
+        self.estimation_service = estimation_service
+        self.matcher = matcher
+
+    def create_from_text(self, user_id: UUID, receipt_in: ReceiptCreate) -> Receipt:
+        """Store a receipt sent as on-device OCR text; parsing happens in the worker."""
+        return crud_receipt.create_receipt(
+            self.db,
+            user_id=user_id,
+            source="ocr_text",
+            ocr_text=receipt_in.ocr_text,
+            store_name=receipt_in.store_name,
+            purchased_at=receipt_in.purchased_at,
+        )
+
+    async def create_from_image(self, user_id: UUID, file: UploadFile) -> Receipt:
+        """Store a receipt photo for cloud OCR; uploads are validated like food images."""
+        image_service = FoodImageService(self.db)
+        is_valid, error_msg = await image_service.validate_image(file)
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=error_msg)
+        image_path = await image_service.save_image(file, user_id)
+        return crud_receipt.create_receipt(self.db, user_id=user_id, source="image", image_url=image_path)
+
+    async def transcribe_receipt_image(self, image_path: str) -> str:
+        """Cloud OCR: have the vision model transcribe the receipt's printed lines."""
+        with open(image_path, "rb") as image_file:
+            base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+
+        prompt = "Transcribe this grocery receipt exactly as printed, one receipt line per line, including prices. Return only the transcribed text."
+        max_tokens = 1500
+
+        response = await get_llm_caller("vision").call(
+            lambda: get_async_openai().chat.completions.create(
+                model="gpt-4.1-nano",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": prompt},
+                            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
+                        ]
+                    }
+                ],
+                max_tokens=max_tokens
+            ),
+            estimated_tokens=estimate_tokens(prompt, max_tokens, image_count=1),
+            model="gpt-4.1-nano",
+        )
+        return response.choices[0].message.content or ""
+
+    @tracer.start_as_current_span("receipt.process")
+    async def process_receipt(
+        self, receipt_id: str, on_progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse a receipt into line items, match them to foods and estimate all
+        of them as one batch.
+
+        `on_progress(stage, processed, total)` is called when parsing starts and
+        each time an estimation batch finishes; the processed count is also
+        stored on the receipt so it can be polled. Safe to re-run: a transcribed
+        image is kept as the receipt's OCR text and items are replaced, not appended.
+        """
+        receipt = crud_receipt.get_receipt(self.db, receipt_id)
+        if receipt is None:
+            raise HTTPException(status_code=404, detail="Receipt not found")
+        if receipt.status == "processed":
+            return self._result(receipt)
+
+        def report(stage: str, processed: int, total: int) -> None:
+            if on_progress:
+                on_progress(stage, processed, total)
+
+        try:
+            with tracer.start_as_current_span("receipt.parse") as span:
+                receipt.status = "parsing"
+                self.db.commit()
+                report("parsing", 0, receipt.item_count)
+                if receipt.ocr_text is None:
+                    receipt.ocr_text = await self.transcribe_receipt_image(receipt.image_url)
+                    self.db.commit()
+                parsed = parse_receipt_text(receipt.ocr_text)
+                lines = parsed.lines[:settings.RECEIPT_MAX_LINES]
+                span.set_attribute("line_count", len(lines))
+
+            receipt.store_name = receipt.store_name or parsed.store_name
+            receipt.item_count = len(lines)
+            receipt.processed_item_count = 0
+            self.db.commit()
+
+            # Abbreviated lines -> catalog foods, so equal foods share one estimate
+            matcher = self.matcher or get_sku_matcher(self.db)
+            with tracer.start_as_current_span("receipt.match") as span:
+                matches = await matcher.match_lines(self.db, receipt.store_name, [line.description for line in lines])
+                span.set_attribute("matched_count", sum(1 for match in matches if match.matched))
+
+            receipt.status = "estimating"
+            self.db.commit()
+
+            food_items = [
+                FoodItem(
+                    description=match.description if match.matched else line.description,
+                    quantity=line.quantity,
+                    unit=line.unit,
+                    confidence=1.0,
+                    is_estimated=False
+                )
+                for line, match in zip(lines, matches)
+            ]
+
+            def estimated(processed: int) -> None:
+                crud_receipt.update_progress(self.db, receipt, processed)
+                report("estimating", processed, len(lines))
+
+            estimation_service = self.estimation_service or get_estimation_service()
+            with tracer.start_as_current_span("receipt.estimate") as span:
+                span.set_attribute("line_count", len(lines))
+                results = await estimation_service.estimate_nutrients_batch(
+                    food_items,
+                    batch_size=settings.RECEIPT_ESTIMATION_BATCH_SIZE,
+                    on_progress=estimated,
+                    user_id=receipt.user_id,
+                )
+
+            items: List[Dict[str, Any]] = []
+            total_nutrients: Dict[str, float] = {}
+            for line, match, (food_item, profile) in zip(lines, matches, results):
+                nutrients = None
+                if profile is not None:
+                    nutrients = {
+                        name: round(value, 3)
+                        for name, value in estimation_service.calculate_total_nutrients(food_item, profile).items()
+                    }
+                    for name, value in nutrients.items():
+                        total_nutrients[name] = round(total_nutrients.get(name, 0.0) + value, 3)
+                items.append({
+                    "raw_line": line.raw_line,
+                    "description": food_item.description,
+                    "fdc_id": match.fdc_id,
+                    "quantity": line.quantity,
+                    "unit": line.unit,
+                    "price": line.price,
+                    "nutrients": nutrients,
+                })
+
+            receipt = crud_receipt.replace_receipt_items(self.db, receipt, items, total_nutrients)
+            return self._result(receipt)
+
+        except Exception as e:
+            self.db.rollback()
+            crud_receipt.mark_failed(self.db, receipt, str(e))
+            if isinstance(e, HTTPException):
+                raise
+            raise HTTPException(status_code=500, detail=f"Error processing receipt: {str(e)}")
+
+    def _result(self, receipt: Receipt) -> Dict[str, Any]:
+        return {
+            "receipt_id": str(receipt.id),
+            "status": receipt.status,
+            "item_count": receipt.item_count,
+            "estimated_item_count": sum(1 for item in receipt.items if item.nutrients is not None),
+            "total_nutrients": receipt.total_nutrients,
+        }
+
+    def get_receipt(self, receipt_id: UUID, user_id: UUID) -> Receipt:
+        receipt = crud_receipt.get_receipt(self.db, receipt_id, user_id=user_id)
+        if receipt is None:
+            raise HTTPException(status_code=404, detail="Receipt not found")
+        return receipt
+
+    def get_user_receipts(self, user_id: UUID, skip: int = 0, limit: int = 50) -> List[Receipt]:
+        return crud_receipt.get_user_receipts(self.db, user_id, skip, limit)
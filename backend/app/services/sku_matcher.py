@@ -0,0 +1,370 @@
+"""
+Receipt line -> food matcher.
+
+Receipt lines are abbreviated ("ORG BNNA"), so a line is first expanded with
+an abbreviation dictionary: seeded store abbreviations, abbreviations learned
+from lines that were resolved before, and a consonant-skeleton guess against
+the index vocabulary ("SPNCH" -> spinach). The expanded text is scored with
+BM25 against an in-memory inverted index over food descriptions.
+
+Resolved lines are remembered per store (sku_mappings), so a SKU seen before
+is a cache lookup. Only lines whose best candidate is not a clear winner are
+escalated to the LLM, in one batched call per receipt.
+"""
+import csv
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from heapq import nlargest
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.core.openai_client import get_async_openai
+from app.crud import sku_mapping as crud_sku_mapping
+from app.services.llm_rate_limiter import estimate_tokens
+from app.services.llm_resilience import get_llm_caller
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "grocery_foods.csv")
+
+# Common grocery receipt abbreviations; learned ones are added at runtime
+SEED_ABBREVIATIONS = {
+    "org": "organic", "orgnc": "organic", "bnna": "banana", "bnns": "banana", "chkn": "chicken",
+    "chk": "chicken", "brst": "breast", "bnls": "boneless", "sknls": "skinless", "grk": "greek",
+    "ygrt": "yogurt", "yog": "yogurt", "yogrt": "yogurt", "whl": "whole", "mlk": "milk",
+    "spnch": "spinach", "brcli": "broccoli", "brocc": "broccoli", "tom": "tomato", "tmto": "tomato",
+    "pot": "potato", "swt": "sweet", "grn": "green", "rd": "red", "ylw": "yellow", "wht": "white",
+    "ww": "whole wheat", "bf": "beef", "grnd": "ground", "trky": "turkey",
+    "slmn": "salmon", "chs": "cheese", "chdr": "cheddar", "mozz": "mozzarella", "oj": "orange juice",
+    "pb": "peanut butter", "evoo": "olive oil extra virgin", "strwbry": "strawberry", "strbry": "strawberry",
+    "blubry": "blueberry", "rasp": "raspberry", "avo": "avocado", "avoc": "avocado", "lttc": "lettuce",
+    "rmn": "romaine", "crrt": "carrot", "crts": "carrot", "onn": "onion", "grlc": "garlic", "bkn": "bacon",
+    "sdl": "salad", "frz": "frozen", "lf": "lowfat", "ff": "nonfat", "rf": "reduced fat", "pnt": "peanut",
+    "almd": "almond", "alm": "almond", "bev": "beverage", "jce": "juice", "brd": "bread",
+    "lg": "large", "xl": "large", "dz": "", "ct": "", "pk": "", "ea": "", "gal": "", "qt": "",
+    "lb": "", "lbs": "", "oz": "", "kg": "",
+}
+
+_WORD = re.compile(r"[a-z]+")
+_STOP_WORDS = {"and", "or", "with", "without", "of", "the", "a", "in", "for", "to"}
+
+def _stem(word: str) -> str:
+    """Crude plural folding, enough to match "bananas" with "banana"."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("oes", "ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(word) for word in _WORD.findall(text.lower()) if word not in _STOP_WORDS]
+
+def _skeleton(word: str) -> str:
+    """First letter plus the remaining consonants, without repeats: banana -> bnn, bnna -> bnn."""
+    skeleton = word[:1]
+    for char in word[1:]:
+        if char not in "aeiou" and char != skeleton[-1]:
+            skeleton += char
+    return skeleton
+
+def sku_key(text: str) -> str:
+    return re.sub(r"\s+", " ", text.upper()).strip()
+
+def store_key(store_name: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", (store_name or "").lower()).strip()
+
+@dataclass
+class Food:
+    description: str
+    fdc_id: Optional[str] = None
+
+@dataclass
+class Match:
+    sku: str
+    description: str  # matched food, or the expanded line text when unmatched
+    fdc_id: Optional[str] = None
+    source: str = "unmatched"  # sku_cache, index, llm or unmatched
+    score: float = 0.0
+    candidates: List[Food] = field(default_factory=list)
+
+    @property
+    def matched(self) -> bool:
+        return self.source != "unmatched"
+
+class InvertedIndex:
+    """BM25 over tokenized food descriptions."""
+
+    def __init__(self, documents: List[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        for doc_id, document in enumerate(documents):
+            tokens = tokenize(document)
+            self.doc_lengths.append(len(tokens))
+            for token, count in Counter(tokens).items():
+                self.postings[token].append((doc_id, count))
+        count = len(documents)
+        self.avg_length = sum(self.doc_lengths) / count if count else 0.0
+        self.idf = {
+            token: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self.postings.items()
+        }
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.postings
+
+    @property
+    def vocabulary(self) -> Iterable[str]:
+        return self.postings.keys()
+
+    def document_frequency(self, token: str) -> int:
+        return len(self.postings.get(token, ()))
+
+    def search(self, tokens: List[str], limit: int = 5) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(tokens):
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[token]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+class AbbreviationDictionary:
+    """Seeded and learned abbreviation expansions, with a skeleton guess for unknown tokens."""
+
+    def __init__(self, index: InvertedIndex, seed: Optional[Dict[str, str]] = None):
+        self.index = index
+        self.expansions: Dict[str, str] = dict(SEED_ABBREVIATIONS if seed is None else seed)
+        # Most common words first, so a guess prefers them
+        self._by_skeleton: Dict[str, List[str]] = defaultdict(list)
+        for word in sorted(index.vocabulary, key=lambda word: -index.document_frequency(word)):
+            self._by_skeleton[_skeleton(word)].append(word)
+
+    def expand_word(self, word: str) -> str:
+        if word in self.expansions:
+            return self.expansions[word]
+        stemmed = _stem(word)
+        if stemmed in self.index or len(word) < 3:
+            return stemmed
+        # An abbreviation keeps the word's letters in order: "bnna" -> banana, but "bar" is not beer
+        for candidate in self._by_skeleton.get(_skeleton(word), ()):
+            if _is_subsequence(word, candidate):
+                return candidate
+        return stemmed
+
+    def expand(self, text: str) -> List[str]:
+        words = [self.expand_word(word) for word in _WORD.findall(text.lower())]
+        return tokenize(" ".join(words))
+
+    def learn(self, sku: str, description: str) -> None:
+        """
+        Learn abbreviations from a resolved line: each unknown receipt token is
+        paired with the description word it abbreviates (same first letter,
+        its letters appearing in order).
+        """
+        words = [word for word in _WORD.findall(description.lower()) if word not in _STOP_WORDS]
+        for token in _WORD.findall(sku.lower()):
+            if token in self.expansions or _stem(token) in self.index or len(token) < 2:
+                continue
+            for word in words:
+                if word.startswith(token[0]) and _is_subsequence(token, word) and word != token:
+                    self.expansions[token] = _stem(word)
+                    break
+
+def _is_subsequence(short: str, long: str) -> bool:
+    remaining = iter(long)
+    return all(char in remaining for char in short)
+
+def load_catalog(path: Optional[str] = None) -> List[Food]:
+    """
+    Foods to match against: a FoodData Central `food.csv` export (fdc_id and
+    description columns) from FDC_FOODS_PATH, or the bundled grocery list.
+    """
+    path = path or settings.FDC_FOODS_PATH or DEFAULT_CATALOG_PATH
+    with open(path, newline="") as f:
+        return [
+            Food(description=row["description"], fdc_id=row.get("fdc_id") or None)
+            for row in csv.DictReader(f)
+            if row.get("description")
+        ]
+
+class SkuMatcher:
+    def __init__(self, foods: List[Food], openai_client=None, margin: Optional[float] = None):
+        self.foods = foods
+        self.openai_client = openai_client
+        self.margin = settings.SKU_MATCH_MARGIN if margin is None else margin
+        self.index = InvertedIndex([food.description for food in foods])
+        self.abbreviations = AbbreviationDictionary(self.index)
+        self._mappings = TTLCache(maxsize=settings.SKU_CACHE_MAXSIZE, ttl=settings.SKU_CACHE_TTL_SECONDS)
+
+    def learn_from_mappings(self, db: Session) -> None:
+        """Rebuild learned abbreviations from every resolved line stored so far."""
+        for mapping in crud_sku_mapping.get_all_mappings(db):
+            self.abbreviations.learn(mapping.sku, mapping.description)
+
+    def search(self, text: str, limit: int = 5) -> Tuple[List[Tuple[Food, float]], bool]:
+        """Candidates for `text`, best first, and whether the best one is a clear winner."""
+        tokens = self.abbreviations.expand(text)
+        hits = self.index.search(tokens, limit)
+        candidates = [(self.foods[doc_id], score) for doc_id, score in hits]
+        if not candidates:
+            return [], False
+        known = {token for token in tokens if token in self.index}
+        best_tokens = set(tokenize(candidates[0][0].description))
+        covers_query = known <= best_tokens
+        clear_lead = len(candidates) == 1 or candidates[0][1] >= candidates[1][1] * (1 + self.margin)
+        return candidates, covers_query and clear_lead
+
+    async def match_lines(self, db: Session, store_name: Optional[str], lines: List[str]) -> List[Match]:
+        """
+        Resolve receipt lines to foods: per-store SKU cache, then the index,
+        then one LLM call for the ambiguous rest. New resolutions are stored.
+        """
+        store = store_key(store_name)
+        skus = [sku_key(line) for line in lines]
+        resolved: Dict[str, Match] = {}
+
+        missing = []
+        for sku in dict.fromkeys(skus):
+            cached = self._mappings.get((store, sku))
+            record_cache_lookup("sku", "memory", cached is not None)
+            if cached is not None:
+                resolved[sku] = cached
+            else:
+                missing.append(sku)
+        if missing:
+            try:
+                for mapping in crud_sku_mapping.get_mappings(db, store, missing):
+                    match = Match(mapping.sku, mapping.description, mapping.fdc_id, source="sku_cache")
+                    self._mappings.set((store, mapping.sku), match)
+                    resolved[mapping.sku] = match
+            except SQLAlchemyError as e:
+                db.rollback()
+                logger.warning(f"Could not read SKU mappings: {str(e)}")
+            for sku in missing:
+                record_cache_lookup("sku", "db", sku in resolved)
+
+        new_matches: List[Match] = []
+        ambiguous: List[Match] = []
+        for sku in missing:
+            if sku in resolved:
+                continue
+            candidates, confident = self.search(sku)
+            if confident:
+                food, score = candidates[0]
+                match = Match(sku, food.description, food.fdc_id, source="index", score=score)
+                new_matches.append(match)
+            else:
+                match = Match(sku, " ".join(self.abbreviations.expand(sku)) or sku.lower(),
+                              candidates=[food for food, _ in candidates])
+                if candidates:
+                    ambiguous.append(match)
+            resolved[sku] = match
+
+        if ambiguous and self.openai_client is not None:
+            new_matches.extend(await self._resolve_with_llm(ambiguous))
+
+        self._remember(db, store, new_matches)
+        return [resolved[sku] for sku in skus]
+
+    async def _resolve_with_llm(self, matches: List[Match]) -> List[Match]:
+        """Let the LLM pick among each ambiguous line's candidates, all lines in one call."""
+        listing = "\n".join(
+            f"{number}. {match.sku}\n" + "\n".join(
+                f"   {choice}) {food.description}" for choice, food in enumerate(match.candidates, 1)
+            )
+            for number, match in enumerate(matches, 1)
+        )
+        prompt = f"""These are abbreviated grocery receipt lines, each followed by candidate foods.
+        For each line, answer with the number of the candidate it refers to, or 0 if none fits.
+        {listing}"""
+        numbers = [str(number) for number in range(1, len(matches) + 1)]
+        function_schema = {
+            "name": "choose_foods",
+            "description": "Choose the matching food for each receipt line",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "choices": {
+                        "type": "object",
+                        "properties": {number: {"type": "integer"} for number in numbers},
+                        "required": numbers
+                    }
+                },
+                "required": ["choices"]
+            }
+        }
+        try:
+            response = await get_llm_caller("matching").call(
+                lambda: self.openai_client.chat.completions.create(
+                    model="gpt-4.1-nano",
+                    messages=[{"role": "user", "content": prompt}],
+                    functions=[function_schema],
+                    function_call={"name": "choose_foods"}
+                ),
+                estimated_tokens=estimate_tokens(prompt + json.dumps(function_schema)),
+                model="gpt-4.1-nano",
+            )
+            choices = json.loads(response.choices[0].message.function_call.arguments).get("choices", {})
+        except Exception as e:
+            logger.warning(f"Could not resolve {len(matches)} receipt lines with the LLM: {str(e)}")
+            return []
+
+        resolved = []
+        for number, match in zip(numbers, matches):
+            choice = choices.get(number)
+            if isinstance(choice, int) and 1 <= choice <= len(match.candidates):
+                food = match.candidates[choice - 1]
+                match.description, match.fdc_id, match.source = food.description, food.fdc_id, "llm"
+                self.abbreviations.learn(match.sku, food.description)
+                resolved.append(match)
+        return resolved
+
+    def _remember(self, db: Session, store: str, matches: List[Match]) -> None:
+        if not matches:
+            return
+        for match in matches:
+            self._mappings.set((store, match.sku), Match(match.sku, match.description, match.fdc_id, "sku_cache"))
+        try:
+            crud_sku_mapping.upsert_mappings(db, [
+                {"store": store, "sku": match.sku, "fdc_id": match.fdc_id,
+                 "description": match.description, "source": match.source}
+                for match in matches
+            ])
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Could not store SKU mappings: {str(e)}")
+
+_matcher: Optional[SkuMatcher] = None
+_matcher_lock = threading.Lock()
+
+def get_sku_matcher(db: Optional[Session] = None) -> SkuMatcher:
+    """The process-wide matcher; the index is built on first use."""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            matcher = SkuMatcher(load_catalog(), get_async_openai())
+            if db is not None:
+                try:
+                    matcher.learn_from_mappings(db)
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    logger.warning(f"Could not load learned abbreviations: {str(e)}")
+            _matcher = matcher
+    return _matcher
@@ -0,0 +1,96 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+from redis import RedisError
+
+from app.core.redis_client import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Stage transitions published by the pipeline, in order
+QUEUED = "queued"
+RECOGNIZING = "recognizing"
+PARSING = "parsing"  # receipts: OCR text to line items
+ESTIMATING = "estimating"
+DONE = "done"
+FAILED = "failed"
+TERMINAL_STAGES = {DONE, FAILED}
+
+# Latest event per task is kept briefly so late subscribers see the current stage
+LAST_EVENT_TTL_SECONDS = 3600
+
+def user_channel(user_id: Any) -> str:
+    return f"task-events:user:{user_id}"
+
+def task_channel(task_id: str) -> str:
+    return f"task-events:task:{task_id}"
+
+def _last_event_key(task_id: str) -> str:
+    return f"task-events:last:{task_id}"
+
+def publish_task_event(task_id: Optional[str], stage: str, user_id: Any = None, **data: Any) -> None:
+    """
+    Publish a task stage transition to the task's channel and, if known, the
+    owning user's channel. Publishing is best-effort: a Redis outage must
+    never fail the task itself.
+    """
+    if not task_id:
+        # Task invoked directly (not through a worker), nobody can be listening
+        return
+    event = json.dumps({
+        "task_id": task_id,
+        "stage": stage,
+        "timestamp": datetime.utcnow().isoformat(),
+        **data,
+    }, default=str)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.set(_last_event_key(task_id), event, ex=LAST_EVENT_TTL_SECONDS)
+        pipe.publish(task_channel(task_id), event)
+        if user_id is not None:
+            pipe.publish(user_channel(user_id), event)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not publish {stage} event for task {task_id}: {str(e)}")
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Format an event as a Server-Sent Events message."""
+    return f"event: task\nid: {event['task_id']}:{event['stage']}\ndata: {json.dumps(event)}\n\n"
+
+async def stream_events(
+    channels: Iterable[str],
+    task_id: Optional[str] = None,
+    heartbeat_seconds: float = 15.0,
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Yield events published on `channels` as dicts, or None every
+    `heartbeat_seconds` of silence so callers can keep the connection alive.
+    When `task_id` is given, the task's latest event is replayed first and
+    the stream ends after a terminal stage.
+    """
+    client = get_async_redis()
+    pubsub = client.pubsub()
+    await pubsub.subscribe(*channels)
+    try:
+        if task_id is not None:
+            # Read only after subscribing, so no transition can fall in between
+            raw = await client.get(_last_event_key(task_id))
+            if raw is not None:
+                event = json.loads(raw)
+                yield event
+                if event["stage"] in TERMINAL_STAGES:
+                    return
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat_seconds)
+            if message is None:
+                yield None
+                continue
+            event = json.loads(message["data"])
+            yield event
+            if task_id is not None and event["stage"] in TERMINAL_STAGES:
+                return
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
@@ -0,0 +1,78 @@
+import logging
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.crud import task_result as crud
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+def _as_uuid(value: Any) -> Optional[UUID]:
+    if value is None or isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return None
+
+def record_tasks_queued(
+    db: Session, task_name: str, user_id: Any, task_ids: List[str], food_image_ids: Optional[List[Any]] = None
+) -> None:
+    """
+    Persist who owns just-enqueued tasks, so their event streams can be
+    authorized before a worker starts them. Best-effort, like
+    `record_task_started`: the worker records the owner again when it starts.
+    """
+    rows = [{"task_id": task_id, "task_name": task_name, "user_id": _as_uuid(user_id)} for task_id in task_ids]
+    for row, food_image_id in zip(rows, food_image_ids or []):
+        row["food_image_id"] = _as_uuid(food_image_id)
+    try:
+        crud.mark_tasks_queued(db, rows)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Could not record owner of queued tasks {task_ids}: {str(e)}")
+
+def is_task_owner(db: Session, task_id: str, user_id: Any) -> bool:
+    """Whether `task_id` was enqueued for `user_id`; False for unknown tasks."""
+    db_obj = crud.get_task_result(db, task_id)
+    return db_obj is not None and db_obj.user_id is not None and str(db_obj.user_id) == str(user_id)
+
+def record_task_started(
+    task_id: Optional[str], task_name: str, user_id: Any = None, food_image_id: Any = None
+) -> None:
+    """
+    Persist that a task run started. Best-effort: bookkeeping failures are
+    logged and never fail the task. Direct (non-worker) calls have no task
+    ID and are not recorded.
+    """
+    if not task_id:
+        return
+    db = SessionLocal()
+    try:
+        crud.mark_task_started(
+            db, task_id=task_id, task_name=task_name,
+            user_id=_as_uuid(user_id), food_image_id=_as_uuid(food_image_id)
+        )
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Could not record start of task {task_id}: {str(e)}")
+    finally:
+        db.close()
+
+def record_task_finished(
+    task_id: Optional[str], status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None
+) -> None:
+    """Persist a task run's outcome and timings. Best-effort, like `record_task_started`."""
+    if not task_id:
+        return
+    db = SessionLocal()
+    try:
+        crud.mark_task_finished(db, task_id=task_id, status=status, result=result, error=error)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Could not record result of task {task_id}: {str(e)}")
+    finally:
+        db.close()
@@ -0,0 +1,104 @@
+import logging
+from typing import Any, Dict, List
+
+from celery import states
+from celery.backends.base import BaseKeyValueStoreBackend
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.cache import TTLCache
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.crud import task_result as crud
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Terminal states never change, so they can be served from memory; pending
+# and running tasks are always read from the result backend.
+_terminal_cache = TTLCache(
+    maxsize=settings.TASK_STATUS_CACHE_MAXSIZE,
+    ttl=settings.TASK_STATUS_CACHE_TTL_SECONDS,
+)
+
+def format_task_status(task_id: str, state: str, result: Any) -> Dict[str, Any]:
+    """Map a Celery state/result pair onto the API's task status shape."""
+    if state == states.SUCCESS:
+        return {"task_id": task_id, "status": "completed", "result": result}
+    if state in states.READY_STATES:
+        return {"task_id": task_id, "status": "failed", "error": str(result)}
+    return {"task_id": task_id, "status": "processing"}
+
+def get_persisted_task_statuses(task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up statuses in the durable task_results table, for tasks whose
+    Redis status has expired (Celery reports those as PENDING).
+    Only tasks with a stored row are included in the result.
+    """
+    if not task_ids:
+        return {}
+    db = SessionLocal()
+    try:
+        rows = crud.get_task_results(db, task_ids)
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not read persisted task results: {str(e)}")
+        return {}
+    finally:
+        db.close()
+    return {
+        row.task_id: format_task_status(
+            row.task_id, row.status, row.result if row.status == states.SUCCESS else row.error
+        )
+        for row in rows
+    }
+
+def _fetch_metas(task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Read task metadata for many tasks. Key-value backends (Redis) are read
+    with a single MGET; other backends fall back to one lookup per task.
+    """
+    backend = celery_app.backend
+    if isinstance(backend, BaseKeyValueStoreBackend):
+        keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+        try:
+            values = backend.mget(keys)
+        except NotImplementedError:
+            pass
+        else:
+            if hasattr(values, "items"):
+                # Some clients (e.g. memcached) return a key -> value mapping
+                values = [values.get(key) for key in keys]
+            return {
+                task_id: backend.decode_result(value) if value else {"status": states.PENDING, "result": None}
+                for task_id, value in zip(task_ids, values)
+            }
+    metas = {}
+    for task_id in task_ids:
+        task = celery_app.AsyncResult(task_id)
+        metas[task_id] = {"status": task.state, "result": task.result}
+    return metas
+
+def get_task_statuses(task_ids: List[str]) -> List[Dict[str, Any]]:
+    """Get the status of many tasks at once, in the order requested."""
+    statuses: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for task_id in dict.fromkeys(task_ids):
+        cached = _terminal_cache.get(task_id)
+        record_cache_lookup("task_status", "memory", cached is not None)
+        if cached is not None:
+            statuses[task_id] = cached
+        else:
+            missing.append(task_id)
+
+    if missing:
+        pending = []
+        for task_id, meta in _fetch_metas(missing).items():
+            status = format_task_status(task_id, meta["status"], meta["result"])
+            statuses[task_id] = status
+            if meta["status"] in states.READY_STATES:
+                _terminal_cache.set(task_id, status)
+            elif meta["status"] == states.PENDING:
+                pending.append(task_id)
+        statuses.update(get_persisted_task_statuses(pending))
+
+    return [statuses[task_id] for task_id in task_ids]
@@ -0,0 +1,177 @@
+"""
+Per-user food vocabulary: the foods a user habitually eats, with their
+resolved nutrient profile.
+
+Most users eat the same few dozen foods, so their descriptions repeat. Each
+user's vocabulary is loaded once from their recent recognized food items
+(ranked by how often they appear, with meals saved to the food history
+counting double) joined to the stored nutrient profiles, then kept up to
+date as new estimates resolve. It is consulted before the global caches.
+
+Vocabularies are bounded per user (least recently used foods are evicted)
+and held for at most USER_VOCAB_TTL_SECONDS for USER_VOCAB_MAX_USERS users
+per process, so they also pick up profiles stored by other workers.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.crud.food_image import get_recent_user_food_items
+from app.crud.nutrient_profile import get_profiles
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Recent food items read per user when loading a vocabulary
+LOAD_ITEM_LIMIT = 2000
+
+@dataclass
+class VocabularyEntry:
+    description: str
+    nutrients: Dict[str, float]
+    llm_prompt_version: str
+    estimated_by: str
+    uses: int = 1
+
+class Vocabulary:
+    """One user's foods, keyed by lowercased description, in LRU order."""
+
+    def __init__(self, max_foods: int):
+        self.max_foods = max_foods
+        self._entries: "OrderedDict[str, VocabularyEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, description: str) -> Optional[VocabularyEntry]:
+        key = description.lower()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.uses += 1
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, entry: VocabularyEntry) -> None:
+        key = entry.description.lower()
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                entry.uses = existing.uses + 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_foods:
+                self._entries.popitem(last=False)
+
+    def descriptions(self, limit: Optional[int] = None) -> List[str]:
+        """Descriptions by how often they were used, most used first."""
+        with self._lock:
+            ranked = sorted(self._entries.values(), key=lambda entry: entry.uses, reverse=True)
+        return [entry.description for entry in ranked[:limit]]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+def load_user_vocabulary(user_id: Any, max_foods: int, db: Optional[Session] = None) -> List[VocabularyEntry]:
+    """
+    Build a user's vocabulary from their recognized food items and the stored
+    profiles of those foods. Foods without a stored profile are left out;
+    they join the vocabulary once they are estimated.
+    """
+    owns_session = db is None
+    db = db or SessionLocal()
+    try:
+        rows = get_recent_user_food_items(db, user_id, LOAD_ITEM_LIMIT)
+        uses: Dict[str, int] = {}
+        names: Dict[str, str] = {}
+        for description, logged in rows:
+            key = description.lower()
+            names.setdefault(key, description)
+            uses[key] = uses.get(key, 0) + (2 if logged else 1)
+        # Rows are newest first, so ties keep the most recently eaten foods
+        habitual = sorted(uses, key=lambda key: uses[key], reverse=True)[:max_foods]
+        profiles = get_profiles(db, habitual)
+    finally:
+        if owns_session:
+            db.close()
+
+    return [
+        VocabularyEntry(
+            description=names[key],
+            nutrients=profiles[key].nutrients,
+            llm_prompt_version=profiles[key].llm_prompt_version,
+            estimated_by=profiles[key].estimated_by,
+            uses=uses[key],
+        )
+        # Least used first, so they are the first to be evicted
+        for key in reversed(habitual)
+        if key in profiles
+    ]
+
+class UserFoodVocabulary:
+    """Process-wide store of per-user vocabularies, loaded on first use."""
+
+    def __init__(
+        self,
+        loader: Callable[[Any, int], List[VocabularyEntry]] = load_user_vocabulary,
+        max_foods: Optional[int] = None,
+        max_users: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.loader = loader
+        self.max_foods = settings.USER_VOCAB_MAX_FOODS if max_foods is None else max_foods
+        self._vocabularies = TTLCache(
+            maxsize=settings.USER_VOCAB_MAX_USERS if max_users is None else max_users,
+            ttl=settings.USER_VOCAB_TTL_SECONDS if ttl is None else ttl,
+        )
+        self._load_lock = threading.Lock()
+
+    def for_user(self, user_id: Any) -> Vocabulary:
+        key = str(user_id)
+        vocabulary = self._vocabularies.get(key)
+        if vocabulary is not None:
+            return vocabulary
+        with self._load_lock:
+            vocabulary = self._vocabularies.get(key)
+            if vocabulary is not None:
+                return vocabulary
+            vocabulary = Vocabulary(self.max_foods)
+            try:
+                for entry in self.loader(user_id, self.max_foods):
+                    vocabulary.put(entry)
+            except SQLAlchemyError as e:
+                # Start empty; the vocabulary still fills up from new estimates
+                logger.warning(f"Could not load food vocabulary for user {user_id}: {str(e)}")
+            self._vocabularies.set(key, vocabulary)
+            return vocabulary
+
+    def get(self, user_id: Any, description: str) -> Optional[VocabularyEntry]:
+        return self.for_user(user_id).get(description)
+
+    def remember(self, user_id: Any, description: str, profile) -> None:
+        """Add or refresh a food the user just had resolved (`profile` is a NutrientProfile)."""
+        self.for_user(user_id).put(VocabularyEntry(
+            description=description,
+            nutrients=profile.nutrients,
+            llm_prompt_version=profile.llm_prompt_version,
+            estimated_by=profile.estimated_by,
+        ))
+
+    def clear(self) -> None:
+        self._vocabularies.clear()
+
+_vocabulary: Optional[UserFoodVocabulary] = None
+_vocabulary_lock = threading.Lock()
+
+def get_user_food_vocabulary() -> UserFoodVocabulary:
+    global _vocabulary
+    with _vocabulary_lock:
+        if _vocabulary is None:
+            _vocabulary = UserFoodVocabulary()
+    return _vocabulary
@@ -1,16 +1,20 @@
 from sqlalchemy.orm import Session
 from app.models.models import User
-from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta
 from app.core.config import settings
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from app.db.session import get_db
+from app.services.auth_cache import auth_cache
+from app.services.password_hasher import pwd_context, password_hasher
+from typing import Optional
+import logging
 import os
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
@@ -34,8 +38,36 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, email: str, password: str, demographics: dict, settings_: dict):
-    hashed_password = get_password_hash(password)
+def get_user_by_token(db: Session, token: str) -> Optional[User]:
+    """
+    Resolve a bearer token to its user, or None if the token is invalid.
+    Tokens seen recently are served from the auth cache without decoding
+    the JWT or querying the database.
+    """
+    snapshot = auth_cache.get(token)
+    if snapshot is not None:
+        return auth_cache.attach(db, snapshot)
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+    user = get_user_by_email(db, email)
+    if user is not None:
+        auth_cache.set(token, user, token_exp=payload.get("exp"))
+    return user
+
+def bump_user_version(db: Session, user: User) -> None:
+    """Commit pending changes to `user` as a new version and drop its cached tokens."""
+    user.version = (user.version or 0) + 1
+    db.commit()
+    auth_cache.invalidate_user(user)
+
+def create_user(db: Session, email: str, password: str, demographics: dict, settings_: dict, hashed_password: str | None = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(password)
     user = User(
         email=email,
         demographics=demographics,
@@ -56,12 +88,43 @@ def authenticate_user(db: Session, email: str, password: str):
         return None
     return user
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    # Debug print statement for SKIP_AUTH value
-    print(f"[user_service] SKIP_AUTH: {os.getenv('SKIP_AUTH')}")
+async def get_user_by_email_async(db: Session, email: str):
+    """`get_user_by_email` run on the threadpool, so the query doesn't block the event loop."""
+    return await run_in_threadpool(get_user_by_email, db, email)
+
+async def create_user_async(db: Session, email: str, password: str, demographics: dict, settings_: dict):
+    """
+    Like `create_user`, but hashes the password on the password hashing pool
+    and writes the user on the threadpool, keeping both off the event loop.
+    """
+    hashed_password = await password_hasher.hash(password)
+    return await run_in_threadpool(
+        create_user, db, email, password, demographics, settings_, hashed_password=hashed_password
+    )
 
+def _store_rehash(db: Session, user: User, new_hash: str) -> None:
+    user.hashed_password = new_hash
+    bump_user_version(db, user)
+
+async def authenticate_user_async(db: Session, email: str, password: str):
+    """
+    Like `authenticate_user`, but verifies on the password hashing pool and
+    transparently upgrades the stored hash when the bcrypt cost has changed.
+    Database work runs on the threadpool so it doesn't block the event loop.
+    """
+    user = await get_user_by_email_async(db, email)
+    if not user:
+        return None
+    valid, new_hash = await password_hasher.verify_and_update(password, getattr(user, 'hashed_password', ''))
+    if not valid:
+        return None
+    if new_hash:
+        await run_in_threadpool(_store_rehash, db, user, new_hash)
+    return user
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
     if os.getenv("SKIP_AUTH") == "1":
-        print("[user_service] Bypassing auth!")
+        logger.debug("SKIP_AUTH=1: bypassing auth")
         user = db.query(User).first()
         if not user:
             raise HTTPException(status_code=401, detail="No users in database for SKIP_AUTH bypass. Please create a user first.")
@@ -72,14 +135,7 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = get_user_by_email(db, email)
+    user = get_user_by_token(db, token)
     if user is None:
         raise credentials_exception
     return user 
\ No newline at end of file
@@ -0,0 +1,57 @@
+from celery import Task
+from app.core.celery_app import celery_app
+from app.db.session import SessionLocal
+from app.services.bulk_estimation import process_chunk
+from app.services.nutrient_estimation import get_estimation_service
+from app.services.llm_resilience import backoff_delay
+from app.crud import estimation_job as crud_job
+import logging
+import asyncio
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class EstimationChunkTask(Task):
+    """Base task class with error handling and retry logic."""
+    max_retries = 3
+    # Bulk work: nobody is waiting on a single chunk, so back off generously
+    retry_backoff_base = 10  # seconds
+    retry_backoff_max = 300  # 5 minutes
+
+    def retry_countdown(self) -> float:
+        return backoff_delay(self.request.retries, self.retry_backoff_base, self.retry_backoff_max)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        """Handle task failure."""
+        logger.error(f"Task {task_id} failed: {str(exc)}")
+        super().on_failure(exc, task_id, args, kwargs, einfo)
+
+@celery_app.task(name="estimate_nutrients_chunk", base=EstimationChunkTask, bind=True)
+def estimate_nutrients_chunk_task(self, chunk_id: str) -> Dict[str, Any]:
+    """
+    Estimate nutrients for one chunk of a bulk estimation job. The chunk's
+    items and results live in estimation_job_chunks, so the message only
+    carries its ID.
+
+    Args:
+        chunk_id: The ID of the stored chunk
+
+    Returns:
+        Dictionary saying whether this run recorded the chunk's results
+    """
+    db = SessionLocal()
+    try:
+        loop = asyncio.get_event_loop()
+        recorded = loop.run_until_complete(process_chunk(db, chunk_id, get_estimation_service()))
+        return {"status": "success", "chunk_id": chunk_id, "recorded": recorded}
+
+    except Exception as e:
+        logger.error(f"Error estimating bulk chunk {chunk_id}: {str(e)}")
+        db.rollback()
+        if self.request.retries >= self.max_retries:
+            # Give up on the chunk; POST /nutrients/jobs/{id}/resume re-runs it
+            crud_job.finish_chunk(db, chunk_id, None, error=str(e))
+            return {"status": "error", "chunk_id": chunk_id, "error": str(e)}
+        raise self.retry(exc=e, countdown=self.retry_countdown())
+    finally:
+        db.close()
@@ -3,6 +3,11 @@ from app.core.celery_app import celery_app
 from app.services.food_image_service import FoodImageService
 from app.services.nutrient_estimation import NutrientEstimationService
 from app.db.session import SessionLocal
+from app.services.task_events import publish_task_event, RECOGNIZING, DONE, FAILED
+from app.services.task_results import record_task_started, record_task_finished
+from app.services.task_status import get_persisted_task_statuses
+from app.services.llm_resilience import backoff_delay
+from celery import states
 import logging
 import asyncio
 from typing import Dict, Any
@@ -12,7 +17,13 @@ logger = logging.getLogger(__name__)
 class FoodImageTask(Task):
     """Base task class with error handling and retry logic."""
     max_retries = 3
-    default_retry_delay = 60  # 1 minute
+    # Exponential backoff with full jitter between whole-task retries; individual
+    # LLM calls are already retried inside the task by the resilient LLM caller
+    retry_backoff_base = 10  # seconds
+    retry_backoff_max = 300  # 5 minutes
+
+    def retry_countdown(self) -> float:
+        return backoff_delay(self.request.retries, self.retry_backoff_base, self.retry_backoff_max)
 
     def on_failure(self, exc, task_id, args, kwargs, einfo):
         """Handle task failure."""
@@ -20,16 +31,20 @@ class FoodImageTask(Task):
         super().on_failure(exc, task_id, args, kwargs, einfo)
 
 @celery_app.task(name="process_food_image", base=FoodImageTask, bind=True)
-def process_food_image_task(self, image_id: str) -> Dict[str, Any]:
+def process_food_image_task(self, image_id: str, user_id: str = None) -> Dict[str, Any]:
     """
     Process a food image through the recognition pipeline.
     
     Args:
         image_id: The ID of the uploaded food image
+        user_id: Optional ID of the image's owner, used to route progress events
         
     Returns:
         Dictionary containing the processing results
     """
+    task_id = self.request.id
+    publish_task_event(task_id, RECOGNIZING, user_id=user_id, image_id=image_id)
+    record_task_started(task_id, "process_food_image", user_id=user_id, food_image_id=image_id)
     try:
         # Create a new database session
         db = SessionLocal()
@@ -39,8 +54,17 @@ def process_food_image_task(self, image_id: str) -> Dict[str, Any]:
             
             # Create event loop and run the async function
             loop = asyncio.get_event_loop()
-            result = loop.run_until_complete(food_image_service.process_food_image(image_id))
+            result = loop.run_until_complete(food_image_service.process_food_image(image_id, lease_owner=task_id))
             
+            food_item_count = len(result.get("food_items", [])) if result else 0
+            publish_task_event(task_id, DONE, user_id=user_id, image_id=image_id, food_item_count=food_item_count)
+            # Food items themselves are stored in food_items; keep only a summary here
+            record_task_finished(task_id, states.SUCCESS, result={
+                "image_id": image_id,
+                "food_item_count": food_item_count,
+                "recognition_confidence": result.get("recognition_confidence") if result else None,
+            })
+
             # Check if any food items were recognized
             if not result or not result.get("food_items"):
                 return {
@@ -61,8 +85,13 @@ def process_food_image_task(self, image_id: str) -> Dict[str, Any]:
             
     except Exception as e:
         logger.error(f"Error processing food image {image_id}: {str(e)}")
+        if self.request.retries >= self.max_retries:
+            publish_task_event(task_id, FAILED, user_id=user_id, image_id=image_id, error=str(e))
+            record_task_finished(task_id, states.FAILURE, error=str(e))
+        else:
+            record_task_finished(task_id, states.RETRY, error=str(e))
         # Retry the task
-        raise self.retry(exc=e)
+        raise self.retry(exc=e, countdown=self.retry_countdown())
 
 @celery_app.task(name="get_task_status")
 def get_task_status(task_id: str) -> Dict[str, Any]:
@@ -91,6 +120,12 @@ def get_task_status(task_id: str) -> Dict[str, Any]:
                 "error": str(task.result)
             }
     
+    if task.state == states.PENDING:
+        # Redis status expired (or task unknown); fall back to the durable record
+        persisted = get_persisted_task_statuses([task_id])
+        if task_id in persisted:
+            return persisted[task_id]
+
     return {
         "task_id": task_id,
         "status": "processing"
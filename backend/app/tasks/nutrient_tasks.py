@@ -1,14 +1,16 @@
 from app.core.celery_app import celery_app
 from app.services.nutrient_estimation import NutrientEstimationService, FoodItem, NutrientProfile
-from openai import AsyncOpenAI
-from app.core.config import settings
+from app.core.openai_client import get_async_openai
+from app.services.task_events import publish_task_event, ESTIMATING, DONE, FAILED
+from app.services.task_results import record_task_started, record_task_finished
+from celery import states
 import logging
 import asyncio
 
 logger = logging.getLogger(__name__)
 
-@celery_app.task(name="estimate_nutrients")
-def estimate_nutrients_task(food_items_data: list, openai_client=None, service=None) -> dict:
+@celery_app.task(name="estimate_nutrients", bind=True)
+def estimate_nutrients_task(self, food_items_data: list, openai_client=None, service=None, user_id: str = None) -> dict:
     """
     Celery task to estimate nutrients for a list of food items.
     
@@ -16,17 +18,30 @@ def estimate_nutrients_task(food_items_data: list, openai_client=None, service=N
         food_items_data: List of dictionaries containing food item data
         openai_client: Optional, injected OpenAI client for testing
         service: Optional, injected NutrientEstimationService for testing
+        user_id: Optional ID of the user who ate the items, to use their food vocabulary
+            and to publish progress on their event stream
         
     Returns:
         Dictionary containing the estimation results
     """
+    task_id = self.request.id
+    publish_task_event(task_id, ESTIMATING, user_id=user_id, item_count=len(food_items_data))
+    record_task_started(task_id, "estimate_nutrients", user_id=user_id)
     try:
         # Initialize OpenAI client if not provided
         if openai_client is None:
-            openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+            openai_client = get_async_openai()
         # Initialize nutrient estimation service if not provided
         if service is None:
-            service = NutrientEstimationService(openai_client)
+            from app.services.food_vectors import get_food_vector_index  # deferred: numpy is slow to import
+            from app.services.nutrient_profiles import record_profiles
+            from app.services.user_food_vocabulary import get_user_food_vocabulary
+            service = NutrientEstimationService(
+                openai_client,
+                vector_index=get_food_vector_index(),
+                profile_store=record_profiles,
+                user_vocabulary=get_user_food_vocabulary(),
+            )
         
         # Convert food items data to FoodItem objects
         food_items = [
@@ -42,7 +57,7 @@ def estimate_nutrients_task(food_items_data: list, openai_client=None, service=N
         
         # Run the async function in an event loop
         loop = asyncio.get_event_loop()
-        results = loop.run_until_complete(service.estimate_nutrients(food_items))
+        results = loop.run_until_complete(service.estimate_nutrients(food_items, user_id=user_id))
         
         # Convert results to serializable format
         serialized_results = []
@@ -58,6 +73,8 @@ def estimate_nutrients_task(food_items_data: list, openai_client=None, service=N
                     "nutrient_profile": None
                 })
         
+        publish_task_event(task_id, DONE, user_id=user_id, item_count=len(serialized_results))
+        record_task_finished(task_id, states.SUCCESS, result={"results": serialized_results})
         return {
             "status": "success",
             "results": serialized_results
@@ -65,6 +82,8 @@ def estimate_nutrients_task(food_items_data: list, openai_client=None, service=N
         
     except Exception as e:
         logger.error(f"Error in nutrient estimation task: {str(e)}")
+        publish_task_event(task_id, FAILED, user_id=user_id, error=str(e))
+        record_task_finished(task_id, states.FAILURE, error=str(e))
         return {
             "status": "error",
             "error": str(e)
@@ -0,0 +1,73 @@
+from celery import Task
+from app.core.celery_app import celery_app
+from app.services.receipt_service import ReceiptService
+from app.db.session import SessionLocal
+from app.services.task_events import publish_task_event, PARSING, ESTIMATING, DONE, FAILED
+from app.services.task_results import record_task_started, record_task_finished
+from app.services.llm_resilience import backoff_delay
+from celery import states
+import logging
+import asyncio
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class ReceiptTask(Task):
+    """Base task class with error handling and retry logic."""
+    max_retries = 2
+    # Receipts are interactive (P95 target of 5 s), so retry sooner than food images
+    retry_backoff_base = 2  # seconds
+    retry_backoff_max = 30
+
+    def retry_countdown(self) -> float:
+        return backoff_delay(self.request.retries, self.retry_backoff_base, self.retry_backoff_max)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        """Handle task failure."""
+        logger.error(f"Task {task_id} failed: {str(exc)}")
+        super().on_failure(exc, task_id, args, kwargs, einfo)
+
+@celery_app.task(name="process_receipt", base=ReceiptTask, bind=True)
+def process_receipt_task(self, receipt_id: str, user_id: str = None) -> Dict[str, Any]:
+    """
+    Parse a receipt and estimate nutrients for all of its line items.
+
+    Args:
+        receipt_id: The ID of the stored receipt
+        user_id: Optional ID of the receipt's owner, used to route progress events
+
+    Returns:
+        Dictionary containing a summary of the processed receipt
+    """
+    task_id = self.request.id
+    record_task_started(task_id, "process_receipt", user_id=user_id)
+
+    def progress(stage: str, processed: int, total: int) -> None:
+        publish_task_event(
+            task_id, PARSING if stage == "parsing" else ESTIMATING, user_id=user_id,
+            receipt_id=receipt_id, processed_item_count=processed, item_count=total,
+        )
+
+    try:
+        db = SessionLocal()
+        try:
+            loop = asyncio.get_event_loop()
+            result = loop.run_until_complete(ReceiptService(db).process_receipt(receipt_id, on_progress=progress))
+        finally:
+            db.close()
+
+        publish_task_event(task_id, DONE, user_id=user_id, receipt_id=receipt_id, item_count=result["item_count"])
+        record_task_finished(task_id, states.SUCCESS, result=result)
+        return {
+            "status": "success",
+            **result
+        }
+
+    except Exception as e:
+        logger.error(f"Error processing receipt {receipt_id}: {str(e)}")
+        if self.request.retries >= self.max_retries:
+            publish_task_event(task_id, FAILED, user_id=user_id, receipt_id=receipt_id, error=str(e))
+            record_task_finished(task_id, states.FAILURE, error=str(e))
+        else:
+            record_task_finished(task_id, states.RETRY, error=str(e))
+        raise self.retry(exc=e, countdown=self.retry_countdown())
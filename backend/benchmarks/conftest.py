@@ -0,0 +1,93 @@
+"""
+Micro-benchmarks for hot paths, run with pytest-benchmark. See
+run_benchmarks.sh for saving a baseline and comparing against it.
+
+Everything here runs offline: LLM calls go to an in-process fake client and
+CRUD queries run against in-memory SQLite.
+"""
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Must be set before app settings are imported
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["LLM_RATE_LIMIT_BACKEND"] = "local"
+os.environ["LLM_REQUESTS_PER_MINUTE"] = "100000000"
+os.environ["LLM_TOKENS_PER_MINUTE"] = "100000000000"
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base_class import Base
+from app.models import models  # noqa
+from app.models.task_result import TaskResult
+from app.models.user import User
+from app.models.user_food_history import UserFoodHistory
+
+NUTRIENTS = {
+    "iron_mg": 0.8, "potassium_mg": 350.0, "magnesium_mg": 27.0, "calcium_mg": 5.0,
+    "vitamin_d_mcg": 0.0, "vitamin_b12_mcg": 0.0, "folate_mcg": 20.0,
+    "zinc_mg": 0.15, "selenium_mcg": 1.0, "fiber_g": 2.6,
+}
+
+def completion(content=None, function_arguments=None):
+    """A minimal stand-in for an OpenAI chat completion response."""
+    function_call = SimpleNamespace(arguments=function_arguments) if function_arguments is not None else None
+    message = SimpleNamespace(content=content, function_call=function_call)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+class FakeOpenAIClient:
+    """Answers every chat completion immediately with a fixed response."""
+
+    def __init__(self, response):
+        async def create(**kwargs):
+            return response
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+@pytest.fixture
+def nutrient_client():
+    return FakeOpenAIClient(completion(function_arguments=json.dumps({"nutrients": NUTRIENTS})))
+
+@pytest.fixture(scope="session")
+def event_loop_runner():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+@pytest.fixture(scope="session")
+def sqlite_session():
+    """In-memory SQLite with one user's year of meal history and a batch of task results."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    user = User(id=uuid4(), email="bench@example.com", hashed_password="x", demographics={}, settings={})
+    session.add(user)
+    start = datetime(2025, 1, 1)
+    session.add_all(
+        UserFoodHistory(
+            user_id=user.id,
+            meal_datetime=start + timedelta(hours=6 * i),
+            meal_type=("breakfast", "lunch", "dinner", "snack")[i % 4],
+            total_nutrients=NUTRIENTS,
+        )
+        for i in range(1460)
+    )
+    task_ids = [str(uuid4()) for _ in range(500)]
+    session.add_all(
+        TaskResult(task_id=task_id, task_name="estimate_nutrients", status="SUCCESS", attempts=1, result={"results": []})
+        for task_id in task_ids
+    )
+    session.commit()
+    yield SimpleNamespace(session=session, user_id=user.id, task_ids=task_ids)
+    session.close()
+    engine.dispose()
@@ -0,0 +1,19 @@
+from app.crud import task_result as task_result_crud
+from app.crud import user_food_history as history_crud
+
+def test_food_history_first_page(benchmark, sqlite_session):
+    page = benchmark(history_crud.get_user_food_history, sqlite_session.session, sqlite_session.user_id, 100)
+    assert len(page) == 100
+
+def test_food_history_deep_cursor_page(benchmark, sqlite_session):
+    db, user_id = sqlite_session.session, sqlite_session.user_id
+    cursor = None
+    for _ in range(10):
+        cursor = history_crud.next_cursor(history_crud.get_user_food_history(db, user_id, 100, cursor), 100)
+
+    page = benchmark(history_crud.get_user_food_history, db, user_id, 100, cursor)
+    assert len(page) == 100
+
+def test_get_task_results(benchmark, sqlite_session):
+    rows = benchmark(task_result_crud.get_task_results, sqlite_session.session, sqlite_session.task_ids[:100])
+    assert len(rows) == 100
@@ -0,0 +1,20 @@
+import json
+from unittest.mock import patch
+
+from app.services import food_image_service
+from app.services.food_image_service import FoodImageService
+from conftest import FakeOpenAIClient, completion
+
+RESPONSE = json.dumps([
+    {"description": f"item {i}", "quantity": "1.5" if i % 3 else "a few", "confidence": 0.8}
+    for i in range(12)
+])
+
+def test_process_image_with_llm_parsing(benchmark, tmp_path, event_loop_runner):
+    image_path = tmp_path / "meal.jpg"
+    image_path.write_bytes(b"\xff\xd8\xff" + b"\x00" * 50_000)
+    service = FoodImageService(db=None)
+
+    with patch.object(food_image_service, "get_async_openai", lambda: FakeOpenAIClient(completion(content=RESPONSE))):
+        items = benchmark(lambda: event_loop_runner(service.process_image_with_llm(str(image_path))))
+    assert len(items) == 12
@@ -0,0 +1,27 @@
+import random
+
+import pytest
+
+from app.services.food_vectors import FoodVectorIndex, build_index
+from app.services.sku_matcher import load_catalog
+
+LINES = ["greek yogurt plain", "banana raw", "chicken breast boneless", "baby spinach", "cherry tomatoes"] * 4
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    # 20k profiles: the bundled grocery names with random qualifiers
+    rng = random.Random(0)
+    names = [food.description for food in load_catalog()]
+    qualifiers = ["organic", "frozen", "canned", "fresh", "low sodium", "family size", "store brand", "sliced"]
+    profiles = [
+        {"food_name": f"{rng.choice(names)} {rng.choice(qualifiers)} {i}", "nutrients": {"iron_mg": 1.0},
+         "llm_prompt_version": "v1.0-batch", "estimated_by": "gpt-4"}
+        for i in range(20000)
+    ]
+    directory = str(tmp_path_factory.mktemp("food_index"))
+    build_index(directory, profiles)
+    return FoodVectorIndex(directory, reload_seconds=3600)
+
+def test_nearest_for_twenty_lines(benchmark, index):
+    results = benchmark(index.nearest, LINES)
+    assert len(results) == 20 and all(results)
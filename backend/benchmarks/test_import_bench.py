@@ -0,0 +1,18 @@
+"""Cold start: importing the API and the worker app in a fresh interpreter."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+def import_in_fresh_interpreter(module: str) -> None:
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY") or "benchmark")
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=BACKEND_DIR, env=env, capture_output=True, check=True)
+
+@pytest.mark.parametrize("module", ["app.main", "app.core.celery_app"])
+def test_cold_import(benchmark, module):
+    # Each round starts a new interpreter, so a few rounds are enough
+    benchmark.pedantic(import_in_fresh_interpreter, args=(module,), rounds=5, warmup_rounds=1)
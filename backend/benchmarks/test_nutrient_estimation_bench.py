@@ -0,0 +1,36 @@
+from app.services.nutrient_estimation import FoodItem, NutrientEstimationService
+
+FOOD_ITEMS = [
+    FoodItem(description=f"food {i}", quantity=1.5, unit="lb", confidence=0.9, is_estimated=True)
+    for i in range(20)
+]
+
+def test_estimate_nutrients_cache_hit(benchmark, nutrient_client, event_loop_runner):
+    service = NutrientEstimationService(nutrient_client)
+    event_loop_runner(service.estimate_nutrients(FOOD_ITEMS))
+
+    results = benchmark(lambda: event_loop_runner(service.estimate_nutrients(FOOD_ITEMS)))
+    assert all(profile is not None for _, profile in results)
+
+def test_estimate_nutrients_cache_miss(benchmark, nutrient_client, event_loop_runner):
+    service = NutrientEstimationService(nutrient_client)
+
+    def estimate():
+        service.nutrient_cache.clear()
+        return event_loop_runner(service.estimate_nutrients(FOOD_ITEMS))
+
+    results = benchmark(estimate)
+    assert all(profile is not None for _, profile in results)
+
+def test_calculate_total_nutrients(benchmark, nutrient_client, event_loop_runner):
+    service = NutrientEstimationService(nutrient_client)
+    (food_item, profile), = event_loop_runner(service.estimate_nutrients(FOOD_ITEMS[:1]))
+
+    totals = benchmark(service.calculate_total_nutrients, food_item, profile)
+    assert totals["iron_mg"] > 0
+
+def test_convert_to_grams(benchmark, nutrient_client):
+    service = NutrientEstimationService(nutrient_client)
+    units = ["g", "kg", "lb", "oz", "piece"] * 20
+
+    benchmark(lambda: [service._convert_to_grams(2.0, unit) for unit in units])
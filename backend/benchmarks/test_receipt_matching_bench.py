@@ -0,0 +1,24 @@
+from app.services.receipt_parser import parse_receipt_text
+from app.services.sku_matcher import SkuMatcher, load_catalog
+
+RECEIPT = "\n".join(
+    ["CORNER GROCERY"]
+    + [
+        "ORG BNNA 2.31LB @ 0.79/LB   1.82 F",
+        "SPNCH BABY 5OZ              3.99 F",
+        "GRK YGRT PLN                1.98",
+        "CHKN BRST BNLS 1.5LB        7.49",
+        "TOM CHRY                    2.99",
+    ] * 8
+    + ["SUBTOTAL   92.35", "TOTAL   92.35"]
+)
+
+MATCHER = SkuMatcher(load_catalog())
+
+def test_parse_forty_line_receipt(benchmark):
+    receipt = benchmark(parse_receipt_text, RECEIPT)
+    assert len(receipt.lines) == 40
+
+def test_index_search_per_line(benchmark):
+    candidates, confident = benchmark(MATCHER.search, "ORG BNNA")
+    assert confident and candidates[0][0].description == "Bananas, raw"
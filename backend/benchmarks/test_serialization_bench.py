@@ -0,0 +1,21 @@
+from app.schemas.task import BatchTaskStatusResponse
+from conftest import NUTRIENTS
+
+TASK_RESULT = {
+    "results": [
+        {
+            "food_item": {"description": f"food {i}", "quantity": 1.0, "unit": "piece", "confidence": 0.9, "is_estimated": True},
+            "nutrient_profile": {"food_name": f"food {i}", "nutrients": NUTRIENTS, "source": "model_estimate"},
+        }
+        for i in range(10)
+    ]
+}
+
+STATUSES = [
+    {"task_id": f"task-{i}", "status": "completed", "result": TASK_RESULT}
+    for i in range(100)
+]
+
+def test_batch_task_status_serialization(benchmark):
+    body = benchmark(lambda: BatchTaskStatusResponse(tasks=STATUSES).model_dump_json())
+    assert body.startswith('{"tasks":')
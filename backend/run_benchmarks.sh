@@ -0,0 +1,21 @@
+#!/bin/bash
+# Micro-benchmarks for hot paths (see benchmarks/conftest.py).
+#
+#   ./run_benchmarks.sh          compare against the stored baseline; fails if any
+#                                benchmark's median regressed by more than BENCHMARK_THRESHOLD
+#   ./run_benchmarks.sh save     record a new baseline in benchmarks/baselines
+#
+# Baselines are machine specific: save one on the machine you compare on.
+
+THRESHOLD=${BENCHMARK_THRESHOLD:-25%}
+STORAGE="file://benchmarks/baselines"
+
+cd "$(dirname "$0")"
+
+if [ "$1" == "save" ]; then
+    python -m pytest benchmarks -q --benchmark-storage="$STORAGE" --benchmark-save=baseline
+else
+    python -m pytest benchmarks -q --benchmark-storage="$STORAGE" \
+        --benchmark-compare --benchmark-compare-fail="median:$THRESHOLD" \
+        --benchmark-columns=min,median,max,ops
+fi
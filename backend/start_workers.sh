@@ -1,16 +1,44 @@
 #!/bin/bash
 
+# Each stage has an interactive queue (food_image, nutrients, receipts) and a bulk
+# queue (<stage>_bulk); see app/core/task_lanes.py. Which queues each pool consumes
+# and how many processes it runs can be overridden from the environment, e.g.
+# BULK_QUEUES=nutrients_bulk BULK_CONCURRENCY=4 ./start_workers.sh
+FOOD_IMAGE_QUEUES=${FOOD_IMAGE_QUEUES:-food_image}
+NUTRIENT_QUEUES=${NUTRIENT_QUEUES:-nutrients}
+RECEIPT_QUEUES=${RECEIPT_QUEUES:-receipts}
+BULK_QUEUES=${BULK_QUEUES:-food_image_bulk,nutrients_bulk,receipts_bulk}
+BULK_CONCURRENCY=${BULK_CONCURRENCY:-2}
+
+# Prefork children record their metrics as files under PROMETHEUS_MULTIPROC_DIR, which
+# the worker's exporter aggregates. Each worker gets its own directory, emptied before
+# it starts so samples from earlier runs don't linger.
+METRICS_DIR=${METRICS_DIR:-/tmp/celery_metrics}
+metrics_dir() {
+    rm -rf "$METRICS_DIR/$1"
+    mkdir -p "$METRICS_DIR/$1"
+    echo "$METRICS_DIR/$1"
+}
+
 # Start Celery worker for food image processing
-celery -A app.core.celery_app worker -Q food_image -n food_image_worker@%h -l info &
+# Each worker exposes Prometheus metrics on its own port
+PROMETHEUS_MULTIPROC_DIR=$(metrics_dir food_image) WORKER_METRICS_PORT=9101 celery -A app.core.celery_app worker -Q "$FOOD_IMAGE_QUEUES" -n food_image_worker@%h -l info &
 
 # Start Celery worker for nutrient estimation
-celery -A app.core.celery_app worker -Q nutrients -n nutrient_worker@%h -l info &
+PROMETHEUS_MULTIPROC_DIR=$(metrics_dir nutrient) WORKER_METRICS_PORT=9102 celery -A app.core.celery_app worker -Q "$NUTRIENT_QUEUES" -n nutrient_worker@%h -l info &
+
+# Start Celery worker for receipts, kept apart so receipt latency doesn't queue behind images
+PROMETHEUS_MULTIPROC_DIR=$(metrics_dir receipt) WORKER_METRICS_PORT=9104 celery -A app.core.celery_app worker -Q "$RECEIPT_QUEUES" -n receipt_worker@%h -l info &
+
+# Start Celery worker for bulk lanes (backfills, batch jobs); a small separate pool,
+# so heavy batch work can't take workers away from user-facing uploads
+PROMETHEUS_MULTIPROC_DIR=$(metrics_dir bulk) WORKER_METRICS_PORT=9105 celery -A app.core.celery_app worker -Q "$BULK_QUEUES" -c "$BULK_CONCURRENCY" -n bulk_worker@%h -l info &
 
 # Start Celery worker for default tasks
-celery -A app.core.celery_app worker -Q default -n default_worker@%h -l info &
+PROMETHEUS_MULTIPROC_DIR=$(metrics_dir default) WORKER_METRICS_PORT=9103 celery -A app.core.celery_app worker -Q default -n default_worker@%h -l info &
 
 # Start Flower for monitoring
 celery -A app.core.celery_app flower --port=5555 &
 
 echo "All Celery workers and Flower started. Press Ctrl+C to stop all processes."
-wait 
\ No newline at end of file
+wait
@@ -0,0 +1,92 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.models.user import User
+from app.services import user_service
+from app.services.auth_cache import AuthCache, auth_cache
+from app.services.user_service import create_access_token, get_user_by_token, bump_user_version
+
+@pytest.fixture
+def cached_user(db_session: Session):
+    auth_cache.clear()
+    user = User(
+        id=uuid4(),
+        email=f"auth_cache_{uuid4()}@example.com",
+        hashed_password="not-a-real-hash",
+        demographics={"age_range": "30-39"},
+        settings={},
+        version=1
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    yield user
+    auth_cache.clear()
+
+def test_ttl_cache_expiry_and_bound():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, timer=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None  # evicted as least recently used
+    assert cache.get("b") == 2
+    now[0] = 11
+    assert cache.get("b") is None  # expired
+
+def test_cached_token_skips_database(db_session: Session, cached_user: User):
+    token = create_access_token(data={"sub": cached_user.email})
+    assert get_user_by_token(db_session, token).id == cached_user.id
+
+    db_session.expunge_all()
+    with patch.object(user_service, "get_user_by_email", side_effect=AssertionError("DB lookup")):
+        user = get_user_by_token(db_session, token)
+    assert user.id == cached_user.id
+    assert user.demographics == {"age_range": "30-39"}
+    assert user in db_session
+
+def test_version_bump_invalidates_cached_token(db_session: Session, cached_user: User):
+    token = create_access_token(data={"sub": cached_user.email})
+    get_user_by_token(db_session, token)
+
+    bump_user_version(db_session, cached_user)
+    with patch.object(user_service, "get_user_by_email", wraps=user_service.get_user_by_email) as lookup:
+        user = get_user_by_token(db_session, token)
+    lookup.assert_called_once()
+    assert user.version == 2
+
+def test_password_rehash_invalidates_cached_token(db_session: Session, cached_user: User):
+    token = create_access_token(data={"sub": cached_user.email})
+    get_user_by_token(db_session, token)
+
+    user_service._store_rehash(db_session, cached_user, "a-newer-hash")
+    assert get_user_by_token(db_session, token).version == 2
+
+def test_version_bump_in_one_process_invalidates_other_processes(cached_user: User):
+    store = {}
+    redis = MagicMock()
+    redis.get.side_effect = store.get
+    redis.smembers.return_value = set()
+    redis.pipeline.return_value.set.side_effect = lambda key, value, ex=None: store.__setitem__(key, str(value).encode())
+    bumping, serving = AuthCache(ttl=60, maxsize=10, use_redis=True), AuthCache(ttl=60, maxsize=10, use_redis=True)
+    token = create_access_token(data={"sub": cached_user.email})
+
+    with patch("app.services.auth_cache.get_redis", return_value=redis):
+        serving.set(token, cached_user)
+        assert serving.get(token) is not None
+
+        cached_user.version = 2
+        bumping.invalidate_user(cached_user)
+        # The serving process still holds its own copy, but the shared floor rejects it
+        assert len(serving._local) == 1
+        assert serving.get(token) is None
+
+def test_expired_or_invalid_token_is_not_cached(db_session: Session, cached_user: User):
+    expired = create_access_token(data={"sub": cached_user.email}, expires_delta=timedelta(seconds=-1))
+    assert get_user_by_token(db_session, expired) is None
+    assert get_user_by_token(db_session, "garbage") is None
+    assert len(auth_cache._local) == 0
@@ -0,0 +1,141 @@
+import json
+import threading
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock
+from uuid import uuid4
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import estimation_job as crud_job
+from app.models.user import User
+from app.services.bulk_estimation import BulkEstimationService, iter_items, process_chunk, stream_job_results
+from app.services.model_cascade import ModelCascade
+from app.services.nutrient_estimation import NutrientEstimationService, NutrientProfile
+
+async def body(*parts: bytes):
+    for part in parts:
+        yield part
+
+class FakeEstimationService(NutrientEstimationService):
+    """Iron = 1 mg per 100 g for everything except descriptions containing "mystery"."""
+
+    def __init__(self):
+        super().__init__(openai_client=None)
+        self.estimated = []
+
+    async def estimate_nutrients_batch(self, food_items, batch_size=20, on_progress=None, user_id=None, raise_errors=False):
+        self.estimated.extend(item.description for item in food_items)
+        now = datetime.utcnow()
+        return [
+            (item, None if "mystery" in item.description else NutrientProfile(
+                food_name=item.description, nutrients={"iron_mg": 1.0}, source="model_estimate",
+                llm_prompt_version="test", estimated_by="test", created_at=now, updated_at=now,
+            ))
+            for item in food_items
+        ]
+
+@pytest.fixture
+def savepoint_session(db_session: Session):
+    session = Session(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+
+@pytest.fixture
+def user(savepoint_session: Session):
+    user = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x", demographics={}, settings={})
+    savepoint_session.add(user)
+    savepoint_session.commit()
+    return user
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+@pytest.mark.asyncio
+async def test_items_parse_across_chunk_boundaries_and_report_bad_lines():
+    ndjson = '{"description": "crème fraîche", "quantity": 30, "id": "a"}\nnot json\n{"quantity": 1}\n'.encode()
+    # Split inside the multi-byte "è"
+    items = await collect(iter_items("ndjson", body(ndjson[:4], ndjson[4:5], ndjson[5:])))
+    assert items[0] == {"line": 1, "id": "a", "description": "crème fraîche", "quantity": 30.0, "unit": "g"}
+    assert items[1]["error"].startswith("Invalid JSON") and items[2] == {"line": 3, "error": "Missing description"}
+
+    csv_body = b"id,description,quantity,unit\r\n1,Banana,1.5,LB\r\n2,\"Milk, whole\",1,cup\r\n"
+    items = await collect(iter_items("csv", body(csv_body)))
+    assert items == [
+        {"line": 2, "id": "1", "description": "Banana", "quantity": 1.5, "unit": "lb"},
+        {"line": 3, "id": "2", "error": "Unsupported unit: cup"},
+    ]
+
+@pytest.mark.asyncio
+async def test_job_is_chunked_estimated_and_streamed_in_order(savepoint_session: Session, user: User, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_ESTIMATION_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "BULK_ESTIMATION_POLL_SECONDS", 0)
+    lines = [{"description": "apple", "id": 1}, {"description": "rice", "quantity": 200}, {"description": ""},
+             {"description": "mystery meat"}, {"description": "oats", "unit": "oz", "quantity": 2}]
+    upload = "".join(json.dumps(line) + "\n" for line in lines).encode()
+    chunks = []
+    service = BulkEstimationService(savepoint_session)
+
+    job = await service.create_job(user.id, "ndjson", body(upload), on_chunk=lambda chunk: chunks.append(chunk.id) or f"task-{len(chunks)}")
+    assert (job.status, job.item_count, job.chunk_count) == ("running", 5, 3)
+
+    estimation_service = FakeEstimationService()
+    for chunk_id in reversed(chunks):
+        assert await process_chunk(savepoint_session, chunk_id, estimation_service)
+    # A redelivered task doesn't estimate or count the chunk twice
+    assert not await process_chunk(savepoint_session, chunks[0], estimation_service)
+    savepoint_session.refresh(job)
+    assert (job.status, job.completed_chunk_count) == ("completed", 3)
+
+    results = [json.loads(line) for line in await collect(stream_job_results(savepoint_session, job.id))]
+    assert [(result["chunk"], result["line"]) for result in results] == [(0, 1), (0, 2), (1, 3), (1, 4), (2, 5)]
+    assert results[0]["id"] == 1 and results[0]["nutrients"] == {"iron_mg": 1.0}
+    assert results[1]["nutrients"] == {"iron_mg": 2.0}
+    assert results[2]["error"] == "Missing description"
+    assert results[3]["error"] == "No nutrient estimate"
+    assert results[4]["nutrients"] == {"iron_mg": round(2 * 28.3495 / 100, 3)}
+
+    resumed = [json.loads(line) for line in await collect(stream_job_results(savepoint_session, job.id, from_chunk=2))]
+    assert resumed == results[4:]
+
+@pytest.mark.asyncio
+async def test_failed_chunks_are_reported_and_resumable(savepoint_session: Session, user: User, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_ESTIMATION_POLL_SECONDS", 0)
+    service = BulkEstimationService(savepoint_session)
+    chunks = []
+    job = await service.create_job(user.id, "csv", body(b"description\napple\n"), on_chunk=lambda chunk: chunks.append(chunk.id))
+
+    crud_job.finish_chunk(savepoint_session, chunks[0], None, error="LLM unavailable")
+    savepoint_session.refresh(job)
+    assert (job.status, job.failed_chunk_count) == ("failed", 1)
+    [failed] = [json.loads(line) for line in await collect(stream_job_results(savepoint_session, job.id))]
+    assert failed == {"chunk": 0, "line": 2, "error": "LLM unavailable"}
+
+    enqueued = []
+    assert service.resume_job(job, enqueued.append) == 1
+    assert enqueued == chunks and (job.status, job.failed_chunk_count) == ("running", 0)
+    assert await process_chunk(savepoint_session, chunks[0], FakeEstimationService())
+    savepoint_session.refresh(job)
+    assert job.status == "completed"
+
+@pytest.mark.asyncio
+async def test_llm_failure_leaves_chunk_pending_for_retry(savepoint_session: Session, user: User):
+    chunks = []
+    await BulkEstimationService(savepoint_session).create_job(
+        user.id, "csv", body(b"description\napple\n"), on_chunk=lambda chunk: chunks.append(chunk.id)
+    )
+    client = AsyncMock()
+    client.chat.completions.create.side_effect = RuntimeError("LLM unavailable")
+    service = NutrientEstimationService(client, cascade=ModelCascade("nutrients", ["gpt-4"]))
+
+    with pytest.raises(RuntimeError):
+        await process_chunk(savepoint_session, chunks[0], service)
+    assert crud_job.get_chunk(savepoint_session, chunks[0]).status == "pending"
+
+@pytest.mark.asyncio
+async def test_chunks_are_stored_and_enqueued_off_the_event_loop(savepoint_session: Session, user: User):
+    threads = []
+    await BulkEstimationService(savepoint_session).create_job(
+        user.id, "csv", body(b"description\napple\n"), on_chunk=lambda chunk: threads.append(threading.current_thread())
+    )
+    assert threads and threads[0] is not threading.current_thread()
@@ -0,0 +1,108 @@
+import io
+from types import SimpleNamespace
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.config import settings
+from app.models.models import FoodImage
+from app.models.user import User
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "green").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@pytest.fixture
+def test_user(db_session: Session):
+    user = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x", demographics={}, settings={})
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+@pytest.fixture
+def batch_client(client_with_db: TestClient, db_session: Session, test_user: User, monkeypatch, tmp_path):
+    from app.main import app
+    user = test_user
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    app.dependency_overrides[deps.get_db] = lambda: db_session
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    yield client_with_db, user
+    app.dependency_overrides.pop(deps.get_db, None)
+    app.dependency_overrides.pop(deps.get_current_user, None)
+
+def test_batch_upload_stores_valid_images_and_enqueues_one_group(batch_client, db_session: Session):
+    client, user = batch_client
+    files = [
+        ("files", ("breakfast.png", png_bytes(), "image/png")),
+        ("files", ("notes.txt", b"not an image", "text/plain")),
+        ("files", ("lunch.png", png_bytes(), "image/png")),
+    ]
+    with patch("app.api.v1.food_image.group") as mock_group:
+        mock_group.return_value.apply_async.return_value = SimpleNamespace(
+            results=[SimpleNamespace(id="task-1"), SimpleNamespace(id="task-2")]
+        )
+        response = client.post("/api/v1/food-images/batch", files=files)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [(image["filename"], image["status"], image["task_id"]) for image in body["images"]] == [
+        ("breakfast.png", "pending", "task-1"),
+        ("notes.txt", "rejected", None),
+        ("lunch.png", "pending", "task-2"),
+    ]
+    assert "Unsupported file type" in body["images"][1]["error"]
+
+    # One group of per-image tasks, all on the interactive food_image queue
+    signatures = list(mock_group.call_args.args[0])
+    assert [signature.args[0] for signature in signatures] == [body["images"][0]["image_id"], body["images"][2]["image_id"]]
+    assert {signature.options["queue"] for signature in signatures} == {"food_image"}
+    mock_group.return_value.apply_async.assert_called_once()
+
+    images = db_session.query(FoodImage).filter(FoodImage.user_id == user.id).all()
+    assert len(images) == 2 and {str(image.batch_id) for image in images} == {body["batch_id"]}
+
+    status = client.get(f"/api/v1/food-images/batch/{body['batch_id']}")
+    assert status.status_code == 200
+    assert sorted(image["image_id"] for image in status.json()["images"]) == sorted(str(image.id) for image in images)
+    assert client.get(f"/api/v1/food-images/batch/{uuid4()}").status_code == 404
+
+def test_batch_upload_does_not_reload_committed_images(batch_client, db_session: Session):
+    client, _ = batch_client
+    files = [("files", (f"meal{i}.png", png_bytes(), "image/png")) for i in range(3)]
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.bind, "before_cursor_execute", listener)
+    try:
+        with patch("app.api.v1.food_image.group") as mock_group:
+            mock_group.return_value.apply_async.return_value = SimpleNamespace(
+                results=[SimpleNamespace(id=f"task-{i}") for i in range(3)]
+            )
+            response = client.post("/api/v1/food-images/batch", files=files)
+    finally:
+        event.remove(db_session.bind, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    assert not [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+
+def test_batch_upload_removes_written_files_when_the_commit_fails(batch_client, db_session: Session, tmp_path):
+    client, _ = batch_client
+    files = [("files", (f"meal{i}.png", png_bytes(), "image/png")) for i in range(2)]
+    with patch.object(db_session, "commit", side_effect=OperationalError("COMMIT", {}, Exception("connection lost"))):
+        with pytest.raises(OperationalError):
+            client.post("/api/v1/food-images/batch", files=files)
+    assert [path for path in tmp_path.rglob("*") if path.is_file()] == []
+
+def test_batch_upload_rejects_oversized_batches(batch_client, monkeypatch):
+    client, _ = batch_client
+    monkeypatch.setattr(settings, "MAX_BATCH_UPLOAD_FILES", 1)
+    files = [("files", (f"meal{i}.png", png_bytes(), "image/png")) for i in range(2)]
+    response = client.post("/api/v1/food-images/batch", files=files)
+    assert response.status_code == 400
@@ -0,0 +1,106 @@
+import json
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.crud import food_image as crud
+from app.models.models import FoodImage, FoodItem
+from app.models.user import User
+from app.services import food_image_service
+from app.services.food_image_service import FoodImageService
+from app.services.model_cascade import ModelCascade
+
+RECOGNIZED = [
+    {"description": "apple", "quantity": 1.0, "confidence": 0.9, "is_estimated": True},
+    {"description": "banana", "quantity": 2.0, "confidence": 0.8, "is_estimated": True},
+]
+
+@pytest.fixture
+def savepoint_session(db_session: Session):
+    # The service rolls back on failure; run it inside a savepoint so that only
+    # undoes the service's own work, not the test's fixtures
+    session = Session(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+
+@pytest.fixture
+def pending_image(savepoint_session: Session):
+    user = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x", demographics={}, settings={})
+    savepoint_session.add(user)
+    image = FoodImage(
+        user_id=user.id,
+        image_url="/tmp/meal.jpg",
+        captured_at=datetime.utcnow(),
+        status="pending",
+        recognition_confidence=0.0,
+    )
+    savepoint_session.add(image)
+    savepoint_session.commit()
+    return image
+
+@pytest.mark.asyncio
+async def test_retry_reuses_recognition_checkpoint(savepoint_session: Session, pending_image: FoodImage):
+    service = FoodImageService(savepoint_session)
+    llm = AsyncMock(return_value=RECOGNIZED)
+
+    with patch.object(service, "process_image_with_llm", llm), \
+            patch.object(crud, "upsert_food_items", side_effect=RuntimeError("db blip")):
+        with pytest.raises(HTTPException):
+            await service.process_food_image(str(pending_image.id), lease_owner="task-1")
+
+    savepoint_session.refresh(pending_image)
+    assert pending_image.status == "failed"
+    assert pending_image.recognition_result == RECOGNIZED
+    assert pending_image.lease_owner is None
+
+    with patch.object(service, "process_image_with_llm", llm):
+        result = await service.process_food_image(str(pending_image.id), lease_owner="task-1")
+        again = await service.process_food_image(str(pending_image.id), lease_owner="task-1")
+
+    assert llm.await_count == 1
+    assert result["status"] == "processed"
+    assert result["recognition_confidence"] == 0.9
+    assert [item["description"] for item in again["food_items"]] == ["apple", "banana"]
+    items = savepoint_session.query(FoodItem).filter(FoodItem.food_image_id == pending_image.id).all()
+    assert len(items) == 2
+
+def test_upsert_food_items_updates_in_place(savepoint_session: Session, pending_image: FoodImage):
+    crud.upsert_food_items(savepoint_session, pending_image.id, RECOGNIZED)
+    crud.upsert_food_items(savepoint_session, pending_image.id, [dict(RECOGNIZED[0], quantity=3.0)])
+
+    items = crud.get_food_items(savepoint_session, pending_image.id)
+    assert [(item.description, item.quantity) for item in items] == [("apple", 3.0)]
+
+def test_lease_blocks_other_workers_until_expiry(savepoint_session: Session, pending_image: FoodImage):
+    assert crud.acquire_processing_lease(savepoint_session, pending_image.id, "task-1", lease_seconds=600)
+    assert crud.acquire_processing_lease(savepoint_session, pending_image.id, "task-1", lease_seconds=600)
+    assert not crud.acquire_processing_lease(savepoint_session, pending_image.id, "task-2", lease_seconds=600)
+
+    assert crud.acquire_processing_lease(savepoint_session, pending_image.id, "task-1", lease_seconds=-1)
+    assert crud.acquire_processing_lease(savepoint_session, pending_image.id, "task-2", lease_seconds=600)
+    savepoint_session.refresh(pending_image)
+    assert pending_image.processing_attempts == 4
+
+@pytest.mark.asyncio
+async def test_unsure_recognition_escalates_to_stronger_model(tmp_path):
+    image_path = tmp_path / "meal.jpg"
+    image_path.write_bytes(b"\xff\xd8\xff" + b"\x00" * 100)
+    replies = {
+        "cheap": [{"description": "apple", "quantity": 1, "confidence": 0.9}, {"description": "sauce?", "quantity": 1, "confidence": 0.3}],
+        "strong": [{"description": "apple", "quantity": 1, "confidence": 0.95}, {"description": "hummus", "quantity": 1, "confidence": 0.85}],
+    }
+
+    async def create(model, **kwargs):
+        message = SimpleNamespace(content=json.dumps(replies[model]))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = MagicMock()
+    client.chat.completions.create = create
+    with patch.object(food_image_service, "get_async_openai", lambda: client), \
+         patch.object(food_image_service, "get_model_cascade", lambda stage: ModelCascade(stage, ["cheap", "strong"])):
+        items = await FoodImageService(db=None).process_image_with_llm(str(image_path))
+    assert [item["description"] for item in items] == ["apple", "hummus"]
@@ -33,7 +33,7 @@ def test_process_food_image_task_success(mock_food_image_service):
     assert result["image_id"] == "test-image-id"
     assert "recognition_results" in result
     assert result["recognition_results"]["food_items"][0]["description"] == "apple"
-    mock_food_image_service.process_food_image.assert_called_once_with("test-image-id")
+    mock_food_image_service.process_food_image.assert_called_once_with("test-image-id", lease_owner=None)
 
 def test_process_food_image_task_no_items(mock_food_image_service):
     # Mock empty food recognition results
@@ -0,0 +1,68 @@
+import json
+import os
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from app.services.food_vectors import FoodVectorIndex, build_index
+from app.services.nutrient_estimation import FoodItem, NutrientEstimationService
+
+NUTRIENTS = {"iron_mg": 0.1, "potassium_mg": 141, "magnesium_mg": 11, "calcium_mg": 110, "vitamin_d_mcg": 0.1,
+             "vitamin_b12_mcg": 0.75, "folate_mcg": 7, "zinc_mg": 0.52, "selenium_mcg": 9.7, "fiber_g": 0}
+
+def profile(food_name, **nutrients):
+    return {"food_name": food_name, "nutrients": {**NUTRIENTS, **nutrients},
+            "llm_prompt_version": "v1.0-batch", "estimated_by": "gpt-4"}
+
+PROFILES = [
+    profile("greek yogurt plain nonfat", calcium_mg=110),
+    profile("banana raw", potassium_mg=358),
+    profile("spinach raw", iron_mg=2.7),
+    profile("cheddar cheese", calcium_mg=710),
+]
+
+def test_nearest_ranks_similar_descriptions_first(tmp_path):
+    assert build_index(str(tmp_path), PROFILES, dimensions=256) == 4
+    index = FoodVectorIndex(str(tmp_path), reload_seconds=0)
+
+    [best, second] = index.nearest(["Plain Greek Yogurt, nonfat"], k=2)[0]
+    assert best.food_name == "greek yogurt plain nonfat"
+    assert best.similarity > 0.9 > second.similarity
+    assert index.nearest(["chocolate chip cookies"])[0][0].similarity < 0.5
+
+def test_rebuild_is_picked_up_and_old_files_removed(tmp_path):
+    index = FoodVectorIndex(str(tmp_path), reload_seconds=0)
+    assert len(index) == 0
+    assert index.nearest(["banana"]) == [[]]
+
+    build_index(str(tmp_path), PROFILES[:1], dimensions=256)
+    assert len(index) == 1
+    build_index(str(tmp_path), PROFILES, dimensions=256)
+    assert len(index) == 4
+    assert sorted(name.split("-")[0] for name in os.listdir(tmp_path)) == ["entries", "idf", "index.json", "vectors"]
+
+@pytest.mark.asyncio
+async def test_estimation_reuses_indexed_profile_and_stores_new_ones(tmp_path):
+    build_index(str(tmp_path), PROFILES, dimensions=256)
+    arguments = json.dumps({"items": {"1": NUTRIENTS}})
+    openai_client = AsyncMock()
+    openai_client.chat.completions.create.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(function_call=SimpleNamespace(arguments=arguments)))],
+        usage=None,
+    )
+    stored = []
+    service = NutrientEstimationService(
+        openai_client, vector_index=FoodVectorIndex(str(tmp_path), reload_seconds=0), profile_store=stored.extend
+    )
+
+    def item(description):
+        return FoodItem(description=description, quantity=1, unit="piece", confidence=1.0, is_estimated=False)
+
+    results = await service.estimate_nutrients_batch([item("Banana, raw"), item("Dark chocolate bar")])
+    (_, banana), (_, chocolate) = results
+    assert banana.source == "similar_profile"
+    assert banana.nutrients["potassium_mg"] == 358
+    assert chocolate.source == "model_estimate"
+    # Only the reused profile was skipped; only the new estimate is stored
+    assert "Banana" not in openai_client.chat.completions.create.await_args.kwargs["messages"][0]["content"]
+    assert [profile.food_name for profile in stored] == ["Dark chocolate bar"]
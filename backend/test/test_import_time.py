@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Loaded on first use (LLM call, upload validation, sampled profile, tracing
+# enabled), never at import: together they add about a second to cold start.
+# The import time itself is tracked in benchmarks/test_import_bench.py.
+DEFERRED_MODULES = ["openai", "magic", "PIL", "pyinstrument", "opentelemetry.sdk.trace", "alembic"]
+
+def loaded_in_fresh_interpreter(module: str) -> list:
+    code = (
+        "import json, sys\n"
+        f"import {module}\n"
+        "print(json.dumps(sorted(sys.modules)))\n"
+    )
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY") or "test")
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_api_import_is_lean():
+    modules = loaded_in_fresh_interpreter("app.main")
+    assert [module for module in DEFERRED_MODULES if module in modules] == []
+
+def test_worker_import_is_lean():
+    modules = loaded_in_fresh_interpreter("app.core.celery_app")
+    assert [module for module in DEFERRED_MODULES if module in modules] == []
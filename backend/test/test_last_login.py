@@ -0,0 +1,47 @@
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.services.last_login import LastLoginRecorder
+
+@pytest.fixture
+def last_login_user(db_session: Session):
+    user = User(
+        id=uuid4(),
+        email=f"last_login_{uuid4()}@example.com",
+        hashed_password="not-a-real-hash",
+        demographics={},
+        settings={},
+        last_login=None
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+def test_record_is_coarse_grained():
+    recorder = LastLoginRecorder(granularity_seconds=60)
+    user_id = uuid4()
+    now = datetime.utcnow()
+    assert recorder.record(user_id, seen_at=now)
+    assert not recorder.record(user_id, seen_at=now + timedelta(seconds=30))
+    assert recorder.record(user_id, seen_at=now + timedelta(seconds=90))
+    assert recorder.pending_count() == 1
+
+def test_record_skips_recently_stored_last_login():
+    recorder = LastLoginRecorder(granularity_seconds=60)
+    assert not recorder.record(uuid4(), previous=datetime.utcnow() - timedelta(seconds=5))
+    assert recorder.pending_count() == 0
+
+def test_flush_writes_pending_in_batch(db_session: Session, last_login_user: User):
+    recorder = LastLoginRecorder(granularity_seconds=60)
+    seen_at = datetime(2025, 6, 14, 12, 0, 0)
+    recorder.record(last_login_user.id, seen_at=seen_at)
+
+    assert recorder.flush(db_session) == 1
+    db_session.refresh(last_login_user)
+    assert last_login_user.last_login == seen_at
+    assert recorder.pending_count() == 0
+    assert recorder.flush(db_session) == 0
@@ -0,0 +1,60 @@
+import pytest
+from unittest.mock import MagicMock
+from openai import RateLimitError
+
+from app.services.llm_rate_limiter import (
+    AdaptiveConcurrency, LLMRateLimiter, LocalTokenBucket, estimate_tokens, retry_after_seconds
+)
+
+def make_rate_limit_error(retry_after="2"):
+    response = MagicMock(status_code=429, headers={"retry-after": retry_after})
+    return RateLimitError("Rate limit reached", response=response, body=None)
+
+def test_local_bucket_limits_requests_per_minute():
+    now = [0.0]
+    bucket = LocalTokenBucket(requests_per_minute=2, tokens_per_minute=10_000, timer=lambda: now[0])
+    assert bucket.try_acquire(10) == 0
+    assert bucket.try_acquire(10) == 0
+    assert bucket.try_acquire(10) == pytest.approx(30.0)
+    now[0] = 30.0
+    assert bucket.try_acquire(10) == 0
+
+def test_local_bucket_limits_tokens_per_minute_and_cooldown():
+    now = [0.0]
+    bucket = LocalTokenBucket(requests_per_minute=100, tokens_per_minute=600, timer=lambda: now[0])
+    assert bucket.try_acquire(500) == 0
+    assert bucket.try_acquire(200) == pytest.approx(10.0)
+    now[0] = 10.0
+    bucket.cooldown(5)
+    assert bucket.try_acquire(1) == pytest.approx(5.0)
+
+def test_adaptive_concurrency_aimd():
+    concurrency = AdaptiveConcurrency(initial=4, latency_target_seconds=1.0)
+    assert all(concurrency.try_acquire() for _ in range(4))
+    assert not concurrency.try_acquire()
+    concurrency.on_overload()
+    assert concurrency.limit == 2
+    concurrency.on_success(latency_seconds=0.1)
+    assert concurrency.limit == 2.5
+    concurrency.on_success(latency_seconds=5.0)
+    assert concurrency.limit == 1.25
+
+@pytest.mark.asyncio
+async def test_limiter_backs_off_fleet_on_429():
+    bucket = MagicMock()
+    bucket.try_acquire.return_value = 0
+    concurrency = AdaptiveConcurrency(initial=4)
+    limiter = LLMRateLimiter(bucket, concurrency)
+
+    with pytest.raises(RateLimitError):
+        async with limiter.limit(estimated_tokens=100):
+            raise make_rate_limit_error("2")
+
+    bucket.cooldown.assert_called_once_with(2.0)
+    assert concurrency.limit == 2
+    assert concurrency.in_flight == 0
+
+def test_estimate_tokens_and_retry_after():
+    assert estimate_tokens("x" * 400, max_tokens=1000, image_count=1) == 100 + 85 + 1000
+    assert retry_after_seconds(make_rate_limit_error("1.5")) == 1.5
+    assert retry_after_seconds(ValueError("no response")) is None
@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from openai import APIConnectionError, BadRequestError, RateLimitError
+
+from app.services.llm_rate_limiter import AdaptiveConcurrency, LLMRateLimiter
+from app.services.llm_resilience import (
+    CircuitBreaker, CircuitOpenError, LatencyTracker, ResilientLLMCaller, backoff_delay
+)
+
+def make_limiter():
+    bucket = MagicMock()
+    bucket.try_acquire.return_value = 0
+    return LLMRateLimiter(bucket, AdaptiveConcurrency(initial=8))
+
+def make_caller(breaker=None, **kwargs):
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    caller = ResilientLLMCaller(
+        "test", make_limiter(), breaker or CircuitBreaker("test"), sleep=fake_sleep, **kwargs
+    )
+    return caller, sleeps
+
+def connection_error():
+    return APIConnectionError(request=MagicMock())
+
+def test_backoff_delay_is_bounded_and_honors_retry_after():
+    for attempt in range(6):
+        assert 0 <= backoff_delay(attempt, 1.0, 8.0) <= min(8.0, 2 ** attempt)
+    assert backoff_delay(0, 1.0, 8.0, retry_after=5.0) >= 5.0
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried():
+    caller, sleeps = make_caller()
+    calls = []
+
+    async def request():
+        calls.append(1)
+        if len(calls) < 3:
+            raise connection_error()
+        return "ok"
+
+    assert await caller.call(request, estimated_tokens=100) == "ok"
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+@pytest.mark.asyncio
+async def test_rate_limit_waits_for_retry_after_without_tripping_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    caller, sleeps = make_caller(breaker)
+    calls = []
+
+    async def request():
+        calls.append(1)
+        if len(calls) == 1:
+            response = MagicMock(status_code=429, headers={"retry-after": "3"})
+            raise RateLimitError("Rate limit reached", response=response, body=None)
+        return "ok"
+
+    assert await caller.call(request, estimated_tokens=100) == "ok"
+    assert sleeps[0] >= 3.0
+    assert breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    caller, sleeps = make_caller()
+    calls = []
+
+    async def request():
+        calls.append(1)
+        raise BadRequestError("bad", response=MagicMock(status_code=400), body=None)
+
+    with pytest.raises(BadRequestError):
+        await caller.call(request, estimated_tokens=100)
+    assert len(calls) == 1
+    assert sleeps == []
+
+@pytest.mark.asyncio
+async def test_circuit_opens_then_half_opens():
+    now = [0.0]
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30, timer=lambda: now[0])
+    caller, _ = make_caller(breaker)
+
+    async def failing():
+        raise connection_error()
+
+    with pytest.raises(APIConnectionError):
+        await caller.call(failing, estimated_tokens=100)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    async def succeeding():
+        return "ok"
+
+    with pytest.raises(CircuitOpenError):
+        await caller.call(succeeding, estimated_tokens=100)
+
+    now[0] = 31.0
+    assert await caller.call(succeeding, estimated_tokens=100) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_hedged_request_returns_faster_response():
+    latency = LatencyTracker(min_samples=1)
+    latency.add(0.01)
+    caller, _ = make_caller(hedge=True, latency=latency)
+    calls = []
+
+    async def request():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+            return "slow"
+        return "fast"
+
+    assert await caller.call(request, estimated_tokens=100) == "fast"
+    assert caller.hedges_sent == 1
@@ -0,0 +1,60 @@
+import uuid
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from tools.loadtest import Recorder, check_targets, parse_args, percentile, run_load_test
+
+def fake_api() -> FastAPI:
+    """Just enough of the API for one virtual user's upload -> poll -> history loop."""
+    api = FastAPI()
+    polls = {}
+
+    @api.post("/api/v1/users/register")
+    async def register():
+        return {}
+
+    @api.post("/api/v1/users/login")
+    async def login():
+        return {"access_token": "token", "token_type": "bearer"}
+
+    @api.post("/api/v1/food-images/")
+    async def upload():
+        task_id = str(uuid.uuid4())
+        polls[task_id] = 0
+        return {"id": str(uuid.uuid4()), "task_id": task_id}
+
+    @api.get("/api/v1/tasks/status")
+    async def status(task_id: str):
+        polls[task_id] += 1
+        state = "completed" if polls[task_id] >= 2 else "processing"
+        return {"tasks": [{"task_id": task_id, "status": state}]}
+
+    @api.post("/api/v1/food-history/")
+    async def history():
+        return {}
+
+    return api
+
+def test_percentile_and_targets():
+    assert percentile([], 95) is None
+    assert percentile([float(i) for i in range(1, 101)], 95) == 95.0
+
+    recorder = Recorder()
+    for _ in range(20):
+        recorder.record("GET /fast", 0.05)
+        recorder.record("GET /slow", 0.5)
+        recorder.record("stage:end_to_end", 5.0)
+    assert check_targets(recorder.summary(elapsed=1.0)) == ["GET /slow"]
+
+@pytest.mark.asyncio
+async def test_load_test_drives_full_flow():
+    args = parse_args(["--base-url", "http://test", "--users", "2", "--spawn-rate", "100",
+                       "--iterations", "2", "--think-time", "0", "--poll-interval", "0"])
+    report = await run_load_test(args, transport=httpx.ASGITransport(app=fake_api()))
+
+    results = report["results"]
+    assert results["POST /food-images/"]["count"] == 4
+    assert results["POST /food-history/"]["count"] == 4
+    assert results["GET /tasks/status"]["count"] == 8
+    assert results["stage:end_to_end"]["errors"] == 0
@@ -0,0 +1,69 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core import celery_metrics
+from app.main import app
+from app.services.llm_rate_limiter import AdaptiveConcurrency, LLMRateLimiter
+from app.services.llm_resilience import CircuitBreaker, ResilientLLMCaller
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_http_latency_labelled_by_route_template():
+    client = TestClient(app)
+    before = sample("http_request_duration_seconds_count", method="GET", route="/api/v1/food-history/{history_id}", status="401")
+
+    client.get("/api/v1/food-history/123")
+    client.get("/api/v1/food-history/456")
+
+    after = sample("http_request_duration_seconds_count", method="GET", route="/api/v1/food-history/{history_id}", status="401")
+    assert after - before == 2
+    body = client.get("/metrics").text
+    assert "db_pool_checked_out" in body
+    assert "/api/v1/food-history/123" not in body
+
+@pytest.mark.asyncio
+async def test_llm_call_latency_and_tokens_by_model():
+    bucket = MagicMock()
+    bucket.try_acquire.return_value = 0
+    caller = ResilientLLMCaller("metrics-test", LLMRateLimiter(bucket, AdaptiveConcurrency(initial=2)), CircuitBreaker("metrics-test"))
+    before = sample("llm_tokens_total", model="gpt-4", kind="prompt")
+
+    async def request():
+        return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+
+    await caller.call(request, estimated_tokens=200, model="gpt-4")
+
+    assert sample("llm_tokens_total", model="gpt-4", kind="prompt") - before == 120
+    assert sample("llm_call_duration_seconds_count", model="gpt-4", stage="metrics-test") == 1
+
+def test_celery_queue_wait_and_runtime():
+    task = SimpleNamespace(
+        name="estimate_nutrients",
+        request=SimpleNamespace(delivery_info={"routing_key": "nutrients"}, published_at=None),
+    )
+    headers = {}
+    celery_metrics.stamp_published_at(headers=headers)
+    task.request.published_at = headers["published_at"]
+
+    celery_metrics.observe_task_start(task_id="t-1", task=task)
+    celery_metrics.observe_task_end(task_id="t-1", task=task, state="SUCCESS")
+
+    assert sample("celery_task_queue_wait_seconds_count", task_name="estimate_nutrients", queue="nutrients") >= 1
+    assert sample("celery_task_runtime_seconds_count", task_name="estimate_nutrients", queue="nutrients", state="SUCCESS") >= 1
+
+def test_worker_exporter_needs_multiprocess_dir_under_prefork(monkeypatch):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    monkeypatch.setattr(celery_metrics.settings, "WORKER_METRICS_PORT", 9101)
+    monkeypatch.setattr(celery_metrics, "register_db_pool_metrics", MagicMock())
+    server = MagicMock()
+    monkeypatch.setattr(celery_metrics, "start_worker_metrics_server", server)
+
+    celery_metrics.start_metrics_exporter(sender=SimpleNamespace(pool_cls="prefork"))
+    server.assert_not_called()
+
+    celery_metrics.start_metrics_exporter(sender=SimpleNamespace(pool_cls="solo"))
+    server.assert_called_once_with(9101)
@@ -0,0 +1,77 @@
+import json
+import pytest
+from types import SimpleNamespace
+from prometheus_client import REGISTRY
+
+from app.services.model_cascade import ModelCascade, parse_models
+
+class PassThroughCaller:
+    async def call(self, make_request, estimated_tokens, model="unknown"):
+        return await make_request()
+
+def sample(**labels):
+    return REGISTRY.get_sample_value("llm_cascade_answers_total", labels) or 0.0
+
+def cascade(models, stage="cascade-test"):
+    return ModelCascade(stage, models, caller=PassThroughCaller())
+
+def confidence_reply(replies):
+    calls = []
+
+    async def request(model):
+        calls.append(model)
+        return replies[model]
+
+    return request, calls
+
+@pytest.mark.asyncio
+async def test_confident_cheap_answer_is_not_escalated():
+    request, calls = confidence_reply({"cheap": {"confidence": 0.9}, "strong": {"confidence": 1.0}})
+    answer = await cascade(["cheap", "strong"]).run(
+        request, lambda reply: reply["confidence"], estimated_tokens=10, accept=lambda value: value >= 0.6
+    )
+    assert (answer.value, answer.model, answer.tier) == (0.9, "cheap", 0)
+    assert calls == ["cheap"]
+
+@pytest.mark.asyncio
+async def test_low_confidence_and_invalid_replies_escalate():
+    before = {outcome: sample(stage="cascade-escalation", model=model, outcome=outcome)
+              for model, outcome in (("nano", "invalid"), ("mini", "low_confidence"), ("large", "answered"))}
+    request, calls = confidence_reply({"nano": "not json", "mini": '{"confidence": 0.2}', "large": '{"confidence": 0.3}'})
+
+    answer = await cascade(["nano", "mini", "large"], stage="cascade-escalation").run(
+        request, lambda reply: json.loads(reply)["confidence"], estimated_tokens=10, accept=lambda value: value >= 0.6
+    )
+    # The last model's answer is used even though it is unsure
+    assert (answer.value, answer.model, answer.tier) == (0.3, "large", 2)
+    assert calls == ["nano", "mini", "large"]
+    assert sample(stage="cascade-escalation", model="nano", outcome="invalid") - before["invalid"] == 1
+    assert sample(stage="cascade-escalation", model="mini", outcome="low_confidence") - before["low_confidence"] == 1
+    assert sample(stage="cascade-escalation", model="large", outcome="answered") - before["answered"] == 1
+
+@pytest.mark.asyncio
+async def test_invalid_reply_from_last_model_raises():
+    request, _ = confidence_reply({"only": "not json"})
+    with pytest.raises(json.JSONDecodeError):
+        await cascade(["only"]).run(request, json.loads, estimated_tokens=10)
+
+@pytest.mark.asyncio
+async def test_run_each_sends_only_unanswered_items_on():
+    batches = []
+
+    async def request(model, batch):
+        batches.append((model, list(batch)))
+        return SimpleNamespace(model=model)
+
+    def parse(reply, batch):
+        # The cheap model can't answer items starting with "x"
+        return [None if reply.model == "cheap" and item.startswith("x") else item.upper() for item in batch]
+
+    answers = await cascade(["cheap", "strong"]).run_each(["a", "xb", "c", "xd"], request, parse, estimated_tokens=len)
+    assert batches == [("cheap", ["a", "xb", "c", "xd"]), ("strong", ["xb", "xd"])]
+    assert [(answer.value, answer.model) for answer in answers] == [("A", "cheap"), ("XB", "strong"), ("C", "cheap"), ("XD", "strong")]
+
+def test_parse_models_and_empty_cascade():
+    assert parse_models(" gpt-4.1-nano, gpt-4.1-mini ,") == ["gpt-4.1-nano", "gpt-4.1-mini"]
+    with pytest.raises(ValueError):
+        ModelCascade("vision", [])
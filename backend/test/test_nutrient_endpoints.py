@@ -40,10 +40,10 @@ def sample_food_items():
     ]
 
 def test_estimate_nutrients_endpoint(client, sample_food_items):
-    with patch('backend.app.tasks.nutrient_tasks.estimate_nutrients_task.delay') as mock_delay:
+    with patch('backend.app.tasks.nutrient_tasks.estimate_nutrients_task.apply_async') as mock_apply_async:
         mock_task = MagicMock()
         mock_task.id = 'test-task-id'
-        mock_delay.return_value = mock_task
+        mock_apply_async.return_value = mock_task
         response = client.post(
             "/api/v1/nutrients/estimate",
             json={"food_items": sample_food_items}
@@ -54,7 +54,21 @@ def test_estimate_nutrients_endpoint(client, sample_food_items):
         data = response.json()
         assert "task_id" in data
         assert data["status"] == "processing"
-        mock_delay.assert_called_once()
+        mock_apply_async.assert_called_once()
+        assert mock_apply_async.call_args.kwargs["queue"] == "nutrients"
+        # The caller's ID travels with the task so its progress reaches their event stream
+        assert mock_apply_async.call_args.args[1]["user_id"] == "bce6bd0f-22fc-4183-a2f4-fe2e14bb04a5"
+
+def test_estimate_nutrients_endpoint_bulk_lane(client, sample_food_items):
+    with patch('backend.app.tasks.nutrient_tasks.estimate_nutrients_task.apply_async') as mock_apply_async:
+        mock_apply_async.return_value = MagicMock(id='test-task-id')
+        response = client.post(
+            "/api/v1/nutrients/estimate",
+            json={"food_items": sample_food_items, "lane": "bulk"}
+        )
+        assert response.status_code == 200
+        assert mock_apply_async.call_args.kwargs["queue"] == "nutrients_bulk"
+        assert mock_apply_async.call_args.kwargs["headers"] == {"lane": "bulk"}
 
 def test_get_task_status_processing(client):
     with patch('backend.app.api.endpoints.nutrients.celery_app.AsyncResult') as mock_async_result:
@@ -99,4 +113,14 @@ def test_get_task_status_failed(client):
         data = response.json()
         assert data["task_id"] == "test-task-id"
         assert data["status"] == "failed"
-        assert "error" in data 
\ No newline at end of file
+        assert "error" in data 
+def test_create_estimation_job_rejects_only_unreadable_uploads(client):
+    with patch('app.api.endpoints.nutrients.BulkEstimationService.create_job') as mock_create_job:
+        mock_create_job.side_effect = UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+        response = client.post("/api/v1/nutrients/jobs", content=b"\xff", headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 400
+
+        # A storage or broker failure isn't the client's fault
+        mock_create_job.side_effect = RuntimeError("broker unavailable")
+        with pytest.raises(RuntimeError):
+            client.post("/api/v1/nutrients/jobs", content=b"{}", headers={"Content-Type": "application/x-ndjson"})
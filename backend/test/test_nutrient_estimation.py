@@ -1,10 +1,13 @@
 import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock
+from app.core.config import settings
+from app.services.model_cascade import ModelCascade
 from app.services.nutrient_estimation import NutrientEstimationService, FoodItem, NutrientProfile
 
 # Example test for the nutrient estimation function
 
+
 @pytest.mark.asyncio
 async def test_estimate_nutrients_basic():
     # Mock OpenAI client
@@ -37,4 +40,62 @@ async def test_estimate_nutrients_basic():
     assert profile.nutrients["iron_mg"] == 0.5
     assert profile.nutrients["fiber_g"] == 2
 
-# Add more tests for edge cases, invalid input, etc. 
\ No newline at end of file
+
+@pytest.mark.asyncio
+async def test_estimate_nutrients_batch_dedupes_and_uses_cache():
+    nutrients = '{"iron_mg": 0.5, "potassium_mg": 100, "magnesium_mg": 10, "calcium_mg": 5, "vitamin_d_mcg": 0.1, "vitamin_b12_mcg": 0.01, "folate_mcg": 2, "zinc_mg": 0.2, "selenium_mcg": 1, "fiber_g": 2}'
+    mock_openai_client = AsyncMock()
+    mock_response = MagicMock()
+    mock_response.choices = [
+        MagicMock(message=MagicMock(function_call=MagicMock(arguments='{"items": {"1": %s}}' % nutrients)))
+    ]
+    mock_openai_client.chat.completions.create.return_value = mock_response
+    service = NutrientEstimationService(mock_openai_client, cascade=ModelCascade("nutrients", ["gpt-4"]))
+
+    def item(description):
+        return FoodItem(description=description, quantity=1, unit="piece", confidence=1.0, is_estimated=False)
+
+    # "SPINACH" is answered, "Kale" is missing from the reply
+    results = await service.estimate_nutrients_batch([item("SPINACH"), item("spinach"), item("Kale")])
+    assert [profile is not None for _, profile in results] == [True, True, False]
+    assert mock_openai_client.chat.completions.create.await_count == 1
+
+    progress = []
+    results = await service.estimate_nutrients_batch([item("spinach")], on_progress=progress.append)
+    assert results[0][1].nutrients["iron_mg"] == 0.5
+    assert progress == [1]
+    assert mock_openai_client.chat.completions.create.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_escalates_only_unanswered_items():
+    nutrients = '{"iron_mg": 0.5, "potassium_mg": 100, "magnesium_mg": 10, "calcium_mg": 5, "vitamin_d_mcg": 0.1, "vitamin_b12_mcg": 0.01, "folate_mcg": 2, "zinc_mg": 0.2, "selenium_mcg": 1, "fiber_g": 2}'
+
+    def reply(arguments):
+        return MagicMock(choices=[MagicMock(message=MagicMock(function_call=MagicMock(arguments=arguments)))])
+
+    mock_openai_client = AsyncMock()
+    # The cheap model answers spinach, and kale without its fiber; the strong model gets kale alone
+    mock_openai_client.chat.completions.create.side_effect = [
+        reply('{"items": {"1": %s, "2": %s}}' % (nutrients, nutrients.replace(', "fiber_g": 2', ""))),
+        reply('{"items": {"1": %s}}' % nutrients),
+    ]
+    service = NutrientEstimationService(mock_openai_client, cascade=ModelCascade("nutrients", ["cheap", "strong"]))
+
+    def item(description):
+        return FoodItem(description=description, quantity=1, unit="piece", confidence=1.0, is_estimated=False)
+
+    results = await service.estimate_nutrients_batch([item("Spinach"), item("Kale")])
+    assert [profile.estimated_by for _, profile in results] == ["cheap", "strong"]
+    second_call = mock_openai_client.chat.completions.create.await_args_list[1].kwargs
+    assert second_call["model"] == "strong"
+    assert "1. Kale" in second_call["messages"][0]["content"] and "Spinach" not in second_call["messages"][0]["content"]
+
+
+def test_nutrient_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "NUTRIENT_CACHE_MAXSIZE", 2)
+    service = NutrientEstimationService(AsyncMock())
+    for name in ("apple", "pear", "plum"):
+        service._add_to_cache(name, name)
+    assert len(service.nutrient_cache) == 2
+    assert service._get_from_cache("apple") is None and service._get_from_cache("PLUM") == "plum"
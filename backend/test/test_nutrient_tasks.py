@@ -6,7 +6,7 @@ from datetime import datetime
 
 @pytest.fixture
 def mock_openai_client():
-    with patch('app.tasks.nutrient_tasks.AsyncOpenAI') as mock:
+    with patch('app.tasks.nutrient_tasks.get_async_openai') as mock:
         client = AsyncMock()
         mock.return_value = client
         yield client
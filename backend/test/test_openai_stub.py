@@ -0,0 +1,69 @@
+import json
+import random
+import httpx
+import pytest
+from openai import AsyncOpenAI, RateLimitError
+
+from tools.openai_stub import StubConfig, create_app
+
+def stub_client(config: StubConfig) -> AsyncOpenAI:
+    transport = httpx.ASGITransport(app=create_app(config))
+    return AsyncOpenAI(
+        api_key="stub",
+        base_url="http://stub/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=transport, base_url="http://stub/v1"),
+    )
+
+@pytest.mark.asyncio
+async def test_function_call_follows_schema_and_is_deterministic():
+    client = stub_client(StubConfig(latency="fixed", latency_ms=0))
+    schema = {
+        "name": "get_nutrient_profile",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "nutrients": {"type": "object", "properties": {"iron_mg": {"type": "number"}, "fiber_g": {"type": "number"}}}
+            },
+        },
+    }
+    kwargs = dict(
+        model="gpt-4",
+        messages=[{"role": "user", "content": "Estimate nutrients for apple"}],
+        functions=[schema],
+        function_call={"name": "get_nutrient_profile"},
+    )
+
+    first = await client.chat.completions.create(**kwargs)
+    second = await client.chat.completions.create(**kwargs)
+
+    arguments = json.loads(first.choices[0].message.function_call.arguments)
+    assert set(arguments["nutrients"]) == {"iron_mg", "fiber_g"}
+    assert first.choices[0].message.function_call.arguments == second.choices[0].message.function_call.arguments
+
+@pytest.mark.asyncio
+async def test_image_input_returns_food_items():
+    client = stub_client(StubConfig(latency="fixed", latency_ms=0))
+    response = await client.chat.completions.create(
+        model="gpt-4.1-nano",
+        messages=[{"role": "user", "content": [
+            {"type": "text", "text": "Identify all food items"},
+            {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}},
+        ]}],
+    )
+
+    items = json.loads(response.choices[0].message.content)
+    assert items and all({"description", "quantity", "confidence"} <= set(item) for item in items)
+
+@pytest.mark.asyncio
+async def test_rate_limit_injection():
+    client = stub_client(StubConfig(latency="fixed", latency_ms=0, rate_limit_rate=1.0, retry_after_seconds=2))
+    with pytest.raises(RateLimitError) as exc_info:
+        await client.chat.completions.create(model="gpt-4", messages=[{"role": "user", "content": "hi"}])
+    assert exc_info.value.response.headers["retry-after"] == "2"
+
+def test_latency_distributions():
+    rng = random.Random(0)
+    assert StubConfig(latency="fixed", latency_ms=250).sample_latency(rng) == 0.25
+    samples = [StubConfig(latency="uniform", latency_ms=100, latency_spread=0.5).sample_latency(rng) for _ in range(100)]
+    assert all(0.05 <= sample <= 0.15 for sample in samples)
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import pytest
+from types import SimpleNamespace
+from passlib.context import CryptContext
+
+from app.services import user_service
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4), max_workers=2, max_queue=2)
+
+@pytest.mark.asyncio
+async def test_hash_and_verify(hasher):
+    hashed = await hasher.hash("correct horse")
+    assert await hasher.verify_and_update("correct horse", hashed) == (True, None)
+    valid, _ = await hasher.verify_and_update("wrong", hashed)
+    assert not valid
+    assert hasher.stats()["completed"] == 3
+
+@pytest.mark.asyncio
+async def test_rehash_when_cost_changes(hasher):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("correct horse")
+    valid, new_hash = await hasher.verify_and_update("correct horse", old_hash)
+    assert valid
+    assert new_hash is not None and new_hash.startswith("$2b$04$")
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_full():
+    hasher = PasswordHasher(CryptContext(schemes=["bcrypt"]), max_workers=1, max_queue=0)
+    release = threading.Event()
+    blocked = asyncio.ensure_future(hasher._run(release.wait))
+    await asyncio.sleep(0.05)
+    assert hasher.stats()["in_flight"] == 1
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("password")
+    release.set()
+    await blocked
+    assert hasher.stats()["rejected"] == 1
+
+@pytest.mark.asyncio
+async def test_authentication_queries_run_off_the_event_loop(hasher, monkeypatch):
+    loop_thread = threading.current_thread()
+    lookups = []
+
+    def get_user_by_email(db, email):
+        lookups.append(threading.current_thread())
+        return SimpleNamespace(email=email, hashed_password=hasher.context.hash("correct horse"))
+
+    monkeypatch.setattr(user_service, "get_user_by_email", get_user_by_email)
+    monkeypatch.setattr(user_service, "password_hasher", hasher)
+    assert await user_service.authenticate_user_async(None, "a@example.com", "correct horse") is not None
+    assert lookups and lookups[0] is not loop_thread
@@ -0,0 +1,72 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.main import app
+from app.services import profiler
+from app.services.profiler import finish_task_profile, profiling_middleware, start_task_profile
+
+def profiled_app() -> FastAPI:
+    api = FastAPI()
+    api.middleware("http")(profiling_middleware)
+
+    @api.get("/slow/{item_id}")
+    async def slow(item_id: str):
+        time.sleep(0.01)
+        return {}
+
+    return api
+
+def test_request_profiled_only_when_flagged():
+    store = MagicMock()
+    with patch.object(profiler, "profile_store", store), \
+            patch.object(profiler.settings, "PROFILING_ALLOW_HEADER", True), \
+            patch.object(profiler.settings, "PROFILING_SAMPLE_RATE", 0.0):
+        client = TestClient(profiled_app())
+        plain = client.get("/slow/1")
+        flagged = client.get("/slow/1", headers={"X-Profile": "1", "X-Request-ID": "req-1"})
+
+    assert "X-Profile-Id" not in plain.headers
+    assert flagged.headers["X-Profile-Id"] == "req-1"
+    summary, captured = store.save.call_args.args
+    assert summary.kind == "request"
+    assert summary.name == "GET /slow/{item_id}"
+    assert "slow" in captured.output_text()
+
+def test_header_ignored_unless_allowed():
+    store = MagicMock()
+    with patch.object(profiler, "profile_store", store), \
+            patch.object(profiler.settings, "PROFILING_ALLOW_HEADER", False), \
+            patch.object(profiler.settings, "PROFILING_SAMPLE_RATE", 0.0):
+        TestClient(profiled_app()).get("/slow/1", headers={"X-Profile": "1"})
+    store.save.assert_not_called()
+
+def test_task_profiled_when_sent_with_profile_header():
+    store = MagicMock()
+    task = SimpleNamespace(name="estimate_nutrients", request=SimpleNamespace(profile=True))
+    with patch.object(profiler, "profile_store", store):
+        start_task_profile("task-1", task)
+        time.sleep(0.01)
+        finish_task_profile("task-1")
+
+    summary, _ = store.save.call_args.args
+    assert (summary.profile_id, summary.kind, summary.name) == ("task-1", "task", "estimate_nutrients")
+
+def test_profile_endpoints():
+    store = MagicMock()
+    store.list_recent.return_value = [
+        {"profile_id": "task-1", "kind": "task", "name": "estimate_nutrients", "duration_ms": 12.5, "created_at": 1.0}
+    ]
+    store.get.side_effect = lambda profile_id: {"html": "<html></html>", "text": "profile"} if profile_id == "task-1" else None
+    app.dependency_overrides[deps.get_current_user] = lambda: SimpleNamespace(id="user")
+    try:
+        with patch("app.api.endpoints.profiles.profile_store", store):
+            client = TestClient(app)
+            assert client.get("/api/v1/profiles/").json()[0]["profile_id"] == "task-1"
+            assert client.get("/api/v1/profiles/task-1", params={"format": "text"}).text == "profile"
+            assert client.get("/api/v1/profiles/missing").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,38 @@
+from app.services.receipt_parser import parse_receipt_text
+
+RECEIPT = """WHOLE FOODS MARKET
+123 MAIN ST, AUSTIN TX
+ORG BNNA 2.31LB @ 0.79/LB   1.82 F
+SPINACH BABY 5OZ           3.99 F
+AVOCADO HASS
+2 @ 1.29                   2.58 F
+4011 APPLES GALA           1.50
+2 X 0.99
+YOGURT GREEK 0001234567    1.98
+COUPON YOGURT             -0.50
+SUBTOTAL                  11.87
+TAX                        0.00
+TOTAL                     11.87
+VISA ****1234             11.87
+"""
+
+def test_parses_items_quantities_and_prices():
+    receipt = parse_receipt_text(RECEIPT)
+
+    assert receipt.store_name == "WHOLE FOODS MARKET"
+    assert [(line.description, line.quantity, line.unit, line.price) for line in receipt.lines] == [
+        ("ORG BNNA", 2.31, "lb", 1.82),
+        ("SPINACH BABY", 5.0, "oz", 3.99),
+        ("AVOCADO HASS", 2.0, "piece", 2.58),
+        ("APPLES GALA", 2.0, "piece", 1.50),
+        ("YOGURT GREEK", 1.0, "piece", 1.98),
+    ]
+
+def test_weight_line_under_item_name():
+    receipt = parse_receipt_text("STORE\nBANANAS\n1.25 lb @ 0.59 /lb   0.74\n")
+
+    [line] = receipt.lines
+    assert (line.description, line.quantity, line.unit, line.price) == ("BANANAS", 1.25, "lb", 0.74)
+
+def test_text_without_items():
+    assert parse_receipt_text("THANK YOU FOR SHOPPING\n").lines == []
@@ -0,0 +1,116 @@
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.models.receipt import Receipt
+from app.models.user import User
+from app.schemas.receipt import ReceiptCreate
+from app.services.nutrient_estimation import NutrientEstimationService
+from app.services.receipt_service import ReceiptService
+from app.services.sku_matcher import Food, SkuMatcher
+
+NUTRIENTS = {
+    "iron_mg": 1.0, "potassium_mg": 100.0, "magnesium_mg": 10.0, "calcium_mg": 5.0, "vitamin_d_mcg": 0.0,
+    "vitamin_b12_mcg": 0.0, "folate_mcg": 2.0, "zinc_mg": 0.2, "selenium_mcg": 1.0, "fiber_g": 2.0,
+}
+
+def batch_reply(**kwargs):
+    """Answer every numbered item in the batch request."""
+    numbers = kwargs["functions"][0]["parameters"]["properties"]["items"]["required"]
+    arguments = json.dumps({"items": {number: NUTRIENTS for number in numbers}})
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(function_call=SimpleNamespace(arguments=arguments)))],
+        usage=None,
+    )
+
+@pytest.fixture
+def savepoint_session(db_session: Session):
+    session = Session(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+
+@pytest.fixture
+def matcher():
+    # No LLM client: ambiguous lines stay unmatched
+    return SkuMatcher([Food("Bananas, raw", "173944"), Food("Milk, whole"), Food("Milk, lowfat")])
+
+@pytest.fixture
+def user(savepoint_session: Session):
+    user = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x", demographics={}, settings={})
+    savepoint_session.add(user)
+    savepoint_session.commit()
+    return user
+
+def forty_line_receipt() -> str:
+    lines = ["CORNER GROCERY"]
+    lines += [f"ITEM NUMBER {chr(65 + i % 26)}{i // 26} 1.00LB   {i + 1}.00" for i in range(40)]
+    lines += ["TOTAL   820.00"]
+    return "\n".join(lines)
+
+@pytest.mark.asyncio
+async def test_receipt_is_estimated_in_batches(savepoint_session: Session, user: User, matcher: SkuMatcher):
+    openai_client = AsyncMock()
+    openai_client.chat.completions.create.side_effect = batch_reply
+    service = ReceiptService(savepoint_session, estimation_service=NutrientEstimationService(openai_client), matcher=matcher)
+    receipt = service.create_from_text(user.id, ReceiptCreate(ocr_text=forty_line_receipt()))
+    progress = []
+
+    with patch("app.services.receipt_service.settings.RECEIPT_ESTIMATION_BATCH_SIZE", 20):
+        result = await service.process_receipt(str(receipt.id), on_progress=lambda *args: progress.append(args))
+
+    # 40 distinct lines -> two batched calls instead of 40
+    assert openai_client.chat.completions.create.await_count == 2
+    assert result["item_count"] == 40
+    assert result["estimated_item_count"] == 40
+    assert progress[-1] == ("estimating", 40, 40)
+    savepoint_session.refresh(receipt)
+    assert receipt.status == "processed"
+    assert receipt.store_name == "CORNER GROCERY"
+    assert [item.position for item in receipt.items] == list(range(40))
+    # 1 lb of each item, estimates are per 100 g
+    assert receipt.items[0].nutrients["iron_mg"] == pytest.approx(4.536)
+    assert receipt.total_nutrients["iron_mg"] == pytest.approx(40 * 4.536, rel=1e-3)
+
+@pytest.mark.asyncio
+async def test_failed_batch_leaves_items_unestimated(savepoint_session: Session, user: User, matcher: SkuMatcher):
+    openai_client = AsyncMock()
+    openai_client.chat.completions.create.side_effect = ValueError("bad response")
+    service = ReceiptService(savepoint_session, estimation_service=NutrientEstimationService(openai_client), matcher=matcher)
+    receipt = service.create_from_text(user.id, ReceiptCreate(ocr_text="SHOP\nMILK 1 GAL   3.49\n"))
+
+    result = await service.process_receipt(str(receipt.id))
+
+    assert result["status"] == "processed"
+    assert result["estimated_item_count"] == 0
+    savepoint_session.refresh(receipt)
+    assert receipt.items[0].description == "MILK 1 GAL"
+    assert receipt.items[0].nutrients is None
+
+@pytest.mark.asyncio
+async def test_failure_marks_receipt_failed(savepoint_session: Session, user: User, matcher: SkuMatcher):
+    service = ReceiptService(savepoint_session, estimation_service=NutrientEstimationService(AsyncMock()), matcher=matcher)
+    receipt = service.create_from_text(user.id, ReceiptCreate(ocr_text="SHOP\nMILK   3.49\n"))
+
+    with patch("app.services.receipt_service.parse_receipt_text", side_effect=RuntimeError("boom")):
+        with pytest.raises(HTTPException):
+            await service.process_receipt(str(receipt.id))
+
+    assert savepoint_session.get(Receipt, receipt.id).status == "failed"
+
+@pytest.mark.asyncio
+async def test_lines_matching_one_food_share_an_estimate(savepoint_session: Session, user: User, matcher: SkuMatcher):
+    openai_client = AsyncMock()
+    openai_client.chat.completions.create.side_effect = batch_reply
+    service = ReceiptService(savepoint_session, estimation_service=NutrientEstimationService(openai_client), matcher=matcher)
+    receipt = service.create_from_text(user.id, ReceiptCreate(ocr_text="SHOP\nORG BNNA 2LB   1.50\nBANANAS   0.99\n"))
+
+    await service.process_receipt(str(receipt.id))
+
+    savepoint_session.refresh(receipt)
+    assert [(item.description, item.fdc_id) for item in receipt.items] == [("Bananas, raw", "173944")] * 2
+    [call] = openai_client.chat.completions.create.await_args_list
+    assert call.kwargs["functions"][0]["parameters"]["properties"]["items"]["required"] == ["1"]
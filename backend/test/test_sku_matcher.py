@@ -0,0 +1,68 @@
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from sqlalchemy.orm import Session
+
+from app.models.sku_mapping import SkuMapping
+from app.services.sku_matcher import Food, InvertedIndex, SkuMatcher, tokenize
+
+FOODS = [
+    Food("Bananas, raw", "1"),
+    Food("Babyfood, fruit, bananas and tapioca, strained", "2"),
+    Food("Spinach, raw", "3"),
+    Food("Milk, whole, 3.25% milkfat", "4"),
+    Food("Milk, lowfat, 1% milkfat", "5"),
+    Food("Beer, regular", "6"),
+]
+
+def choose(choices):
+    arguments = json.dumps({"choices": choices})
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(function_call=SimpleNamespace(arguments=arguments)))],
+        usage=None,
+    )
+
+def test_bm25_prefers_shorter_description():
+    index = InvertedIndex([food.description for food in FOODS])
+    [(best, _), (second, _)] = index.search(tokenize("banana"), limit=2)
+    assert (best, second) == (0, 1)
+
+def test_abbreviations_expand_to_index_words():
+    matcher = SkuMatcher(FOODS)
+    assert matcher.abbreviations.expand("ORG BNNA") == ["organic", "banana"]
+    # Not in the seed dictionary: guessed from the index vocabulary
+    assert matcher.abbreviations.expand("SPNCH") == ["spinach"]
+    # Same consonants, but "bar" is not an abbreviation of "beer"
+    assert matcher.abbreviations.expand("BAR") == ["bar"]
+
+@pytest.mark.asyncio
+async def test_confident_lines_skip_the_llm_and_are_cached_per_store(db_session: Session):
+    openai_client = AsyncMock()
+    matcher = SkuMatcher(FOODS, openai_client)
+
+    [match] = await matcher.match_lines(db_session, "Corner Grocery", ["ORG BNNA"])
+
+    assert (match.description, match.fdc_id, match.source) == ("Bananas, raw", "1", "index")
+    openai_client.chat.completions.create.assert_not_called()
+    stored = db_session.query(SkuMapping).filter_by(store="corner grocery", sku="ORG BNNA").one()
+    assert stored.fdc_id == "1"
+
+    # A fresh process finds it in the database
+    [again] = await SkuMatcher(FOODS, openai_client).match_lines(db_session, "CORNER  GROCERY", ["org bnna"])
+    assert (again.fdc_id, again.source) == ("1", "sku_cache")
+
+@pytest.mark.asyncio
+async def test_ambiguous_lines_are_resolved_in_one_llm_call(db_session: Session):
+    openai_client = AsyncMock()
+    openai_client.chat.completions.create.return_value = choose({"1": 2, "2": 0})
+    matcher = SkuMatcher(FOODS, openai_client)
+
+    # Both milks score the same for a bare "milk"
+    milk, unknown_milk = await matcher.match_lines(db_session, None, ["MILK", "MILK 1 GAL"])
+
+    assert openai_client.chat.completions.create.await_count == 1
+    assert (milk.description, milk.source) == ("Milk, lowfat, 1% milkfat", "llm")
+    assert not unknown_milk.matched
+    # Only the resolved line is remembered
+    assert [row.sku for row in db_session.query(SkuMapping).filter_by(store="")] == ["MILK"]
@@ -0,0 +1,71 @@
+import json
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from redis import RedisError
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.models.user import User
+from app.services.task_events import (
+    publish_task_event, format_sse, task_channel, user_channel, RECOGNIZING, DONE
+)
+from app.services.task_results import record_tasks_queued
+
+@pytest.fixture
+def test_user(db_session: Session):
+    user = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x", demographics={}, settings={})
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+def test_publish_task_event_to_task_and_user_channels():
+    with patch('app.services.task_events.get_redis') as mock_get_redis:
+        pipe = mock_get_redis.return_value.pipeline.return_value
+        publish_task_event("task-1", RECOGNIZING, user_id="user-1", image_id="image-1")
+
+    channels = [call.args[0] for call in pipe.publish.call_args_list]
+    assert channels == [task_channel("task-1"), user_channel("user-1")]
+    event = json.loads(pipe.publish.call_args_list[0].args[1])
+    assert event["stage"] == RECOGNIZING
+    assert event["image_id"] == "image-1"
+    pipe.set.assert_called_once()
+    pipe.execute.assert_called_once()
+
+def test_publish_task_event_without_task_id_is_noop():
+    with patch('app.services.task_events.get_redis') as mock_get_redis:
+        publish_task_event(None, DONE)
+    mock_get_redis.assert_not_called()
+
+def test_publish_task_event_swallows_redis_errors():
+    with patch('app.services.task_events.get_redis') as mock_get_redis:
+        mock_get_redis.return_value.pipeline.return_value.execute.side_effect = RedisError("down")
+        publish_task_event("task-1", DONE)
+
+def test_format_sse():
+    message = format_sse({"task_id": "task-1", "stage": DONE})
+    assert message.startswith("event: task\nid: task-1:done\ndata: ")
+    assert message.endswith("\n\n")
+
+def test_task_stream_is_only_served_to_the_task_owner(client_with_db, db_session: Session, test_user: User):
+    from app.main import app
+    other = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x", demographics={}, settings={})
+    db_session.add(other)
+    db_session.commit()
+    record_tasks_queued(db_session, "process_receipt", test_user.id, ["own-task"])
+    record_tasks_queued(db_session, "process_receipt", other.id, ["other-task"])
+
+    async def events(channels, task_id=None):
+        yield {"task_id": task_id, "stage": DONE}
+
+    app.dependency_overrides[deps.get_db] = lambda: db_session
+    try:
+        with patch("app.api.endpoints.task_events.stream_events", events):
+            response = client_with_db.get("/api/v1/events/tasks/own-task")
+            assert response.status_code == 200
+            assert '"stage": "done"' in response.text
+            assert client_with_db.get("/api/v1/events/tasks/other-task").status_code == 404
+            assert client_with_db.get("/api/v1/events/tasks/never-queued").status_code == 404
+    finally:
+        app.dependency_overrides.pop(deps.get_db, None)
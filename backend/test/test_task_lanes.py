@@ -0,0 +1,22 @@
+import pytest
+from unittest.mock import patch
+
+from app.core.celery_app import celery_app
+from app.core.task_lanes import BULK, INTERACTIVE, enqueue, queue_for
+from app.tasks.food_image_tasks import process_food_image_task
+
+def test_every_stage_has_both_lanes_declared():
+    for task_name, route in celery_app.conf.task_routes.items():
+        assert route["queue"] == queue_for(task_name, INTERACTIVE)
+        assert queue_for(task_name, BULK) in celery_app.conf.task_queues
+    assert queue_for("some_other_task", BULK) == "default"
+    with pytest.raises(ValueError):
+        queue_for("process_food_image", "urgent")
+
+def test_enqueue_routes_by_lane():
+    with patch.object(process_food_image_task, "apply_async") as apply_async:
+        enqueue(process_food_image_task, "image-1", user_id="user-1", lane=BULK)
+
+    apply_async.assert_called_once_with(
+        ("image-1",), {"user_id": "user-1"}, queue="food_image_bulk", headers={"lane": BULK}
+    )
@@ -0,0 +1,58 @@
+from unittest.mock import patch
+from uuid import uuid4
+from celery import Celery, states
+from sqlalchemy.orm import Session
+
+from app.crud import task_result as crud
+from app.models.user import User
+from app.services import task_status
+from app.services.task_status import get_task_statuses, get_persisted_task_statuses
+from app.services.task_results import is_task_owner, record_tasks_queued
+
+def test_mark_task_started_and_finished(db_session: Session):
+    task_id = str(uuid4())
+    crud.mark_task_started(db_session, task_id=task_id, task_name="estimate_nutrients")
+    crud.mark_task_finished(db_session, task_id=task_id, status=states.RETRY, error="timeout")
+    crud.mark_task_started(db_session, task_id=task_id, task_name="estimate_nutrients")
+    row = crud.mark_task_finished(db_session, task_id=task_id, status=states.SUCCESS, result={"results": []})
+
+    assert row.attempts == 2
+    assert row.status == states.SUCCESS
+    assert row.error is None
+    assert row.runtime_ms is not None and row.runtime_ms >= 0
+
+def test_queued_task_records_its_owner(db_session: Session):
+    user = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x", demographics={}, settings={})
+    db_session.add(user)
+    db_session.commit()
+    task_id = str(uuid4())
+
+    record_tasks_queued(db_session, "process_receipt", user.id, [task_id])
+    assert is_task_owner(db_session, task_id, user.id)
+    assert not is_task_owner(db_session, task_id, uuid4())
+
+    # The worker's start keeps the owner, and a repeated enqueue record is a no-op
+    row = crud.mark_task_started(db_session, task_id=task_id, task_name="process_receipt")
+    record_tasks_queued(db_session, "process_receipt", user.id, [task_id])
+    assert row.user_id == user.id and row.attempts == 1 and row.status == "STARTED"
+
+def test_persisted_status_used_when_redis_status_expired(db_session: Session):
+    done_id, failed_id = str(uuid4()), str(uuid4())
+    crud.mark_task_started(db_session, task_id=done_id, task_name="estimate_nutrients")
+    crud.mark_task_finished(db_session, task_id=done_id, status=states.SUCCESS, result={"results": [1]})
+    crud.mark_task_started(db_session, task_id=failed_id, task_name="estimate_nutrients")
+    crud.mark_task_finished(db_session, task_id=failed_id, status=states.FAILURE, error="API Error")
+
+    memory_app = Celery("test_task_results", backend="cache+memory://")
+    task_status._terminal_cache.clear()
+    with patch.object(task_status, "celery_app", memory_app), \
+            patch.object(task_status, "SessionLocal", lambda: db_session):
+        statuses = get_task_statuses([done_id, failed_id, "never-seen"])
+    task_status._terminal_cache.clear()
+
+    assert statuses[0] == {"task_id": done_id, "status": "completed", "result": {"results": [1]}}
+    assert statuses[1] == {"task_id": failed_id, "status": "failed", "error": "API Error"}
+    assert statuses[2]["status"] == "processing"
+
+def test_persisted_status_lookup_empty():
+    assert get_persisted_task_statuses([]) == {}
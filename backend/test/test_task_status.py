@@ -0,0 +1,39 @@
+import pytest
+from unittest.mock import patch
+from celery import Celery, states
+
+from app.services import task_status
+from app.services.task_status import get_task_statuses
+
+@pytest.fixture
+def memory_celery_app():
+    app = Celery("test_task_status", backend="cache+memory://")
+    task_status._terminal_cache.clear()
+    with patch.object(task_status, "celery_app", app):
+        yield app
+    task_status._terminal_cache.clear()
+
+def test_get_task_statuses_single_round_trip(memory_celery_app):
+    backend = memory_celery_app.backend
+    backend.store_result("done-task", {"status": "success"}, states.SUCCESS)
+    backend.store_result("failed-task", ValueError("bad image"), states.FAILURE)
+    backend.store_result("running-task", None, states.STARTED)
+
+    with patch.object(backend, "mget", wraps=backend.mget) as mget:
+        statuses = get_task_statuses(["running-task", "done-task", "unknown-task", "failed-task"])
+
+    mget.assert_called_once()
+    assert [s["status"] for s in statuses] == ["processing", "completed", "processing", "failed"]
+    assert statuses[1]["result"] == {"status": "success"}
+    assert "bad image" in statuses[3]["error"]
+
+def test_terminal_statuses_are_cached(memory_celery_app):
+    backend = memory_celery_app.backend
+    backend.store_result("done-task", {"status": "success"}, states.SUCCESS)
+    get_task_statuses(["done-task", "pending-task"])
+
+    with patch.object(backend, "mget", wraps=backend.mget) as mget:
+        statuses = get_task_statuses(["done-task", "pending-task"])
+
+    assert mget.call_args.args[0] == [backend.get_key_for_task("pending-task")]
+    assert statuses[0]["status"] == "completed"
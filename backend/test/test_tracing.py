@@ -0,0 +1,66 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from app.core import celery_tracing
+from app.core import tracing
+from app.core.tracing import setup_tracing, tracer, tracing_middleware
+
+exporter = InMemorySpanExporter()
+
+@pytest.fixture
+def spans():
+    # A tracer provider can only be installed once per process
+    if not tracing._configured:
+        setup_tracing("test", exporter=exporter)
+    exporter.clear()
+    yield exporter
+    exporter.clear()
+
+def test_request_span_named_by_route_template(spans):
+    api = FastAPI()
+    api.middleware("http")(tracing_middleware)
+
+    @api.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        return {"item_id": item_id}
+
+    TestClient(api).get("/items/42")
+
+    span, = spans.get_finished_spans()
+    assert span.name == "GET /items/{item_id}"
+    assert span.attributes["http.status_code"] == 200
+
+def test_trace_context_crosses_celery_boundary(spans):
+    headers = {"id": "task-1"}
+    with tracer.start_as_current_span("POST /api/v1/food-images/"):
+        celery_tracing.start_publish_span(sender="process_food_image", headers=headers)
+        celery_tracing.end_publish_span(headers=headers)
+    assert "traceparent" in headers
+
+    # The worker sees custom message headers as attributes of task.request
+    task = SimpleNamespace(name="process_food_image", request=SimpleNamespace(retries=0, **headers))
+    celery_tracing.start_task_span(task_id="task-1", task=task)
+    with tracer.start_as_current_span("llm.vision"):
+        pass
+    celery_tracing.end_task_span(task_id="task-1", state="SUCCESS")
+
+    finished = {span.name: span for span in spans.get_finished_spans()}
+    request_span = finished["POST /api/v1/food-images/"]
+    run_span = finished["celery.run process_food_image"]
+    assert run_span.context.trace_id == request_span.context.trace_id
+    assert run_span.parent.span_id == finished["celery.publish process_food_image"].context.span_id
+    assert finished["llm.vision"].parent.span_id == run_span.context.span_id
+
+@pytest.mark.asyncio
+async def test_coroutine_decorator_span(spans):
+    @tracer.start_as_current_span("food_image.create")
+    async def create():
+        return tracing.current_trace_id()
+
+    trace_id = await create()
+    span, = spans.get_finished_spans()
+    assert span.name == "food_image.create"
+    assert trace_id == format(span.context.trace_id, "032x")
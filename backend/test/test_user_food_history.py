@@ -137,4 +137,67 @@ def test_read_food_history_by_id(client_with_db: TestClient, db_session: Session
     assert content["food_image_id"] == str(test_food_image_id)
     assert content["total_nutrients"] == test_total_nutrients
     app.dependency_overrides.pop(deps.get_db, None)
-    app.dependency_overrides.pop(deps.get_current_user, None) 
\ No newline at end of file
+    app.dependency_overrides.pop(deps.get_current_user, None)
+
+
+@pytest.fixture
+def many_food_history(db_session: Session, test_user: User):
+    entries = []
+    for hour in range(5):
+        food_history_in = UserFoodHistoryCreate(
+            meal_datetime=datetime(2025, 6, 10, hour, 0, 0),
+            meal_type="snack",
+            total_nutrients=test_total_nutrients
+        )
+        entries.append(crud.create_user_food_history(db=db_session, obj_in=food_history_in, user_id=test_user.id))
+    db_session.commit()
+    return entries
+
+def test_cursor_round_trip():
+    history_id = uuid4()
+    cursor = crud.encode_cursor(test_meal_datetime, history_id)
+    assert crud.decode_cursor(cursor) == (test_meal_datetime, history_id)
+    with pytest.raises(ValueError):
+        crud.decode_cursor("not-a-cursor")
+
+def test_read_food_history_keyset_pagination(client_with_db: TestClient, db_session: Session, test_user: User, many_food_history):
+    from app.main import app
+    app.dependency_overrides[deps.get_db] = lambda: db_session
+    app.dependency_overrides[deps.get_current_user] = lambda: test_user
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client_with_db.get("/api/v1/food-history/", params=params)
+        assert response.status_code == 200
+        seen.extend(entry["meal_datetime"] for entry in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(many_food_history)
+
+    response = client_with_db.get("/api/v1/food-history/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    app.dependency_overrides.pop(deps.get_db, None)
+    app.dependency_overrides.pop(deps.get_current_user, None)
+
+def test_export_food_history_ndjson(client_with_db: TestClient, db_session: Session, test_user: User, many_food_history):
+    import json
+    from app.main import app
+    app.dependency_overrides[deps.get_db] = lambda: db_session
+    app.dependency_overrides[deps.get_current_user] = lambda: test_user
+    response = client_with_db.get(
+        "/api/v1/food-history/export",
+        params={"start_date": "2025-06-10T01:00:00", "end_date": "2025-06-10T03:00:00"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["meal_datetime"] for line in lines] == [
+        "2025-06-10T03:00:00", "2025-06-10T02:00:00", "2025-06-10T01:00:00"
+    ]
+    app.dependency_overrides.pop(deps.get_db, None)
+    app.dependency_overrides.pop(deps.get_current_user, None)
@@ -0,0 +1,94 @@
+import json
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from uuid import uuid4
+from sqlalchemy.orm import Session
+
+from app.models.models import FoodImage, FoodItem as FoodItemModel
+from app.models.nutrient_profile import NutrientProfile
+from app.models.user import User
+from app.models.user_food_history import UserFoodHistory
+from app.services.nutrient_estimation import FoodItem, NutrientEstimationService
+from app.services.user_food_vocabulary import UserFoodVocabulary, VocabularyEntry, load_user_vocabulary
+
+NUTRIENTS = {"iron_mg": 0.1, "potassium_mg": 107, "magnesium_mg": 5, "calcium_mg": 6, "vitamin_d_mcg": 0,
+             "vitamin_b12_mcg": 0, "folate_mcg": 3, "zinc_mg": 0.04, "selenium_mcg": 0, "fiber_g": 2.4}
+
+def entry(description, **kwargs):
+    return VocabularyEntry(description=description, nutrients=NUTRIENTS, llm_prompt_version="v1.0",
+                           estimated_by="gpt-4", **kwargs)
+
+def item(description, quantity=1.0):
+    return FoodItem(description=description, quantity=quantity, unit="piece", confidence=1.0, is_estimated=False)
+
+def test_load_ranks_habitual_foods_with_stored_profiles(db_session: Session):
+    user = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x", demographics={}, settings={})
+    db_session.add(user)
+    for descriptions, logged in [(["apple", "oatmeal"], True), (["apple", "Banana"], False), (["apple"], False)]:
+        image = FoodImage(user_id=user.id, image_url="/tmp/meal.jpg", captured_at=datetime.utcnow(), status="processed")
+        db_session.add(image)
+        db_session.flush()
+        for position, description in enumerate(descriptions):
+            db_session.add(FoodItemModel(food_image_id=image.id, position=position, description=description, quantity=2.0 if description == "apple" else 1.0))
+        if logged:
+            db_session.add(UserFoodHistory(user_id=user.id, meal_datetime=datetime.utcnow(), meal_type="breakfast", food_image_id=image.id))
+    for name in ["apple", "oatmeal", "banana"]:
+        db_session.add(NutrientProfile(food_name=name, nutrients=NUTRIENTS, source="model_estimate", llm_prompt_version="v1.0", estimated_by="gpt-4"))
+    db_session.commit()
+
+    entries = load_user_vocabulary(user.id, max_foods=2, db=db_session)
+
+    # apple: 4 uses (one logged meal counts double); oatmeal: 2 (logged); banana: 1, over the limit
+    assert [(e.description, e.uses) for e in entries] == [("oatmeal", 2), ("apple", 4)]
+
+def test_vocabulary_is_bounded_per_user_and_evicts_least_recently_used():
+    loads = []
+    vocabulary = UserFoodVocabulary(loader=lambda user_id, max_foods: loads.append(user_id) or [entry("apple")], max_foods=2)
+
+    vocabulary.remember("u1", "banana", entry("banana"))
+    assert vocabulary.get("u1", "APPLE") is not None
+    vocabulary.remember("u1", "oatmeal", entry("oatmeal"))
+
+    assert vocabulary.get("u1", "banana") is None
+    assert vocabulary.for_user("u1").descriptions() == ["apple", "oatmeal"]
+    assert vocabulary.get("u2", "banana") is None
+    assert loads == ["u1", "u2"]
+
+@pytest.mark.asyncio
+async def test_user_vocabulary_is_checked_first_and_learns_new_foods():
+    arguments = json.dumps({"items": {"1": NUTRIENTS}})
+    openai_client = AsyncMock()
+    openai_client.chat.completions.create.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(function_call=SimpleNamespace(arguments=arguments)))],
+        usage=None,
+    )
+    vocabulary = UserFoodVocabulary(loader=lambda user_id, max_foods: [entry("apple")])
+    service = NutrientEstimationService(openai_client, user_vocabulary=vocabulary)
+
+    results = await service.estimate_nutrients_batch([item("Apple"), item("kiwi", 2.0)], user_id="u1")
+
+    assert [profile.source for _, profile in results] == ["user_vocabulary", "model_estimate"]
+    assert openai_client.chat.completions.create.await_count == 1
+    kiwi = vocabulary.get("u1", "kiwi")
+    assert kiwi.nutrients == NUTRIENTS
+    # Other users, and calls without a user, don't see u1's foods
+    assert vocabulary.get("u2", "kiwi") is None
+    (_, profile), = await service.estimate_nutrients_batch([item("apple")])
+    assert profile.source == "model_estimate"
+
+def test_load_skips_profiles_on_another_basis(db_session: Session):
+    user = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x", demographics={}, settings={})
+    db_session.add(user)
+    image = FoodImage(user_id=user.id, image_url="/tmp/meal.jpg", captured_at=datetime.utcnow(), status="processed")
+    db_session.add(image)
+    db_session.flush()
+    for position, description in enumerate(["bagel", "pear"]):
+        db_session.add(FoodItemModel(food_image_id=image.id, position=position, description=description, quantity=1.0))
+    db_session.add(NutrientProfile(food_name="bagel", nutrients=NUTRIENTS, source="model_estimate", llm_prompt_version="v1.0", estimated_by="gpt-4", basis="per_unit"))
+    db_session.add(NutrientProfile(food_name="pear", nutrients=NUTRIENTS, source="model_estimate", llm_prompt_version="v1.1", estimated_by="gpt-4"))
+    db_session.commit()
+
+    # A per-piece estimate would be scaled as per 100 g, so it is never reused
+    assert [e.description for e in load_user_vocabulary(user.id, max_foods=10, db=db_session)] == ["pear"]
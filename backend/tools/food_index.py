@@ -0,0 +1,70 @@
+"""
+Build or query the local food similarity index used to reuse nutrient
+profiles of near-identical foods (app/services/food_vectors.py).
+
+    python -m tools.food_index build                  # from the nutrient_profiles table
+    python -m tools.food_index query "grk yogurt plain" -k 5
+
+`build` publishes a new index version atomically; running workers switch to
+it within FOOD_VECTOR_RELOAD_SECONDS, so it can run from cron while they serve.
+"""
+import argparse
+import time
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.food_vectors import DEFAULT_DIMENSIONS, FoodVectorIndex, build_index
+
+def build(args: argparse.Namespace) -> int:
+    from app.crud.nutrient_profile import iter_profiles
+    from app.db.session import SessionLocal
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        profiles = (
+            {
+                "food_name": profile.food_name,
+                "nutrients": profile.nutrients,
+                "llm_prompt_version": profile.llm_prompt_version,
+                "estimated_by": profile.estimated_by,
+            }
+            for profile in iter_profiles(db)
+        )
+        count = build_index(args.dir, profiles, dimensions=args.dimensions)
+    finally:
+        db.close()
+    print(f"Indexed {count} foods into {args.dir} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+def query(args: argparse.Namespace) -> int:
+    index = FoodVectorIndex(args.dir, reload_seconds=0)
+    if not len(index):
+        print(f"No index in {args.dir}; run `python -m tools.food_index build` first")
+        return 1
+    for match in index.nearest([args.text], k=args.k)[0]:
+        marker = "*" if match.similarity >= settings.FOOD_VECTOR_MIN_SIMILARITY else " "
+        print(f"{marker} {match.similarity:.3f}  {match.food_name}")
+    return 0
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=settings.FOOD_VECTOR_INDEX_DIR, help="index directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="rebuild the index from stored nutrient profiles")
+    build_parser.add_argument("--dimensions", type=int, default=DEFAULT_DIMENSIONS, help="hashed n-gram buckets per vector")
+    build_parser.set_defaults(handler=build)
+
+    query_parser = commands.add_parser("query", help="show the nearest indexed foods (* = would be reused)")
+    query_parser.add_argument("text")
+    query_parser.add_argument("-k", type=int, default=5, help="number of matches to show")
+    query_parser.set_defaults(handler=query)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
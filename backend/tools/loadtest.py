@@ -0,0 +1,227 @@
+"""
+End-to-end load test: upload food images, poll until recognition finishes,
+then write a food history entry, from many concurrent virtual users.
+
+Reports per-endpoint and per-stage latency percentiles and throughput, and
+checks them against the product targets (API P95 < 200 ms). Meant to run
+against a local stack with the LLM stub (tools/openai_stub.py), Redis and
+the Celery workers from start_workers.sh:
+
+    python -m tools.loadtest --base-url http://localhost:8000 --users 100 --duration 120
+
+Each run registers its own users, so it can be repeated against the same database.
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+from PIL import Image
+
+API = "/api/v1"
+
+# Latency targets from the product spec, checked against the run's P95s
+TARGETS = {
+    "endpoint_p95_seconds": 0.2,
+}
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of `values` (pct in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+class Recorder:
+    """Collects latencies and errors per endpoint (e.g. "POST /food-images/") and per stage."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float, ok: bool = True) -> None:
+        self.latencies[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = self.latencies[name]
+            report[name] = {
+                "count": len(values),
+                "errors": self.errors[name],
+                "p50_ms": _ms(percentile(values, 50)),
+                "p95_ms": _ms(percentile(values, 95)),
+                "p99_ms": _ms(percentile(values, 99)),
+                "max_ms": _ms(max(values) if values else None),
+                "throughput_per_s": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+            }
+        return report
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+def check_targets(summary: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Names of endpoints whose P95 misses the API latency target."""
+    limit_ms = TARGETS["endpoint_p95_seconds"] * 1000
+    return [
+        name for name, row in summary.items()
+        if not name.startswith("stage:") and row["p95_ms"] is not None and row["p95_ms"] > limit_ms
+    ]
+
+def format_report(summary: Dict[str, Dict[str, Any]], elapsed: float) -> str:
+    lines = [
+        f"{'name':<40} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'per s':>8}"
+    ]
+    for name, row in summary.items():
+        cells = [row[key] if row[key] is not None else "-" for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        lines.append(
+            f"{name:<40} {row['count']:>7} {row['errors']:>7} "
+            + " ".join(f"{cell:>9}" for cell in cells)
+            + f" {row['throughput_per_s']:>8}"
+        )
+    lines.append(f"elapsed: {elapsed:.1f}s")
+    missed = check_targets(summary)
+    if missed:
+        lines.append(f"P95 above {TARGETS['endpoint_p95_seconds'] * 1000:.0f} ms: {', '.join(missed)}")
+    else:
+        lines.append(f"all endpoints within P95 target of {TARGETS['endpoint_p95_seconds'] * 1000:.0f} ms")
+    return "\n".join(lines)
+
+def sample_images(count: int = 8) -> List[bytes]:
+    """Small distinct JPEGs, so the LLM stub returns varied (but repeatable) results."""
+    images = []
+    rng = random.Random(0)
+    for _ in range(count):
+        buffer = io.BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new("RGB", (320, 240), color).save(buffer, format="JPEG")
+        images.append(buffer.getvalue())
+    return images
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, images: List[bytes], args: argparse.Namespace):
+        self.client = client
+        self.recorder = recorder
+        self.images = images
+        self.args = args
+        self.email = f"loadtest-{uuid.uuid4().hex[:12]}@example.com"
+        self.password = "loadtest-password"
+
+    async def request(self, method: str, path: str, name: Optional[str] = None, **kwargs) -> Optional[httpx.Response]:
+        name = name or f"{method} {path}"
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, f"{API}{path}", **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(name, time.perf_counter() - started, ok=False)
+            return None
+        self.recorder.record(name, time.perf_counter() - started, ok=response.is_success)
+        return response if response.is_success else None
+
+    async def sign_in(self) -> bool:
+        await self.request("POST", "/users/register", json={
+            "email": self.email, "password": self.password, "demographics": {}, "settings": {},
+        })
+        response = await self.request("POST", "/users/login", json={"email": self.email, "password": self.password})
+        if response is None:
+            return False
+        self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        return True
+
+    async def wait_for_task(self, task_id: str, deadline: float) -> Optional[Dict[str, Any]]:
+        while time.perf_counter() < deadline:
+            response = await self.request("GET", "/tasks/status", params={"task_id": task_id})
+            if response is not None:
+                status = response.json()["tasks"][0]
+                if status["status"] in ("completed", "failed"):
+                    return status
+            await asyncio.sleep(self.args.poll_interval)
+        return None
+
+    async def iteration(self, index: int) -> None:
+        started = time.perf_counter()
+        image = self.images[index % len(self.images)]
+        response = await self.request(
+            "POST", "/food-images/", files={"file": ("meal.jpg", image, "image/jpeg")}
+        )
+        if response is None:
+            return
+        uploaded = response.json()
+
+        status = await self.wait_for_task(uploaded["task_id"], started + self.args.task_timeout)
+        self.recorder.record("stage:upload_to_recognized", time.perf_counter() - started,
+                             ok=status is not None and status["status"] == "completed")
+        if status is None or status["status"] != "completed":
+            return
+
+        await self.request("POST", "/food-history/", json={
+            "meal_datetime": datetime.utcnow().isoformat(),
+            "meal_type": "lunch",
+            "food_image_id": uploaded["id"],
+            "total_nutrients": {"iron_mg": 1.0},
+        })
+        self.recorder.record("stage:end_to_end", time.perf_counter() - started)
+
+    async def run(self, stop_at: float) -> None:
+        if not await self.sign_in():
+            return
+        index = 0
+        while time.perf_counter() < stop_at and (self.args.iterations is None or index < self.args.iterations):
+            await self.iteration(index)
+            index += 1
+            if self.args.think_time:
+                await asyncio.sleep(random.uniform(0, 2 * self.args.think_time))
+
+async def run_load_test(args: argparse.Namespace, transport: Optional[httpx.AsyncBaseTransport] = None) -> Dict[str, Any]:
+    recorder = Recorder()
+    images = sample_images()
+    started = time.perf_counter()
+    stop_at = started + args.duration
+
+    async def spawn(index: int) -> None:
+        await asyncio.sleep(index / args.spawn_rate)
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.request_timeout, transport=transport) as client:
+            await VirtualUser(client, recorder, images, args).run(stop_at)
+
+    await asyncio.gather(*(spawn(index) for index in range(args.users)))
+    elapsed = time.perf_counter() - started
+    summary = recorder.summary(elapsed)
+    return {"elapsed_seconds": round(elapsed, 2), "users": args.users, "results": summary,
+            "missed_targets": check_targets(summary)}
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=100, help="concurrent virtual users")
+    parser.add_argument("--spawn-rate", type=float, default=10.0, help="users started per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to keep starting iterations")
+    parser.add_argument("--iterations", type=int, default=None, help="stop each user after this many uploads")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean pause between a user's uploads")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--task-timeout", type=float, default=60.0)
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="also write the report as JSON to this file")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_load_test(args))
+    print(format_report(report["results"], report["elapsed_seconds"]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["missed_targets"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+"""
+Deterministic OpenAI-compatible stub for offline load testing.
+
+Serves `POST /v1/chat/completions` with the response shapes the app relies on:
+- image inputs get a JSON array of recognized food items (vision recognition)
+- `functions` / `tools` requests get a function call whose arguments follow
+  the requested JSON schema (nutrient estimation)
+- anything else gets a short text reply
+
+Responses are keyed by a hash of the request, so the same prompt always gets
+the same answer. Latency and error injection are configured with environment
+variables (see `StubConfig.from_env`) or at runtime via `POST /stub/config`.
+
+Run from `backend/` and point the app at it:
+
+    uvicorn tools.openai_stub:app --port 8100
+    OPENAI_API_BASE=http://localhost:8100/v1 OPENAI_API_KEY=stub uvicorn app.main:app
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+FOODS = [
+    "apple", "banana", "broccoli", "brown rice", "chicken breast", "salmon fillet",
+    "spinach salad", "greek yogurt", "whole wheat bread", "boiled egg", "lentil soup",
+    "almonds", "orange", "avocado toast", "oatmeal", "black beans",
+]
+
+@dataclass
+class StubConfig:
+    latency: str = "lognormal"  # "fixed", "uniform" or "lognormal"
+    latency_ms: float = 800.0  # fixed value, uniform mean or lognormal median
+    latency_spread: float = 0.5  # uniform: +/- fraction of the mean; lognormal: sigma
+    error_rate: float = 0.0  # fraction of requests answered with a 500
+    rate_limit_rate: float = 0.0  # fraction of requests answered with a 429
+    retry_after_seconds: float = 1.0
+    seed: int = 0
+
+    @classmethod
+    def from_env(cls) -> "StubConfig":
+        config = cls()
+        for field in fields(cls):
+            value = os.getenv(f"OPENAI_STUB_{field.name.upper()}")
+            if value is not None:
+                setattr(config, field.name, field.type(value) if field.type is not str else value)
+        return config
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Seconds to wait before answering."""
+        if self.latency == "fixed":
+            ms = self.latency_ms
+        elif self.latency == "uniform":
+            ms = rng.uniform(self.latency_ms * (1 - self.latency_spread), self.latency_ms * (1 + self.latency_spread))
+        else:
+            ms = rng.lognormvariate(0, self.latency_spread) * self.latency_ms
+        return max(0.0, ms) / 1000
+
+def request_key(body: Dict[str, Any]) -> str:
+    """Stable hash of everything that determines the reply."""
+    keyed = {name: body.get(name) for name in ("model", "messages", "functions", "tools")}
+    return hashlib.sha256(json.dumps(keyed, sort_keys=True).encode()).hexdigest()
+
+def _has_image(messages: List[Dict[str, Any]]) -> bool:
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list) and any(part.get("type") == "image_url" for part in content):
+            return True
+    return False
+
+def _value_for_schema(schema: Dict[str, Any], rng: random.Random) -> Any:
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _value_for_schema(sub, rng) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_value_for_schema(schema.get("items", {}), rng) for _ in range(rng.randint(1, 3))]
+    if kind == "number":
+        return round(rng.uniform(0, 50), 2)
+    if kind == "integer":
+        return rng.randint(0, 50)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    return rng.choice(FOODS)
+
+def _recognized_items(rng: random.Random) -> str:
+    items = [
+        {
+            "description": food,
+            "quantity": rng.choice([0.5, 1, 1, 2, 3]),
+            "confidence": round(rng.uniform(0.6, 0.99), 2),
+        }
+        for food in rng.sample(FOODS, rng.randint(1, 4))
+    ]
+    return json.dumps(items)
+
+def build_completion(body: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """A chat.completion response for `body`, fully determined by `key`."""
+    rng = random.Random(key)
+    message: Dict[str, Any] = {"role": "assistant", "content": None}
+    finish_reason = "stop"
+    if body.get("functions"):
+        function = body["functions"][0]
+        message["function_call"] = {
+            "name": function["name"],
+            "arguments": json.dumps(_value_for_schema(function.get("parameters", {}), rng)),
+        }
+        finish_reason = "function_call"
+    elif body.get("tools"):
+        function = body["tools"][0]["function"]
+        message["tool_calls"] = [{
+            "id": f"call_{key[:24]}",
+            "type": "function",
+            "function": {
+                "name": function["name"],
+                "arguments": json.dumps(_value_for_schema(function.get("parameters", {}), rng)),
+            },
+        }]
+        finish_reason = "tool_calls"
+    elif _has_image(body.get("messages", [])):
+        message["content"] = _recognized_items(rng)
+    else:
+        message["content"] = f"Stub reply {key[:12]}"
+
+    completion_tokens = len(json.dumps(message)) // 4
+    prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+    return {
+        "id": f"chatcmpl-{key[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+def _error(status_code: int, message: str, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"message": message, "type": error_type, "param": None, "code": None}},
+        headers=headers,
+    )
+
+def create_app(config: Optional[StubConfig] = None) -> FastAPI:
+    stub = FastAPI(title="OpenAI stub")
+    stub.state.config = config or StubConfig.from_env()
+    stub.state.rng = random.Random(stub.state.config.seed)
+    stub.state.stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    @stub.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        config: StubConfig = stub.state.config
+        rng: random.Random = stub.state.rng
+        stats = stub.state.stats
+        stats["requests"] += 1
+
+        await asyncio.sleep(config.sample_latency(rng))
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return _error(
+                429, "Rate limit reached (stub)", "requests",
+                headers={"retry-after": str(config.retry_after_seconds)},
+            )
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats["errors"] += 1
+            return _error(500, "Internal server error (stub)", "server_error")
+        return build_completion(body, request_key(body))
+
+    @stub.get("/stub/stats")
+    async def get_stats():
+        return stub.state.stats
+
+    @stub.post("/stub/config")
+    async def update_config(changes: Dict[str, Any]):
+        """Change latency/error settings mid-run, e.g. to simulate an outage."""
+        config: StubConfig = stub.state.config
+        for name, value in changes.items():
+            if hasattr(config, name):
+                setattr(config, name, value)
+        if "seed" in changes:
+            stub.state.rng = random.Random(config.seed)
+        return asdict(config)
+
+    return stub
+
+app = create_app()